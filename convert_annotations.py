@@ -1,53 +1,260 @@
-import os
-import xml.etree.ElementTree as ET
-
-# Paths
-annotations_dir = "annotations/Annotations"
-output_dir = "data/labels"
-
-os.makedirs(output_dir, exist_ok=True)
-
-# Define class mapping
-class_mapping = {
-    "fire": 0,
-    "smoke": 1
-}
-
-def convert_annotation(xml_file):
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-
-    image_name = os.path.splitext(os.path.basename(xml_file))[0]
-    txt_file = os.path.join(output_dir, image_name + ".txt")
-
-    with open(txt_file, "w") as f:
-        for obj in root.iter("object"):
-            cls = obj.find("name").text
-            if cls not in class_mapping:
-                continue
-
-            cls_id = class_mapping[cls]
-            xmlbox = obj.find("bndbox")
-            xmin = float(xmlbox.find("xmin").text)
-            ymin = float(xmlbox.find("ymin").text)
-            xmax = float(xmlbox.find("xmax").text)
-            ymax = float(xmlbox.find("ymax").text)
-
-            # YOLO format: x_center, y_center, width, height (normalized)
-            size = root.find("size")
-            img_w = float(size.find("width").text)
-            img_h = float(size.find("height").text)
-
-            x_center = ((xmin + xmax) / 2) / img_w
-            y_center = ((ymin + ymax) / 2) / img_h
-            width = (xmax - xmin) / img_w
-            height = (ymax - ymin) / img_h
-
-            f.write(f"{cls_id} {x_center} {y_center} {width} {height}\n")
-
-# Convert all XML files
-for xml_file in os.listdir(annotations_dir):
-    if xml_file.endswith(".xml"):
-        convert_annotation(os.path.join(annotations_dir, xml_file))
-
-print("✅ Conversion completed! YOLO label files are saved in 'data/labels'.")
+"""Convert Pascal VOC XML annotations to YOLO label files.
+
+    python convert_annotations.py                                  # annotations/Annotations -> data/labels
+    python convert_annotations.py --workers 16 --summary summary.json
+    python convert_annotations.py --data data.yaml                 # class ids from data.yaml 'names'
+    python convert_annotations.py --force                          # ignore the manifest, redo everything
+
+XML files are parsed in a process pool with streaming ``iterparse``. A
+manifest next to the labels records each XML's mtime, size and hash, so a
+re-run only converts files that actually changed (or whose label file is
+missing) and removes labels whose XML was deleted. Changing the class mapping
+invalidates the whole manifest.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+MANIFEST_NAME = ".convert_manifest.json"
+MANIFEST_VERSION = 1
+
+# Default class mapping (override with --classes or --data)
+class_mapping = {
+    "fire": 0,
+    "smoke": 1
+}
+
+
+class MalformedAnnotation(ValueError):
+    pass
+
+
+def _number(elem, tag):
+    node = elem.find(tag)
+    if node is None or node.text is None:
+        raise MalformedAnnotation(f"missing <{tag}>")
+    try:
+        return float(node.text)
+    except ValueError:
+        raise MalformedAnnotation(f"bad <{tag}> value {node.text!r}")
+
+
+def parse_annotation(xml_file):
+    """Stream one VOC file; returns ``(img_w, img_h, [(name, xmin, ymin, xmax, ymax), ...])``."""
+    img_w = img_h = None
+    objects = []
+    try:
+        for _, elem in ET.iterparse(xml_file, events=("end",)):
+            if elem.tag == "size":
+                img_w, img_h = _number(elem, "width"), _number(elem, "height")
+                elem.clear()
+            elif elem.tag == "object":
+                name_node = elem.find("name")
+                box = elem.find("bndbox")
+                if name_node is None or not name_node.text or box is None:
+                    raise MalformedAnnotation("object without <name> or <bndbox>")
+                objects.append((name_node.text.strip(), _number(box, "xmin"), _number(box, "ymin"),
+                                _number(box, "xmax"), _number(box, "ymax")))
+                # Objects are fully consumed; drop them so memory stays flat
+                elem.clear()
+    except ET.ParseError as e:
+        raise MalformedAnnotation(f"XML parse error: {e}")
+    if not img_w or not img_h:
+        raise MalformedAnnotation("missing or zero <size>")
+    return img_w, img_h, objects
+
+
+def file_digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def convert_annotation(xml_file, output_dir, mapping):
+    """Convert one file; returns a manifest entry (with ``error`` set when malformed)."""
+    st = os.stat(xml_file)
+    entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "digest": file_digest(xml_file),
+             "boxes": {}, "ignored": {}, "error": None}
+    image_name = os.path.splitext(os.path.basename(xml_file))[0]
+    txt_file = os.path.join(output_dir, image_name + ".txt")
+    try:
+        img_w, img_h, objects = parse_annotation(xml_file)
+    except MalformedAnnotation as e:
+        entry["error"] = str(e)
+        # Don't leave a label from an older, valid version of this file behind
+        if os.path.exists(txt_file):
+            os.remove(txt_file)
+        return entry
+
+    lines = []
+    boxes, ignored = Counter(), Counter()
+    for name, xmin, ymin, xmax, ymax in objects:
+        cls_id = mapping.get(name)
+        if cls_id is None:
+            ignored[name] += 1
+            continue
+        boxes[name] += 1
+        # YOLO format: x_center, y_center, width, height (normalized)
+        x_center = ((xmin + xmax) / 2) / img_w
+        y_center = ((ymin + ymax) / 2) / img_h
+        width = (xmax - xmin) / img_w
+        height = (ymax - ymin) / img_h
+        lines.append(f"{cls_id} {x_center} {y_center} {width} {height}\n")
+
+    tmp_file = txt_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        f.writelines(lines)
+    os.replace(tmp_file, txt_file)
+    entry["boxes"] = dict(boxes)
+    entry["ignored"] = dict(ignored)
+    return entry
+
+
+def _convert_job(args):
+    name, annotations_dir, output_dir, mapping = args
+    try:
+        return name, convert_annotation(os.path.join(annotations_dir, name), output_dir, mapping)
+    except OSError as e:
+        return name, {"error": f"I/O error: {e}", "boxes": {}, "ignored": {}}
+
+
+def load_manifest(path, mapping):
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("classes") != mapping:
+        return {}
+    return manifest.get("files", {})
+
+
+def save_manifest(path, mapping, files):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "classes": mapping, "files": files}, f)
+    os.replace(tmp, path)
+
+
+def _unchanged(xml_path, entry, label_path):
+    """True when the manifest entry still matches the XML (mtime/size, else content hash)."""
+    if entry is None or entry.get("error") or not os.path.exists(label_path):
+        return False
+    st = os.stat(xml_path)
+    if st.st_mtime_ns == entry.get("mtime_ns") and st.st_size == entry.get("size"):
+        return True
+    if st.st_size == entry.get("size") and file_digest(xml_path) == entry.get("digest"):
+        # Touched but not modified: remember the new mtime and move on
+        entry["mtime_ns"] = st.st_mtime_ns
+        return True
+    return False
+
+
+def class_mapping_from(args):
+    if args.data:
+        import yaml
+        with open(args.data) as f:
+            names = yaml.safe_load(f).get("names") or []
+        if isinstance(names, dict):
+            return {str(v): int(k) for k, v in names.items()}
+        return {str(n): i for i, n in enumerate(names)}
+    if args.classes:
+        return {name: i for i, name in enumerate(args.classes)}
+    return dict(class_mapping)
+
+
+def run(args):
+    mapping = class_mapping_from(args)
+    os.makedirs(args.output, exist_ok=True)
+    manifest_path = args.manifest or os.path.join(args.output, MANIFEST_NAME)
+    previous = {} if args.force else load_manifest(manifest_path, mapping)
+
+    names = sorted(n for n in os.listdir(args.annotations) if n.endswith(".xml"))
+    files, todo = {}, []
+    for name in names:
+        label = os.path.join(args.output, os.path.splitext(name)[0] + ".txt")
+        entry = previous.get(name)
+        if _unchanged(os.path.join(args.annotations, name), entry, label):
+            files[name] = entry
+        else:
+            todo.append(name)
+
+    if todo:
+        jobs = [(name, args.annotations, args.output, mapping) for name in todo]
+        workers = args.workers or os.cpu_count() or 1
+        if workers == 1 or len(jobs) == 1:
+            files.update(map(_convert_job, jobs))
+        else:
+            # Big chunks keep per-task IPC negligible next to parsing a small XML
+            chunksize = max(1, len(jobs) // (8 * workers))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                files.update(pool.map(_convert_job, jobs, chunksize=chunksize))
+
+    # Labels whose XML disappeared since the last run
+    removed = 0
+    for name in set(previous) - set(names):
+        label = os.path.join(args.output, os.path.splitext(name)[0] + ".txt")
+        if os.path.exists(label):
+            os.remove(label)
+            removed += 1
+
+    save_manifest(manifest_path, mapping, files)
+
+    per_class, ignored = Counter(), Counter()
+    malformed = {}
+    for name, entry in files.items():
+        per_class.update(entry.get("boxes") or {})
+        ignored.update(entry.get("ignored") or {})
+        if entry.get("error"):
+            malformed[name] = entry["error"]
+    return {
+        "files": len(names),
+        "converted": len(todo) - sum(1 for n in todo if files[n].get("error")),
+        "unchanged": len(names) - len(todo),
+        "removed": removed,
+        "malformed": malformed,
+        "boxes_per_class": dict(per_class),
+        "ignored_classes": dict(ignored),
+        "empty_label_files": sum(1 for e in files.values() if not e.get("error") and not e.get("boxes")),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert Pascal VOC XML annotations to YOLO labels")
+    parser.add_argument("--annotations", default="annotations/Annotations", help="directory with VOC .xml files")
+    parser.add_argument("--output", default="data/labels", help="directory for YOLO .txt labels")
+    parser.add_argument("--classes", nargs="+", default=None, help="class names in id order (default: fire smoke)")
+    parser.add_argument("--data", default=None, help="take class names/ids from a dataset yaml instead")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores, 1 = serial)")
+    parser.add_argument("--manifest", default=None, help=f"manifest path (default: <output>/{MANIFEST_NAME})")
+    parser.add_argument("--force", action="store_true", help="reconvert every file")
+    parser.add_argument("--summary", default=None, help="also write the summary as JSON here")
+    args = parser.parse_args(argv)
+
+    summary = run(args)
+    print(f"✅ {summary['converted']} converted, {summary['unchanged']} unchanged, "
+          f"{len(summary['malformed'])} malformed, {summary['removed']} stale labels removed "
+          f"({summary['files']} XML files) -> '{args.output}'")
+    for name, count in sorted(summary["boxes_per_class"].items()):
+        print(f"   {name}: {count} boxes")
+    if summary["ignored_classes"]:
+        print(f"   ignored (not in class mapping): {summary['ignored_classes']}")
+    for name, reason in sorted(summary["malformed"].items())[:20]:
+        print(f"   ⚠️ {name}: {reason}")
+    if len(summary["malformed"]) > 20:
+        print(f"   ... and {len(summary['malformed']) - 20} more malformed files")
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary["malformed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,64 +1,114 @@
-from ultralytics import YOLO
-import cv2
-import firebase_admin
-from firebase_admin import credentials, db
-import time
-
-# ---------------------------
-# 1. Load YOLO trained model
-# ---------------------------
-model = YOLO("runs/detect/train/weights/best.pt")   # update path if different
-
-# ---------------------------
-# 2. Initialize Firebase
-# ---------------------------
-cred = credentials.Certificate("serviceAccountKey.json")  # your Firebase key file
-firebase_admin.initialize_app(cred, {
-    'databaseURL': 'https://fire-detection-alert-system-default-rtdb.firebaseio.com/'   # replace this
-})
-
-ref = db.reference("alerts")  # Database node
-
-# ---------------------------
-# 3. Read webcam/video
-# ---------------------------
-cap = cv2.VideoCapture(0)   # 0 = webcam
-
-print("🔥 Fire Detection System Started...")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    results = model(frame)
-
-    fire_detected = False
-
-    for r in results:
-        for box in r.boxes:
-            class_id = int(box.cls[0])
-            conf = float(box.conf[0])
-
-            # class_id = 0 → fire, 1 → smoke
-            if class_id in [0, 1] and conf > 0.5:
-                fire_detected = True
-
-    # ---------------------------
-    # 4. Push alert to Firebase
-    # ---------------------------
-    if fire_detected:
-        alert_data = {
-            "status": "FIRE DETECTED!",
-            "timestamp": int(time.time())
-        }
-        ref.push(alert_data)
-        print("🔥 ALERT SENT TO FIREBASE!")
-
-    cv2.imshow("Fire Detection", frame)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
+from ultralytics import YOLO
+import cv2
+import os
+import time
+from motion_gate import MotionGate
+from incident_tracker import IncidentTracker, OPENED, CLOSED
+from notifier import NotificationDispatcher, StubSink
+
+# ---------------------------
+# 1. Load YOLO trained model
+# ---------------------------
+model = YOLO("runs/detect/train/weights/best.pt")   # update path if different
+
+# ---------------------------
+# 2. Initialize Firebase (NOTIFY_STUB=1 prints alerts locally instead)
+# ---------------------------
+incident_refs = {}
+
+if os.getenv("NOTIFY_STUB"):
+    push_incident = StubSink("firebase")
+else:
+    import firebase_admin
+    from firebase_admin import credentials, db
+
+    cred = credentials.Certificate("serviceAccountKey.json")  # your Firebase key file
+    firebase_admin.initialize_app(cred, {
+        'databaseURL': 'https://fire-detection-alert-system-default-rtdb.firebaseio.com/'   # replace this
+    })
+
+    ref = db.reference("alerts")  # Database node
+
+    def push_incident(payload):
+        # Runs on the dispatcher's worker, never in the video loop
+        incident_id = payload["incident_id"]
+        if payload.get("resolved_at") is None:
+            incident_refs[incident_id] = ref.push(payload)
+            print("🔥 ALERT SENT TO FIREBASE!")
+        else:
+            incident_ref = incident_refs.pop(incident_id, None)
+            if incident_ref is not None:
+                incident_ref.update({k: payload[k] for k in ("resolved_at", "peak_confidence")})
+
+# One worker keeps each incident's open/close in order; failed pushes are retried with backoff
+notifications = NotificationDispatcher({"firebase": (push_incident, 1)}, queue_size=100, retries=3)
+
+# ---------------------------
+# 3. Read webcam/video
+# ---------------------------
+cap = cv2.VideoCapture(0)   # 0 = webcam
+
+# Only run the model when the scene changed (plus a keyframe every 5 s)
+motion_gate = MotionGate(threshold=0.01, keyframe_interval=5.0)
+
+# One alert per incident: 3 of 5 frames above 0.5 to open, 15 frames below 0.3 to close
+tracker = IncidentTracker(open_threshold=0.5, close_threshold=0.3, k=3, n=5, close_after=15)
+
+print("🔥 Fire Detection System Started...")
+
+while True:
+    ret, frame = cap.read()
+    if not ret:
+        break
+
+    event = None
+
+    # Skip the model on frames where nothing changed
+    if motion_gate.should_infer(frame):
+        results = model(frame)
+
+        best_conf = 0.0
+        for r in results:
+            # One device->host copy per result instead of one per box
+            conf = r.boxes.conf.cpu().numpy()
+            cls = r.boxes.cls.cpu().numpy()
+
+            # class_id 0 / 1 → smoke / fire (data.yaml)
+            hits = conf[(cls == 0) | (cls == 1)]
+            if hits.size:
+                best_conf = max(best_conf, float(hits.max()))
+
+        event = tracker.update("webcam", best_conf)
+    else:
+        # Unchanged scene, unchanged result: keeps the tracker's K-of-N counting in frames
+        event = tracker.hold("webcam")
+
+    # ---------------------------
+    # 4. Push alert to Firebase (once per incident)
+    # ---------------------------
+    if event is not None and event.kind == OPENED:
+        alert_data = {
+            "status": "FIRE DETECTED!",
+            "timestamp": int(event.started_at),
+            "incident_id": event.incident_id,
+            "confidence": round(event.peak_confidence, 3)
+        }
+        notifications.notify("firebase", alert_data, incident_id=event.incident_id, kind=OPENED)
+    elif event is not None and event.kind == CLOSED:
+        notifications.notify("firebase", {
+            "incident_id": event.incident_id,
+            "resolved_at": int(event.ended_at),
+            "peak_confidence": round(event.peak_confidence, 3)
+        }, incident_id=event.incident_id, kind=CLOSED)
+        print(f"✅ Incident {event.incident_id} cleared after {event.frames} frames")
+
+    cv2.imshow("Fire Detection", frame)
+
+    if cv2.waitKey(1) & 0xFF == ord('q'):
+        break
+
+cap.release()
+cv2.destroyAllWindows()
+notifications.close()
+print(f"Motion gate: {motion_gate.summary()}")
+print(f"Notifications: {notifications.summary()}")
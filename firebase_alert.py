@@ -1,22 +1,37 @@
-import firebase_admin
-from firebase_admin import credentials, db
-
-# Load your Firebase Admin SDK key
-cred = credentials.Certificate("serviceAccountKey.json")
-
-# Initialize Firebase app
-firebase_admin.initialize_app(cred, {
-    "databaseURL": "https://fire-detection-alert-system-default-rtdb.firebaseio.com/"
-})
-
-def send_alert(message):
-    ref = db.reference("/alerts")
-    ref.push({
-        "alert": message
-    })
-    print("🔥 Alert sent to Firebase:", message)
-
-
-# Test
-if __name__ == "__main__":
-    send_alert("Fire detected in the area.")
+import firebase_admin
+from firebase_admin import credentials, db
+
+from notifier import NotificationDispatcher
+
+# Load your Firebase Admin SDK key
+cred = credentials.Certificate("serviceAccountKey.json")
+
+# Initialize Firebase app
+firebase_admin.initialize_app(cred, {
+    "databaseURL": "https://fire-detection-alert-system-default-rtdb.firebaseio.com/"
+})
+
+
+def push_alert(message):
+    """Blocking push; normally called from the dispatcher's worker thread."""
+    ref = db.reference("/alerts")
+    ref.push({
+        "alert": message
+    })
+    print("🔥 Alert sent to Firebase:", message)
+
+
+# Pushes run in the background with retry, so callers in a video loop never wait on the network
+dispatcher = NotificationDispatcher({"firebase": (push_alert, 2)}, queue_size=500, retries=3)
+
+
+def send_alert(message, incident_id=None):
+    """Queue an alert; returns False if it duplicates ``incident_id`` or the queue is full."""
+    return dispatcher.notify("firebase", message, incident_id=incident_id, kind="alert") == "queued"
+
+
+# Test
+if __name__ == "__main__":
+    send_alert("Fire detected in the area.")
+    dispatcher.close()
+    print(dispatcher.summary())
@@ -0,0 +1,112 @@
+"""Per-stream temporal aggregation of detections into incidents.
+
+A single frame above threshold is not an incident and a persistent fire is not
+a new incident on every frame. ``IncidentTracker`` opens an incident once
+``k`` of the last ``n`` inferred frames score at least ``open_threshold``,
+keeps it open while frames stay above the lower ``close_threshold``
+(hysteresis), and closes it after ``close_after`` consecutive frames below it.
+Callers alert on the returned ``opened`` event only, i.e. once per incident.
+
+``k``, ``n`` and ``close_after`` count frames. With a ``MotionGate`` in front
+of the model, feed every frame the gate skipped through ``hold()``, which
+repeats the stream's last inferred result: an unchanged scene has unchanged
+detections. Otherwise a static fire only advances the window on keyframes
+(every 5 s by default), and 3-of-5 to open / 15 to close become roughly 15 s
+and 75 s instead of a fraction of a second and a few seconds of video.
+"""
+import itertools
+import time
+from collections import deque, namedtuple
+
+IncidentEvent = namedtuple(
+    "IncidentEvent", ["kind", "stream", "incident_id", "started_at", "ended_at", "peak_confidence", "frames"]
+)
+
+OPENED = "opened"
+CLOSED = "closed"
+
+
+class _StreamState:
+    __slots__ = ("window", "incident_id", "started_at", "peak", "frames", "misses", "last")
+
+    def __init__(self, n):
+        self.window = deque(maxlen=n)
+        self.incident_id = None
+        self.started_at = None
+        self.peak = 0.0
+        self.frames = 0
+        self.misses = 0
+        self.last = None
+
+
+class IncidentTracker:
+    def __init__(self, open_threshold=0.5, close_threshold=0.3, k=3, n=5, close_after=15, clock=time.time):
+        if not 1 <= k <= n:
+            raise ValueError("need 1 <= k <= n")
+        if close_threshold > open_threshold:
+            raise ValueError("close_threshold must not exceed open_threshold")
+        self.open_threshold = open_threshold
+        self.close_threshold = close_threshold
+        self.k = k
+        self.n = n
+        self.close_after = max(1, int(close_after))
+        self._clock = clock
+        self._streams = {}
+        self._ids = itertools.count(1)
+        self.frames_seen = 0
+        self.incidents_opened = 0
+
+    def _state(self, stream):
+        st = self._streams.get(stream)
+        if st is None:
+            st = self._streams[stream] = _StreamState(self.n)
+        return st
+
+    def is_open(self, stream):
+        st = self._streams.get(stream)
+        return st is not None and st.incident_id is not None
+
+    def update(self, stream, confidence):
+        """Feed the best fire/smoke confidence of one inferred frame (0 if none).
+
+        Returns an ``IncidentEvent`` when an incident opens or closes, else None.
+        """
+        self.frames_seen += 1
+        st = self._state(stream)
+        st.last = confidence
+        now = self._clock()
+        st.window.append(confidence >= self.open_threshold)
+
+        if st.incident_id is None:
+            if sum(st.window) >= self.k:
+                st.incident_id = next(self._ids)
+                st.started_at = now
+                st.peak = confidence
+                st.frames = 1
+                st.misses = 0
+                self.incidents_opened += 1
+                return IncidentEvent(OPENED, stream, st.incident_id, now, None, confidence, 1)
+            return None
+
+        st.frames += 1
+        st.peak = max(st.peak, confidence)
+        if confidence >= self.close_threshold:
+            st.misses = 0
+            return None
+        st.misses += 1
+        if st.misses < self.close_after:
+            return None
+        event = IncidentEvent(CLOSED, stream, st.incident_id, st.started_at, now, st.peak, st.frames)
+        st.incident_id = None
+        st.window.clear()
+        return event
+
+    def hold(self, stream):
+        """Feed a frame that was not inferred (motion gate skip) as a repeat of the last result.
+
+        Returns what ``update`` would, or None if the stream has no inferred frame yet.
+        """
+        st = self._streams.get(stream)
+        if st is None or st.last is None:
+            return None
+        return self.update(stream, st.last)
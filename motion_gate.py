@@ -0,0 +1,80 @@
+"""Cheap change detector that decides whether a frame is worth running YOLO on.
+
+Frames are shrunk to a small grayscale thumbnail and compared against a slowly
+updated background model. The detector only runs when enough of the thumbnail
+changed, plus a forced keyframe every ``keyframe_interval`` seconds so a scene
+that was already on fire when the camera started is still checked.
+
+Skipped frames still count for ``IncidentTracker``: callers pass them to
+``tracker.hold()`` so its frame-based K-of-N and close timings hold with the
+gate on.
+"""
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(self, threshold=0.01, pixel_delta=25, width=160, keyframe_interval=5.0,
+                 learning_rate=0.05, clock=time.monotonic):
+        """
+        threshold: fraction of thumbnail pixels that must change to trigger inference
+        pixel_delta: per-pixel intensity difference (0-255) that counts as a change
+        width: thumbnail width used for differencing
+        keyframe_interval: seconds after which a frame is inferred regardless (<= 0 disables)
+        learning_rate: how fast the background absorbs gradual changes (lighting drift)
+        """
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.width = width
+        self.keyframe_interval = keyframe_interval
+        self.learning_rate = learning_rate
+        self._clock = clock
+        self._background = None
+        self._last_inferred = None
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self.last_change = 0.0
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        scale = self.width / float(w)
+        small = cv2.resize(frame, (self.width, max(1, int(round(h * scale)))), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def should_infer(self, frame):
+        """Update the background with ``frame`` and return True if it should be inferred."""
+        thumb = self._thumbnail(frame)
+        now = self._clock()
+        if self._background is None or self._background.shape != thumb.shape:
+            self._background = thumb.astype(np.float32)
+            self.last_change = 1.0
+            return self._mark(True, now)
+
+        diff = cv2.absdiff(thumb, cv2.convertScaleAbs(self._background))
+        self.last_change = float(np.count_nonzero(diff > self.pixel_delta)) / diff.size
+        cv2.accumulateWeighted(thumb, self._background, self.learning_rate)
+
+        changed = self.last_change >= self.threshold
+        keyframe = (self.keyframe_interval > 0 and self._last_inferred is not None
+                    and now - self._last_inferred >= self.keyframe_interval)
+        return self._mark(changed or keyframe, now)
+
+    def _mark(self, infer, now):
+        if infer:
+            self.frames_inferred += 1
+            self._last_inferred = now
+        else:
+            self.frames_skipped += 1
+        return infer
+
+    @property
+    def skip_ratio(self):
+        total = self.frames_inferred + self.frames_skipped
+        return self.frames_skipped / total if total else 0.0
+
+    def summary(self):
+        return f"inferred={self.frames_inferred} skipped={self.frames_skipped} ({self.skip_ratio:.0%} skipped)"
@@ -0,0 +1,211 @@
+"""Asynchronous notification dispatch for detection loops.
+
+``notify()`` only enqueues and never blocks the caller: each channel has its
+own bounded queue and worker threads, so a slow Firebase push does not stall
+frame processing and a stuck SMS gateway does not hold up e-mail. Failed
+sends are retried with exponential backoff; when a channel's queue is full
+the notification is dropped and counted. Notifications carrying an
+``incident_id`` are deduplicated per channel and kind, so a flapping
+detector cannot page twice for the same incident.
+
+    dispatcher = NotificationDispatcher({"firebase": (push_fn, 1), "sms": (sms_fn, 4)})
+    dispatcher.notify("firebase", payload, incident_id=7, kind="opened")  # -> "queued"
+    ...
+    dispatcher.close()
+    print(dispatcher.summary())
+
+``StubSink`` records deliveries in memory and can simulate latency and
+failures, for running the pipeline without external services.
+
+platform/backend/notifications.py imports this module for the dashboard's
+SMS/e-mail/siren channels.
+"""
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+
+
+class StubSink:
+    def __init__(self, name="stub", latency=0.0, fail_first=0, verbose=True):
+        """
+        latency: seconds each send takes
+        fail_first: raise on the first N sends (exercises the retry path)
+        """
+        self.name = name
+        self.latency = latency
+        self.fail_first = fail_first
+        self.verbose = verbose
+        self.sent = []
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, payload):
+        with self._lock:
+            self._calls += 1
+            fail = self._calls <= self.fail_first
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError(f"{self.name}: simulated failure")
+        with self._lock:
+            self.sent.append(payload)
+        if self.verbose:
+            print(f"[{self.name.upper()} STUB] {payload}")
+
+
+class _Job:
+    __slots__ = ("payload", "enqueued_at", "attempt")
+
+    def __init__(self, payload, enqueued_at):
+        self.payload = payload
+        self.enqueued_at = enqueued_at
+        self.attempt = 0
+
+
+class _Channel:
+    def __init__(self, name, send, workers, queue_size):
+        self.name = name
+        self.send = send
+        self.workers = max(1, int(workers))
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.threads = []
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "retried": 0, "dropped": 0, "deduped": 0}
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+
+class NotificationDispatcher:
+    def __init__(self, channels, queue_size=1000, retries=3, backoff=0.5, max_backoff=10.0,
+                 dedup_window=600.0, on_result=None, clock=time.monotonic):
+        """
+        channels: {name: send_fn} or {name: (send_fn, workers)}; send_fn(payload) raises on failure
+        queue_size: pending notifications per channel before new ones are dropped
+        retries: extra attempts after the first failure, sleeping backoff * 2**attempt (capped, jittered)
+        dedup_window: seconds an (incident_id, kind) stays suppressed per channel
+        on_result: optional callback(channel, outcome, latency_s) with outcome queued/sent/failed/dropped/deduped
+        """
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.dedup_window = dedup_window
+        self.on_result = on_result
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._seen = OrderedDict()  # (channel, incident_id, kind) -> time
+        self._closed = False
+        self.channels = {}
+        for name, spec in channels.items():
+            send, workers = spec if isinstance(spec, tuple) else (spec, 1)
+            ch = self.channels[name] = _Channel(name, send, workers, queue_size)
+            for i in range(ch.workers):
+                t = threading.Thread(target=self._work, args=(ch,), name=f"notify-{name}-{i}", daemon=True)
+                t.start()
+                ch.threads.append(t)
+
+    def _report(self, ch, outcome, latency=0.0):
+        if self.on_result is not None:
+            try:
+                self.on_result(ch.name, outcome, latency)
+            except Exception:
+                pass
+
+    def _duplicate(self, channel, incident_id, kind):
+        if incident_id is None or not self.dedup_window:
+            return False
+        now = self._clock()
+        key = (channel, incident_id, kind)
+        with self._lock:
+            while self._seen:
+                if now - next(iter(self._seen.values())) <= self.dedup_window:
+                    break
+                self._seen.popitem(last=False)
+            if key in self._seen:
+                return True
+            self._seen[key] = now
+            return False
+
+    def notify(self, channel, payload, incident_id=None, kind=None):
+        """Queue ``payload`` for ``channel`` without blocking; returns "queued", "deduped" or "dropped"."""
+        ch = self.channels[channel]
+        if self._closed:
+            outcome = "dropped"
+        elif self._duplicate(channel, incident_id, kind):
+            outcome = "deduped"
+        else:
+            try:
+                ch.queue.put_nowait(_Job(payload, self._clock()))
+                outcome = "queued"
+            except queue.Full:
+                with self._lock:
+                    # Not sent, so a later notification for this incident must not be treated as a duplicate
+                    self._seen.pop((channel, incident_id, kind), None)
+                outcome = "dropped"
+        with self._lock:
+            ch.stats[outcome] += 1
+        self._report(ch, outcome)
+        return outcome
+
+    def _work(self, ch):
+        while True:
+            job = ch.queue.get()
+            if job is None:
+                return
+            while True:
+                try:
+                    ch.send(job.payload)
+                    outcome = "sent"
+                    break
+                except Exception as e:
+                    if job.attempt >= self.retries:
+                        print(f"⚠️ {ch.name} notification failed after {job.attempt + 1} attempts: {e}")
+                        outcome = "failed"
+                        break
+                    delay = min(self.max_backoff, self.backoff * (2 ** job.attempt))
+                    job.attempt += 1
+                    with self._lock:
+                        ch.stats["retried"] += 1
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+            latency = self._clock() - job.enqueued_at
+            with self._lock:
+                ch.stats[outcome] += 1
+                ch.latency_total += latency
+                ch.latency_max = max(ch.latency_max, latency)
+            self._report(ch, outcome, latency)
+
+    def depth(self, channel=None):
+        if channel is not None:
+            return self.channels[channel].queue.qsize()
+        return sum(ch.queue.qsize() for ch in self.channels.values())
+
+    def stats(self):
+        out = {}
+        with self._lock:
+            for name, ch in self.channels.items():
+                done = ch.stats["sent"] + ch.stats["failed"]
+                out[name] = dict(ch.stats, depth=ch.queue.qsize(),
+                                 latency_avg_ms=round(1000 * ch.latency_total / done, 1) if done else 0.0,
+                                 latency_max_ms=round(1000 * ch.latency_max, 1))
+        return out
+
+    def summary(self):
+        return "; ".join(
+            f"{name}: {s['queued']} queued, {s['sent']} sent, {s['failed']} failed, {s['retried']} retries, {s['dropped']} dropped, "
+            f"{s['deduped']} deduped, avg {s['latency_avg_ms']} ms, max {s['latency_max_ms']} ms"
+            for name, s in self.stats().items()
+        )
+
+    def close(self, timeout=10.0):
+        """Stop accepting work and give workers ``timeout`` seconds to drain their queues."""
+        self._closed = True
+        deadline = time.monotonic() + timeout
+        for ch in self.channels.values():
+            for _ in ch.threads:
+                try:
+                    ch.queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Full:
+                    pass
+        for ch in self.channels.values():
+            for t in ch.threads:
+                t.join(max(0.0, deadline - time.monotonic()))
@@ -1,15 +1,23 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, abort, request, jsonify, render_template
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, timezone
 import os
-import json
-import urllib.request
-import urllib.error
+import urllib.parse
 import mimetypes
+import re
+import threading
+import time
+from fastapi_client import CircuitBreaker, FastAPIClient
+import metrics
+import realtime
+import serialization
+import ingest
+import notifications
 
 app = Flask(__name__)
+app.json = serialization.FastJSONProvider(app)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'secret!')
 
 # Database configuration - use /tmp for ephemeral storage on Render
@@ -22,19 +30,34 @@ if not db_uri:
 app.config['SQLALCHEMY_DATABASE_URI'] = db_uri
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Uploads are held in memory and forwarded as-is, so cap their size
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', 20 * 1024 * 1024))
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + 64 * 1024  # room for multipart framing
+
 CORS(app, resources={r"/*": {"origins": "*"}})
-socketio = SocketIO(app, cors_allowed_origins="*")
+# With a message queue (e.g. redis://...) several workers share one fan-out;
+# the load balancer must then keep each client on one worker (sticky sessions)
+SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
+socketio = SocketIO(app, cors_allowed_origins="*", message_queue=SOCKETIO_MESSAGE_QUEUE)
+# Alerts are batched into one 'alerts_batch' frame per room every N ms (0 = emit immediately)
+broadcaster = realtime.AlertBroadcaster(socketio, float(os.getenv('SOCKETIO_COALESCE_MS', 250)))
+realtime.init_socketio(socketio)
+metrics.init_app(app)
 db = SQLAlchemy(app)
 
-# Initialize database tables
-with app.app_context():
-    db.create_all()
-    print(f"Database initialized at: {db_uri}")
+ALERTS_DEFAULT_LIMIT = int(os.getenv('ALERTS_DEFAULT_LIMIT', 100))
+ALERTS_MAX_LIMIT = int(os.getenv('ALERTS_MAX_LIMIT', 1000))
+# Alert lists at least this long are streamed instead of built in one buffer
+ALERTS_STREAM_MIN = int(os.getenv('ALERTS_STREAM_MIN', 500))
+
+# Fields sent in 'alert_updated' deltas
+ACK_FIELDS = ('acknowledged', 'acknowledged_at', 'status')
+RESOLVE_FIELDS = ('acknowledged', 'acknowledged_at', 'resolved_at', 'status', 'duration')
 
 # --- Models ---
 class Alert(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     severity = db.Column(db.String(20), nullable=False) # high, medium, low
     location = db.Column(db.String(100), nullable=False)
     message = db.Column(db.String(200), nullable=False) # Renamed from description
@@ -45,74 +68,52 @@ class Alert(db.Model):
     type = db.Column(db.String(50), nullable=False) # fire, smoke
     confidence = db.Column(db.Float, default=0.0)
 
+    # Composite (filter, id) indexes let filtered keyset pages walk the index
+    __table_args__ = (
+        db.Index('ix_alert_severity_id', 'severity', 'id'),
+        db.Index('ix_alert_type_id', 'type', 'id'),
+        db.Index('ix_alert_location_id', 'location', 'id'),
+        db.Index('ix_alert_acknowledged_id', 'acknowledged', 'id'),
+        db.Index('ix_alert_resolved_at_id', 'resolved_at', 'id'),
+    )
+
     def to_dict(self):
-        # Calculate duration
-        end_time = self.resolved_at if self.resolved_at else datetime.utcnow()
-        duration = end_time - self.timestamp
-        # Format duration
-        total_seconds = int(duration.total_seconds())
-        hours, remainder = divmod(total_seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        
-        if hours > 0:
-            duration_str = f"{hours}h {minutes}m"
-        elif minutes > 0:
-            duration_str = f"{minutes}m {seconds}s"
-        else:
-            duration_str = f"{seconds}s"
-
-        # Determine computed status for frontend compatibility
-        if self.resolved_at:
-            status_str = 'resolved'
-        elif self.acknowledged:
-            status_str = 'acknowledged'
-        else:
-            status_str = 'active'
-
-        return {
-            'id': self.id,
-            'timestamp': self.timestamp.isoformat(),
-            'severity': self.severity,
-            'location': self.location,
-            'message': self.message,
-            'description': self.message, # Backward compatibility alias
-            'status': status_str, # Computed status
-            'acknowledged': self.acknowledged,
-            'notification_sent': self.notification_sent,
-            'acknowledged_at': self.acknowledged_at.isoformat() if self.acknowledged_at else None,
-            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
-            'type': self.type,
-            'confidence': self.confidence,
-            'duration': duration_str
-        }
-
-# --- Helpers ---
-def simulate_notifications(alert):
-    """
-    Simulate sending notifications based on severity.
-    Returns a list of simulated actions.
-    """
-    actions = []
-    msg = f"ALERT: {alert.severity.upper()} severity {alert.type} detected at {alert.location}."
-    
-    # Web notification is implicit via SocketIO
-    actions.append("Web Dashboard Updated")
+        return alert_serializer.to_dict(self)
 
-    if alert.severity in ['high', 'medium']:
-        # Simulate SMS
-        print(f"[SMS SIMULATION] Sending to Emergency Contacts: {msg}")
-        actions.append("SMS Sent to Emergency Contacts")
-        
-        # Simulate Email
-        print(f"[EMAIL SIMULATION] Sending to Admin: {msg}")
-        actions.append("Email Sent to Admin")
-    
-    if alert.severity == 'high':
-        # Simulate Siren/Audio
-        print(f"[AUDIO SIMULATION] Triggering Siren for {alert.location}")
-        actions.append("On-site Siren Triggered")
+# Per-alert dict/JSON cache; entries are re-built when ack/resolve state changes
+alert_serializer = serialization.AlertSerializer(int(os.getenv('ALERT_SERIALIZER_CACHE', 10000)))
 
-    return actions
+# Initialize database tables (after the models are declared)
+with app.app_context():
+    # WAL + synchronous=NORMAL: commits no longer fsync, readers don't block the writer
+    ingest.configure_sqlite(db.engine, wal=os.getenv('SQLITE_WAL', 'true').lower() in ('1', 'true', 'yes'),
+                            synchronous=os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').upper())
+    db.create_all()
+    # create_all skips tables that already exist, so add missing indexes explicitly
+    for index in Alert.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+    print(f"Database initialized at: {db_uri}")
+
+# Local alerts are persisted in batches by a background writer (see ingest.py)
+alert_ingest = ingest.AlertIngestQueue(
+    app, db, Alert,
+    max_batch=int(os.getenv('ALERT_INGEST_BATCH', 100)),
+    max_delay_s=float(os.getenv('ALERT_INGEST_DELAY_MS', 20)) / 1000.0,
+    ack_before_flush=os.getenv('ALERT_ACK_BEFORE_FLUSH', 'false').lower() in ('1', 'true', 'yes'),
+    submit_timeout=float(os.getenv('ALERT_INGEST_TIMEOUT_S', 30)),
+)
+metrics.register_gauge('dashboard_alert_ingest_queue_depth', 'Alerts waiting for the write-behind writer',
+                       lambda: alert_ingest.depth)
+
+def _get_alert_or_404(alert_id):
+    alert = db.session.get(Alert, alert_id)
+    if alert is None and alert_ingest.may_be_pending(alert_id):
+        # Created with ALERT_ACK_BEFORE_FLUSH and still queued: wait for its batch, then look again
+        alert_ingest.flush()
+        alert = db.session.get(Alert, alert_id)
+    if alert is None:
+        abort(404)
+    return alert
 
 # --- Routes ---
 
@@ -130,7 +131,7 @@ def alerts_page():
 
 @app.route('/alerts/<int:alert_id>')
 def alert_details(alert_id):
-    alert = Alert.query.get_or_404(alert_id)
+    alert = _get_alert_or_404(alert_id)
     return render_template('alert_details.html', alert=alert.to_dict())
 
 @app.route('/notifications')
@@ -143,38 +144,87 @@ def status_page():
 
 @app.route('/api/health')
 def health_check():
-    """Health check endpoint for Render"""
-    fastapi_status = 'unknown'
-    fastapi_url = FASTAPI_BASE
-    try:
-        _fetch_fastapi('/detect/status')
-        fastapi_status = 'connected'
-    except Exception as e:
-        fastapi_status = f'disconnected: {str(e)}'
-    
+    """Health check endpoint for Render; never blocks on FastAPI"""
+    _ensure_health_poller()
     return jsonify({
         'status': 'healthy',
         'service': 'flask-dashboard',
-        'fastapi_base': fastapi_url,
-        'fastapi_status': fastapi_status
+        'fastapi_base': FASTAPI_BASE,
+        'fastapi_status': _fastapi_status['status'],
+        'fastapi_checked_at': _fastapi_status['checked_at'],
+        'fastapi_circuit': fastapi_client.breaker.state
     }), 200
 
+# FastAPI reachability is probed in the background and cached for /api/health
+HEALTH_POLL_INTERVAL = float(os.getenv('HEALTH_POLL_INTERVAL', 10.0))
+_fastapi_status = {'status': 'unknown', 'checked_at': None}
+_health_poller_started = False
+_health_poller_lock = threading.Lock()
+
+def _refresh_fastapi_status():
+    try:
+        _fetch_fastapi('/detect/status')
+        status = 'connected'
+    except Exception as e:
+        status = f'disconnected: {str(e)}'
+    _fastapi_status.update(status=status, checked_at=datetime.now(timezone.utc).isoformat())
+
+def _poll_fastapi_status():
+    while True:
+        _refresh_fastapi_status()
+        socketio.sleep(HEALTH_POLL_INTERVAL)
+
+def _ensure_health_poller():
+    global _health_poller_started
+    if _health_poller_started:
+        return
+    with _health_poller_lock:
+        if not _health_poller_started:
+            _health_poller_started = True
+            socketio.start_background_task(_poll_fastapi_status)
+
 FASTAPI_BASE = os.getenv('FASTAPI_BASE', 'http://127.0.0.1:8001')
 
+# Shared keep-alive client; the breaker skips straight to the SQLite fallback while FastAPI is down
+fastapi_client = FastAPIClient(
+    FASTAPI_BASE,
+    connect_timeout=float(os.getenv('FASTAPI_CONNECT_TIMEOUT', 2.0)),
+    read_timeout=float(os.getenv('FASTAPI_READ_TIMEOUT', 30.0)),
+    retries=int(os.getenv('FASTAPI_RETRIES', 2)),
+    pool_size=int(os.getenv('FASTAPI_POOL_SIZE', 8)),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv('FASTAPI_BREAKER_THRESHOLD', 3)),
+        reset_timeout=float(os.getenv('FASTAPI_BREAKER_RESET', 15.0)),
+    ),
+)
+
+_BREAKER_STATES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+metrics.register_gauge('dashboard_fastapi_circuit_state', 'FastAPI circuit breaker (0 closed, 1 half-open, 2 open)',
+                       lambda: _BREAKER_STATES[fastapi_client.breaker.state])
+metrics.register_gauge('dashboard_fastapi_up', 'Last background probe of FastAPI succeeded',
+                       lambda: 1 if _fastapi_status['status'] == 'connected' else 0)
+
+def _upstream_label(path):
+    # Collapse ids and query strings so the label set stays bounded
+    return re.sub(r'/\d+(?=/|$)', '/:id', path.split('?', 1)[0])
+
+def _timed_upstream(path, call):
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        result = call()
+        outcome = 'ok'
+        return result
+    finally:
+        metrics.UPSTREAM_SECONDS.labels(path=_upstream_label(path), outcome=outcome).observe(time.perf_counter() - start)
+
 def _fetch_fastapi(path):
-    url = FASTAPI_BASE + path
-    with urllib.request.urlopen(url) as resp:
-        return json.loads(resp.read().decode('utf-8'))
+    return _timed_upstream(path, lambda: fastapi_client.get_json(path))
 
 def _post_fastapi(path, payload):
-    url = FASTAPI_BASE + path
-    data = json.dumps(payload).encode('utf-8')
-    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
-    with urllib.request.urlopen(req) as resp:
-        return json.loads(resp.read().decode('utf-8'))
+    return _timed_upstream(path, lambda: fastapi_client.post_json(path, payload))
 
 def _post_fastapi_multipart(path, filename, content_bytes):
-    url = FASTAPI_BASE + path
     boundary = '----TraeBoundary7d9e3c6c'
     content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
     lines = []
@@ -185,34 +235,118 @@ def _post_fastapi_multipart(path, filename, content_bytes):
     body_start = '\r\n'.join(lines).encode('utf-8') + b'\r\n'
     body_end = f'\r\n--{boundary}--\r\n'.encode('utf-8')
     body = body_start + content_bytes + body_end
-    req = urllib.request.Request(url, data=body, headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
-    with urllib.request.urlopen(req) as resp:
-        return json.loads(resp.read().decode('utf-8'))
-
-def _transform_alert(a):
-    status = 'acknowledged' if a.get('acknowledged') else 'active'
-    a['status'] = status
-    a['description'] = a.get('message')
-    return a
+    headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+    return _timed_upstream(path, lambda: fastapi_client.request('POST', path, body=body, headers=headers))
+
+def _read_upload(stream, max_bytes, chunk_size=64 * 1024):
+    """Read an upload stream in chunks; returns None once it exceeds max_bytes."""
+    buf = bytearray()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buf.extend(chunk)
+        if len(buf) > max_bytes:
+            return None
+    return bytes(buf)
+
+_transform_alert = serialization.transform_remote
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+_FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+def _parse_bool_arg(args, name):
+    raw = args.get(name)
+    if raw is None or raw == '':
+        return None
+    v = raw.strip().lower()
+    if v in _TRUE_VALUES:
+        return True
+    if v in _FALSE_VALUES:
+        return False
+    raise ValueError(f'{name} must be a boolean')
+
+def _parse_alert_query(args):
+    """Validate /alerts query parameters into a normalized dict."""
+    q = {}
+    limit = args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        raise ValueError('limit must be >= 1')
+    q['limit'] = min(limit or ALERTS_DEFAULT_LIMIT, ALERTS_MAX_LIMIT)
+    before_id = args.get('before_id', type=int)
+    if before_id is not None:
+        q['before_id'] = before_id
+    since = args.get('since')
+    if since:
+        try:
+            parsed = datetime.fromisoformat(since.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError('since must be an ISO-8601 timestamp')
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        q['since'] = parsed
+    for name in ('severity', 'type', 'location'):
+        if args.get(name):
+            q[name] = args.get(name)
+    for name in ('acknowledged', 'resolved'):
+        value = _parse_bool_arg(args, name)
+        if value is not None:
+            q[name] = value
+    return q
+
+def _query_local_alerts(q):
+    query = Alert.query
+    if 'before_id' in q:
+        query = query.filter(Alert.id < q['before_id'])
+    if 'since' in q:
+        query = query.filter(Alert.timestamp >= q['since'])
+    if 'severity' in q:
+        query = query.filter(Alert.severity == q['severity'])
+    if 'type' in q:
+        query = query.filter(Alert.type == q['type'])
+    if 'location' in q:
+        query = query.filter(Alert.location == q['location'])
+    if 'acknowledged' in q:
+        query = query.filter(Alert.acknowledged == q['acknowledged'])
+    if 'resolved' in q:
+        query = query.filter(Alert.resolved_at.isnot(None) if q['resolved'] else Alert.resolved_at.is_(None))
+    return query.order_by(Alert.id.desc()).limit(q['limit']).all()
+
+def _list_alerts():
+    try:
+        q = _parse_alert_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    params = {}
+    for k, v in q.items():
+        if isinstance(v, bool):
+            v = 'true' if v else 'false'
+        elif isinstance(v, datetime):
+            v = v.isoformat()
+        params[k] = v
+    try:
+        items = [_transform_alert(x) for x in _fetch_fastapi('/alerts?' + urllib.parse.urlencode(params))]
+        ids = [x['id'] for x in items]
+        encoded = (serialization.dumps(x) for x in items)
+    except Exception:
+        metrics.FALLBACKS.labels(operation='list_alerts').inc()
+        rows = _query_local_alerts(q)
+        ids = [a.id for a in rows]
+        encoded = (alert_serializer.encode(a) for a in rows)
+    resp = serialization.json_array_response(encoded, stream=len(ids) >= ALERTS_STREAM_MIN)
+    # Keyset cursor for the next (older) page
+    if len(ids) == q['limit']:
+        resp.headers['X-Next-Before-Id'] = str(ids[-1])
+    return resp
 
 @app.route('/api/alerts', methods=['GET'])
 def get_alerts():
-    try:
-        items = _fetch_fastapi('/alerts')
-        return jsonify([_transform_alert(x) for x in items])
-    except Exception:
-        alerts = Alert.query.order_by(Alert.timestamp.desc()).all()
-        return jsonify([a.to_dict() for a in alerts])
+    return _list_alerts()
 
 # --- Alias endpoints to match expected external API ---
 @app.route('/alerts', methods=['GET'])
 def alerts_get_alias():
-    try:
-        items = _fetch_fastapi('/alerts')
-        return jsonify([_transform_alert(x) for x in items])
-    except Exception:
-        alerts = Alert.query.order_by(Alert.timestamp.desc()).all()
-        return jsonify([a.to_dict() for a in alerts])
+    return _list_alerts()
 
 @app.route('/api/alerts', methods=['POST'])
 def create_alert():
@@ -227,9 +361,11 @@ def create_alert():
     try:
         created = _post_fastapi('/alerts', payload)
         transformed = _transform_alert(created)
-        socketio.emit('new_alert', transformed)
+        metrics.ALERTS_CREATED.labels(severity=transformed.get('severity', 'unknown'), source='fastapi').inc()
+        broadcaster.publish_new(transformed)
         return jsonify(transformed), 201
     except Exception:
+        metrics.FALLBACKS.labels(operation='create_alert').inc()
         msg = payload['message']
         new_alert = Alert(
             severity=payload['severity'],
@@ -238,17 +374,18 @@ def create_alert():
             type=payload['type'],
             confidence=payload['confidence'],
             acknowledged=False,
-            notification_sent=False
         )
-        db.session.add(new_alert)
-        db.session.commit()
-        notifications = simulate_notifications(new_alert)
-        if new_alert.severity in ['high', 'medium']:
-            new_alert.notification_sent = True
-            db.session.commit()
-        alert_data = new_alert.to_dict()
-        alert_data['notifications_list'] = notifications
-        socketio.emit('new_alert', alert_data)
+        # Only queued here; the row records whether anything was sent, so it is written once
+        actions, new_alert.notification_sent = notifications.dispatch_alert(
+            payload['severity'], payload['type'], payload['location'])
+        try:
+            alert_data = alert_ingest.submit(new_alert)
+        except ingest.PersistPending as e:
+            # Still queued and normally written shortly; the id is not known yet
+            return jsonify({**payload, 'status': 'pending', 'detail': str(e), 'notifications_list': actions}), 202
+        metrics.ALERTS_CREATED.labels(severity=alert_data['severity'], source='local').inc()
+        alert_data['notifications_list'] = actions
+        broadcaster.publish_new(alert_data)
         return jsonify(alert_data), 201
 
 @app.route('/alerts', methods=['POST'])
@@ -261,16 +398,18 @@ def acknowledge_alert(alert_id):
     try:
         updated = _post_fastapi(f'/alerts/{alert_id}/acknowledge', {})
         transformed = _transform_alert(updated)
-        socketio.emit('alert_updated', transformed)
+        broadcaster.publish_update(transformed, ACK_FIELDS)
         return jsonify(transformed)
     except Exception:
-        alert = Alert.query.get_or_404(alert_id)
+        metrics.FALLBACKS.labels(operation='acknowledge').inc()
+        alert = _get_alert_or_404(alert_id)
         if not alert.acknowledged:
             alert.acknowledged = True
             alert.acknowledged_at = datetime.utcnow()
             db.session.commit()
+            alert_serializer.invalidate(alert.id)
             data = alert.to_dict()
-            socketio.emit('alert_updated', data)
+            broadcaster.publish_update(data, ACK_FIELDS)
             return jsonify(data)
         return jsonify({'message': 'Alert already acknowledged'}), 400
 
@@ -280,19 +419,15 @@ def upload_detect():
     if not f:
         return jsonify({'error': 'file required'}), 400
     
-    # Save file temporarily
-    import tempfile
     import traceback
-    suffix = os.path.splitext(f.filename or 'upload')[1]
-    tmp_path = None
     
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            content = f.read()
-            tmp.write(content)
-            tmp_path = tmp.name
+        # Keep the upload in memory; FastAPI decodes the bytes directly
+        content = _read_upload(f.stream, MAX_UPLOAD_BYTES)
+        if content is None:
+            return jsonify({'error': 'file too large', 'max_bytes': MAX_UPLOAD_BYTES}), 413
         
-        print(f"Processing upload: {f.filename}, temp path: {tmp_path}")
+        print(f"Processing upload: {f.filename} ({len(content)} bytes)")
         
         # Try to use FastAPI if available
         try:
@@ -300,12 +435,14 @@ def upload_detect():
             result = _post_fastapi_multipart('/detect/upload', f.filename or 'upload', content)
             alert = result.get('alert')
             if alert:
-                socketio.emit('new_alert', _transform_alert(alert))
+                metrics.ALERTS_CREATED.labels(severity=alert.get('severity', 'unknown'), source='fastapi').inc()
+                broadcaster.publish_new(_transform_alert(alert))
             print(f"FastAPI detection successful: {result}")
             return jsonify(result)
         except Exception as api_error:
             # Fallback: do detection locally if FastAPI is unavailable
             print(f"FastAPI unavailable: {api_error}")
+            metrics.FALLBACKS.labels(operation='upload_detect').inc()
             print(traceback.format_exc())
             # Simple fallback response without model
             result = {
@@ -325,10 +462,14 @@ def upload_detect():
                 acknowledged=False,
                 notification_sent=False
             )
-            db.session.add(new_alert)
-            db.session.commit()
-            alert_data = new_alert.to_dict()
-            socketio.emit('new_alert', alert_data)
+            try:
+                alert_data = alert_ingest.submit(new_alert)
+            except ingest.PersistPending:
+                result['alert'] = None
+                result['alert_status'] = 'pending'
+                return jsonify(result), 202
+            metrics.ALERTS_CREATED.labels(severity=alert_data['severity'], source='local').inc()
+            broadcaster.publish_new(alert_data)
             result['alert'] = alert_data
             
             return jsonify(result)
@@ -336,13 +477,6 @@ def upload_detect():
         print(f"Upload error: {e}")
         print(traceback.format_exc())
         return jsonify({'error': 'upload failed', 'detail': str(e)}), 500
-    finally:
-        # Cleanup temp file
-        if tmp_path:
-            try:
-                os.unlink(tmp_path)
-            except Exception as cleanup_error:
-                print(f"Cleanup error: {cleanup_error}")
 
 @app.route('/alerts/<int:alert_id>/acknowledge', methods=['POST'])
 def acknowledge_alert_alias(alert_id):
@@ -351,7 +485,7 @@ def acknowledge_alert_alias(alert_id):
 
 @app.route('/api/alerts/<int:alert_id>/resolve', methods=['PUT'])
 def resolve_alert(alert_id):
-    alert = Alert.query.get_or_404(alert_id)
+    alert = _get_alert_or_404(alert_id)
     # Check if already resolved
     if not alert.resolved_at:
         alert.resolved_at = datetime.utcnow()
@@ -361,9 +495,10 @@ def resolve_alert(alert_id):
             alert.acknowledged_at = datetime.utcnow()
             
         db.session.commit()
+        alert_serializer.invalidate(alert.id)
         
         data = alert.to_dict()
-        socketio.emit('alert_updated', data)
+        broadcaster.publish_update(data, RESOLVE_FIELDS)
         return jsonify(data)
     return jsonify({'message': 'Alert already resolved'}), 400
 
@@ -377,6 +512,7 @@ def resolve_alert_alias(alert_id):
 def clear_db():
     db.session.query(Alert).delete()
     db.session.commit()
+    alert_serializer.invalidate()
     socketio.emit('alerts_cleared')
     return jsonify({'message': 'Database cleared'})
 
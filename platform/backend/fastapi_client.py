@@ -0,0 +1,196 @@
+"""
+Keep-alive HTTP client used by the dashboard to reach the FastAPI detection service
+"""
+import http.client
+import json
+import queue
+import random
+import threading
+import time
+import urllib.parse
+
+
+class ServiceUnavailable(ConnectionError):
+    """Raised when FastAPI cannot be reached or the circuit is open"""
+
+
+class ServiceError(Exception):
+    """Raised when FastAPI answers with an error status"""
+
+    def __init__(self, status, body):
+        super().__init__(f"FastAPI returned HTTP {status}")
+        self.status = status
+        self.body = body
+
+
+class CircuitBreaker:
+    """
+    Classic closed/open/half-open breaker.
+    After `failure_threshold` consecutive failures calls are rejected for
+    `reset_timeout` seconds, then a single trial call is let through.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=15.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state_locked()
+
+    def _state_locked(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        with self._lock:
+            state = self._state_locked()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Let another trial through if the current one ended without a verdict"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class FastAPIClient:
+    """
+    Small connection-pooled JSON client built on http.client.
+    Connections are reused across requests, every call has connect/read
+    timeouts, transient failures are retried with jittered backoff, and a
+    circuit breaker short-circuits calls while the service is known to be down.
+    """
+
+    # Errors that mean a reused keep-alive socket was closed by the server
+    _STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+    def __init__(self, base_url, connect_timeout=2.0, read_timeout=30.0, retries=2,
+                 backoff=0.1, pool_size=8, breaker=None):
+        if '://' not in base_url:
+            base_url = 'http://' + base_url
+        parts = urllib.parse.urlsplit(base_url)
+        self.base_url = base_url
+        self._https = parts.scheme == 'https'
+        self._host = parts.hostname or '127.0.0.1'
+        self._port = parts.port
+        self._prefix = parts.path.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._pool = queue.LifoQueue(maxsize=max(1, int(pool_size)))
+
+    def _new_connection(self):
+        cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        return cls(self._host, self._port, timeout=self.connect_timeout)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _send(self, conn, method, path, body, headers):
+        if conn.sock is None:
+            conn.connect()
+            # connect_timeout applied to the handshake; switch to the read timeout
+            conn.sock.settimeout(self.read_timeout)
+        conn.request(method, self._prefix + path, body=body, headers=headers)
+        resp = conn.getresponse()
+        return resp, resp.read()
+
+    def request(self, method, path, body=None, headers=None, idempotent=None):
+        if idempotent is None:
+            idempotent = method in ('GET', 'HEAD', 'PUT', 'DELETE')
+        if not self.breaker.allow():
+            raise ServiceUnavailable(f'circuit open for {self.base_url}')
+        try:
+            return self._request(method, path, body, dict(headers or {}), idempotent)
+        finally:
+            # An unexpected error during a half-open trial must not leave the breaker stuck open
+            self.breaker.release_trial()
+
+    def _request(self, method, path, body, headers, idempotent):
+        attempt = 0
+        while True:
+            conn, reused = self._acquire()
+            try:
+                resp, data = self._send(conn, method, path, body, headers)
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                if reused and isinstance(e, self._STALE_ERRORS):
+                    # The server dropped an idle connection; the request never ran
+                    continue
+                if idempotent and attempt < self.retries:
+                    attempt += 1
+                    time.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+                    continue
+                self.breaker.record_failure()
+                raise ServiceUnavailable(f'{method} {path} failed: {e}') from e
+            except BaseException:
+                # Socket state is unknown; never hand it back to the pool
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            if resp.status >= 500:
+                self.breaker.record_failure()
+                raise ServiceError(resp.status, data)
+            # The service is up even if it rejected this particular request
+            self.breaker.record_success()
+            if resp.status >= 400:
+                raise ServiceError(resp.status, data)
+            return json.loads(data.decode('utf-8')) if data else None
+
+    def get_json(self, path):
+        return self.request('GET', path)
+
+    def post_json(self, path, payload):
+        body = json.dumps(payload).encode('utf-8')
+        return self.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
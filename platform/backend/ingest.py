@@ -0,0 +1,207 @@
+"""
+Write-behind persistence for locally created alerts.
+
+Request handlers hand a transient Alert to AlertIngestQueue.submit(); a
+background writer groups whatever is queued (up to ALERT_INGEST_BATCH rows
+or ALERT_INGEST_DELAY_MS) into one transaction, so a burst pays one SQLite
+commit per batch instead of one or two per alert.
+
+By default submit() waits for its batch to commit (group commit). If that
+takes longer than ALERT_INGEST_TIMEOUT_S it raises PersistPending; the alert
+stays queued and is normally written afterwards, so callers answer 202
+(accepted, pending) rather than reporting a failure. With
+ALERT_ACK_BEFORE_FLUSH the id and timestamp are assigned up front and the
+request returns immediately; ids then come from an in-process counter, so
+that mode assumes this process is the only writer of the alert table. An
+id handed out that way may not be in the table yet: lookups that miss call
+flush(), which waits until everything queued so far is committed.
+"""
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import event, func
+
+import metrics
+
+
+def configure_sqlite(engine, wal=True, synchronous='NORMAL'):
+    """WAL lets readers run during the writer's commit; NORMAL skips the per-commit fsync of the WAL"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        if wal:
+            cur.execute('PRAGMA journal_mode=WAL')
+        cur.execute(f'PRAGMA synchronous={synchronous}')
+        cur.close()
+
+
+class PersistPending(TimeoutError):
+    """
+    submit() gave up waiting, but the alert is still queued and will normally
+    be written later: report it as accepted, not as failed.
+    """
+
+
+class _Pending:
+    """One queued alert; with alert=None a barrier that completes once everything before it is written"""
+
+    __slots__ = ('alert', 'done', 'result', 'error')
+
+    def __init__(self, alert):
+        self.alert = alert
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class AlertIngestQueue:
+    def __init__(self, app, db, model, max_batch=100, max_delay_s=0.02, ack_before_flush=False, max_pending=10000,
+                 submit_timeout=30.0):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_delay_s = max(0.0, max_delay_s)
+        self.ack_before_flush = ack_before_flush
+        self.submit_timeout = submit_timeout
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._next_id = None
+        self._id_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def _allocate_id(self):
+        with self._id_lock:
+            if self._next_id is None:
+                with self.app.app_context():
+                    self._next_id = (self.db.session.query(func.max(self.model.id)).scalar() or 0) + 1
+            alert_id = self._next_id
+            self._next_id += 1
+            return alert_id
+
+    def submit(self, alert, timeout=None):
+        """
+        Queue a transient alert; returns its dict once committed (or at once with ack_before_flush).
+        Raises PersistPending if the batch has not committed within timeout (default: submit_timeout).
+        """
+        self._ensure_writer()
+        if self.ack_before_flush:
+            alert.id = self._allocate_id()
+            alert.timestamp = alert.timestamp or datetime.utcnow()
+            data = alert.to_dict()
+            self._queue.put(_Pending(alert))
+            return data
+        pending = _Pending(alert)
+        self._queue.put(pending)
+        wait = self.submit_timeout if timeout is None else timeout
+        if not pending.done.wait(wait):
+            raise PersistPending(f'alert not committed within {wait}s')
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def may_be_pending(self, alert_id):
+        """Whether alert_id was handed out by submit() and could still be waiting for its batch"""
+        return self.ack_before_flush and self._next_id is not None and alert_id < self._next_id
+
+    def flush(self, timeout=5.0):
+        """Block until every alert queued before this call is committed; False on timeout"""
+        if self._thread is None:
+            return True
+        barrier = _Pending(None)
+        self._queue.put(barrier)
+        return barrier.done.wait(timeout)
+
+    def _ensure_writer(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='alert-ingest', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush_pending)
+
+    def _take_batch(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            try:
+                self._write(self._take_batch(first))
+            except Exception as e:
+                # Anything after the commit: the rows are written, keep the writer alive
+                print(f"Alert writer error after commit: {e}")
+
+    def _write(self, batch):
+        rows = [p for p in batch if p.alert is not None]
+        with self.app.app_context():
+            session = self.db.session
+            try:
+                if rows:
+                    start = time.perf_counter()
+                    try:
+                        session.add_all([p.alert for p in rows])
+                        # The flush assigns ids and defaults; serialize now, because commit
+                        # expires every instance and to_dict() would then reload each row
+                        session.flush()
+                        results = [p.alert.to_dict() for p in rows]
+                        session.commit()
+                    except Exception as e:
+                        session.rollback()
+                        print(f"Alert batch of {len(rows)} failed ({e}); retrying one by one")
+                        for p in rows:
+                            self._write_one(session, p)
+                    else:
+                        # Committed: nothing below may send the batch down the retry path again
+                        for p, result in zip(rows, results):
+                            p.result = result
+                        metrics.STAGE_SECONDS.labels(stage='alert_persist').observe(time.perf_counter() - start)
+                        metrics.INGEST_BATCH.observe(len(rows))
+            finally:
+                for p in batch:
+                    p.done.set()
+
+    def _write_one(self, session, p):
+        try:
+            # The rollback expunged it, so the same object can be added again
+            session.add(p.alert)
+            session.flush()
+            result = p.alert.to_dict()
+            session.commit()
+            p.result = result
+        except Exception as e:
+            session.rollback()
+            p.error = e
+            print(f"Dropping alert {p.alert.id}: {e}")
+
+    def flush_pending(self, timeout=5.0):
+        """Stop the writer after it has drained the queue"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
@@ -0,0 +1,93 @@
+"""
+Prometheus metrics for the dashboard (prometheus_client), served at /metrics
+"""
+import math
+import time
+
+from flask import Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+
+try:
+    from prometheus_client import disable_created_metrics
+    # Only the counters themselves; no *_created series next to every one
+    disable_created_metrics()
+except ImportError:
+    pass
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def register_gauge(name, help, fn):
+    """Gauge whose value is read from ``fn`` at scrape time"""
+    def read():
+        # A failing probe must not fail the whole scrape
+        try:
+            return float(fn())
+        except Exception:
+            return math.nan
+    gauge = Gauge(name, help)
+    gauge.set_function(read)
+    return gauge
+
+
+def render():
+    return generate_latest(REGISTRY)
+
+
+HTTP_SECONDS = Histogram(
+    'dashboard_http_request_seconds', 'Dashboard request latency', ('endpoint', 'method', 'status'),
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_SECONDS = Histogram(
+    'dashboard_fastapi_call_seconds', 'Calls to the FastAPI detection service', ('path', 'outcome'),
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    'dashboard_stage_seconds', 'Time spent per local stage (alert_persist)', ('stage',),
+    buckets=LATENCY_BUCKETS,
+)
+FALLBACKS = Counter(
+    'dashboard_fallback_total', 'Requests served from the local SQLite fallback', ('operation',),
+)
+ALERTS_CREATED = Counter(
+    'dashboard_alerts_created_total', 'Alerts created through the dashboard', ('severity', 'source'),
+)
+INGEST_BATCH = Histogram(
+    'dashboard_alert_ingest_batch_size', 'Alerts written per write-behind transaction',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+NOTIFY_SECONDS = Histogram(
+    'dashboard_notification_seconds', 'Enqueue-to-delivery time of notifications', ('channel', 'outcome'),
+    buckets=LATENCY_BUCKETS,
+)
+NOTIFY_EVENTS = Counter(
+    'dashboard_notifications_total', 'Notifications by outcome (queued, sent, failed, dropped, deduped)',
+    ('channel', 'outcome'),
+)
+SOCKET_FRAMES = Counter(
+    'dashboard_socketio_frames_total', 'Socket.IO frames emitted (one per room per flush)', ('event',),
+)
+SOCKET_ALERTS = Counter(
+    'dashboard_socketio_alerts_total', 'Alert events carried in Socket.IO batches', ('kind',),
+)
+
+
+def init_app(app):
+    """Time every request and expose GET /metrics"""
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None and request.endpoint != 'metrics':
+            HTTP_SECONDS.labels(endpoint=request.endpoint or 'unmatched', method=request.method,
+                                status=str(response.status_code)).observe(time.perf_counter() - start)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render(), mimetype=None, content_type=CONTENT_TYPE)
@@ -0,0 +1,92 @@
+"""
+Asynchronous alert notifications (SMS, e-mail, on-site siren).
+
+Handlers call dispatch_alert(), which only enqueues: every channel has its
+own bounded queue and worker threads, failed sends are retried with
+exponential backoff, and a full queue drops the notification instead of
+blocking the request. Repeat alerts for the same incident (same location and
+type within NOTIFY_DEDUP_S) do not page again.
+
+The queueing, retry and dedup logic is notifier.NotificationDispatcher from
+the repo root. NOTIFY_SINK selects the senders: 'log' prints what would be
+sent (the default, as before), 'stub' records deliveries in memory for tests.
+Dispatch latency, outcomes and queue depth are exported on /metrics.
+"""
+import os
+import sys
+
+import metrics
+
+# The dispatcher lives in notifier.py at the repo root, shared with the detection
+# scripts; render.yaml builds from the root and only then cd's into this folder.
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
+from notifier import NotificationDispatcher, StubSink  # noqa: E402
+
+
+class LogSink:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def __call__(self, payload):
+        print(f"[{self.channel.upper()} SIMULATION] {payload['recipient']}: {payload['message']}")
+
+
+# Which channels fire for which severity, with the action label reported back to the client
+ROUTES = (
+    ('sms', ('high', 'medium'), 'Emergency Contacts', 'SMS Sent to Emergency Contacts'),
+    ('email', ('high', 'medium'), 'Admin', 'Email Sent to Admin'),
+    ('siren', ('high',), None, 'On-site Siren Triggered'),
+)
+
+
+def _record(channel, outcome, latency):
+    metrics.NOTIFY_EVENTS.labels(channel=channel, outcome=outcome).inc()
+    if outcome in ('sent', 'failed'):
+        metrics.NOTIFY_SECONDS.labels(channel=channel, outcome=outcome).observe(latency)
+
+
+def _make_sink(channel):
+    if os.getenv('NOTIFY_SINK', 'log').lower() == 'stub':
+        return StubSink(channel, verbose=False)
+    return LogSink(channel)
+
+
+dispatcher = NotificationDispatcher(
+    {
+        'sms': (_make_sink('sms'), int(os.getenv('NOTIFY_SMS_WORKERS', 4))),
+        'email': (_make_sink('email'), int(os.getenv('NOTIFY_EMAIL_WORKERS', 2))),
+        'siren': (_make_sink('siren'), 1),
+    },
+    queue_size=int(os.getenv('NOTIFY_QUEUE_SIZE', 1000)),
+    retries=int(os.getenv('NOTIFY_RETRIES', 3)),
+    backoff=float(os.getenv('NOTIFY_BACKOFF_S', 0.5)),
+    dedup_window=float(os.getenv('NOTIFY_DEDUP_S', 600)),
+    on_result=_record,
+)
+metrics.register_gauge('dashboard_notification_queue_depth', 'Notifications waiting to be sent',
+                       lambda: dispatcher.depth())
+
+
+def dispatch_alert(severity, alert_type, location):
+    """
+    Queue the notifications an alert calls for.
+    Returns (actions, queued): action labels for the client and whether any channel was queued.
+    """
+    actions = ["Web Dashboard Updated"]  # implicit via SocketIO
+    queued = False
+    msg = f"ALERT: {severity.upper()} severity {alert_type} detected at {location}."
+    for channel, severities, recipient, label in ROUTES:
+        if severity not in severities:
+            continue
+        payload = {'recipient': recipient or location, 'message': msg}
+        outcome = dispatcher.notify(channel, payload, incident_id=(location, alert_type), kind='alert')
+        if outcome == 'queued':
+            actions.append(label)
+            queued = True
+        else:
+            actions.append(f"{channel.upper()} {outcome} (same incident)" if outcome == 'deduped'
+                           else f"{channel.upper()} {outcome} (queue full)")
+    return actions, queued
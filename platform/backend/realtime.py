@@ -0,0 +1,114 @@
+"""
+Coalesced Socket.IO fan-out of alert events.
+
+Alerts are not emitted one by one: they are buffered and flushed every
+SOCKETIO_COALESCE_MS as a single 'alerts_batch' frame per room:
+
+    {"new": [alert, ...], "updated": [{"id": 7, "acknowledged": true, ...}, ...]}
+
+'updated' entries are deltas (id plus the changed fields); several updates
+to one alert inside a window are merged. Each client sits in exactly one
+room, 'alerts:<location>:<severity>' with '*' as wildcard, chosen with a
+'subscribe' event, so an alert is emitted to at most four rooms.
+"""
+import threading
+
+from flask import request
+from flask_socketio import join_room, leave_room, rooms
+
+import metrics
+
+ROOM_PREFIX = 'alerts:'
+ANY = '*'
+
+
+def room_name(location=None, severity=None):
+    return f'{ROOM_PREFIX}{location or ANY}:{severity or ANY}'
+
+
+def rooms_for(alert):
+    """Every room whose filter matches this alert"""
+    location = alert.get('location') or ANY
+    severity = alert.get('severity') or ANY
+    return {room_name(loc, sev) for loc in (location, ANY) for sev in (severity, ANY)}
+
+
+class AlertBroadcaster:
+    def __init__(self, socketio, interval_ms=250):
+        self.socketio = socketio
+        self.interval = max(0.0, interval_ms / 1000.0)
+        self._lock = threading.Lock()
+        self._new = []       # (rooms, alert)
+        self._updated = {}   # id -> (rooms, delta)
+        self._started = False
+
+    def publish_new(self, alert):
+        with self._lock:
+            self._new.append((rooms_for(alert), alert))
+        self._kick()
+
+    def publish_update(self, alert, fields):
+        """Queue the changed ``fields`` of ``alert`` (which still needs location/severity for routing)."""
+        delta = {k: alert.get(k) for k in fields}
+        with self._lock:
+            routed, pending = self._updated.get(alert['id'], (rooms_for(alert), {'id': alert['id']}))
+            pending.update(delta)
+            self._updated[alert['id']] = (routed, pending)
+        self._kick()
+
+    def flush(self):
+        with self._lock:
+            new, self._new = self._new, []
+            updated, self._updated = self._updated, {}
+        if not new and not updated:
+            return
+        frames = {}
+        for routed, alert in new:
+            for room in routed:
+                frames.setdefault(room, {'new': [], 'updated': []})['new'].append(alert)
+        for routed, delta in updated.values():
+            for room in routed:
+                frames.setdefault(room, {'new': [], 'updated': []})['updated'].append(delta)
+        for room, frame in frames.items():
+            self.socketio.emit('alerts_batch', frame, to=room)
+        metrics.SOCKET_FRAMES.labels(event='alerts_batch').inc(len(frames))
+        metrics.SOCKET_ALERTS.labels(kind='new').inc(len(new))
+        metrics.SOCKET_ALERTS.labels(kind='updated').inc(len(updated))
+
+    def _kick(self):
+        if self.interval == 0:
+            self.flush()
+            return
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Socket.IO flush failed: {e}")
+
+
+def init_socketio(socketio):
+    """Register connect/subscribe handlers; clients start in the catch-all room"""
+
+    @socketio.on('connect')
+    def _on_connect():
+        join_room(room_name())
+
+    @socketio.on('subscribe')
+    def _on_subscribe(data=None):
+        data = data or {}
+        for room in rooms():
+            if room.startswith(ROOM_PREFIX):
+                leave_room(room)
+        room = room_name(data.get('location') or None, data.get('severity') or None)
+        join_room(room)
+        return {'room': room, 'sid': request.sid}
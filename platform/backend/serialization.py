@@ -0,0 +1,170 @@
+"""
+Alert serialization for the dashboard API.
+
+Rows are turned into dicts and JSON once and cached per alert, keyed by the
+fields that can still change (acknowledged/resolved/notification state), so
+acknowledge/resolve invalidate an entry simply by changing its version.
+'duration' keeps growing while an alert is open, so it is not cached: it is
+formatted per response and appended to the cached JSON. JSON goes through
+orjson when it is installed.
+"""
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+def dumps(obj):
+    """Compact JSON as bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Route jsonify() through orjson when available"""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def alert_status(acknowledged, resolved_at):
+    if resolved_at:
+        return 'resolved'
+    if acknowledged:
+        return 'acknowledged'
+    return 'active'
+
+
+def transform_remote(a):
+    """Add the dashboard's computed fields to an alert dict from FastAPI"""
+    a['status'] = alert_status(a.get('acknowledged'), a.get('resolved_at'))
+    a['description'] = a.get('message')
+    return a
+
+
+def _iso(dt):
+    return dt.isoformat() if dt else None
+
+
+def format_duration(start, end=None):
+    """'1h 5m' / '4m 12s' / '9s' from start to end (now while the alert is open)"""
+    if start is None:
+        return None
+    total_seconds = int(((end or datetime.utcnow()) - start).total_seconds())
+    hours, remainder = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours > 0:
+        return f"{hours}h {minutes}m"
+    if minutes > 0:
+        return f"{minutes}m {seconds}s"
+    return f"{seconds}s"
+
+
+class AlertSerializer:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # id -> (version, dict, json bytes)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(alert):
+        # timestamp guards against SQLite re-using the id of a deleted row
+        return (alert.timestamp, alert.acknowledged, alert.acknowledged_at, alert.resolved_at, alert.notification_sent)
+
+    def _entry(self, alert):
+        version = self._version(alert)
+        with self._lock:
+            entry = self._entries.get(alert.id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(alert.id)
+                return entry
+        data = {
+            'id': alert.id,
+            'timestamp': _iso(alert.timestamp),
+            'severity': alert.severity,
+            'location': alert.location,
+            'message': alert.message,
+            'description': alert.message,  # Backward compatibility alias
+            'status': alert_status(alert.acknowledged, alert.resolved_at),
+            'acknowledged': alert.acknowledged,
+            'notification_sent': alert.notification_sent,
+            'acknowledged_at': _iso(alert.acknowledged_at),
+            'resolved_at': _iso(alert.resolved_at),
+            'type': alert.type,
+            'confidence': alert.confidence,
+        }
+        entry = (version, data, dumps(data))
+        with self._lock:
+            self._entries[alert.id] = entry
+            self._entries.move_to_end(alert.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def to_dict(self, alert):
+        # Copy so callers can add keys without touching the cache
+        data = dict(self._entry(alert)[1])
+        data['duration'] = format_duration(alert.timestamp, alert.resolved_at)
+        return data
+
+    def encode(self, alert):
+        # The cached object minus its closing brace, plus this response's duration
+        duration = dumps(format_duration(alert.timestamp, alert.resolved_at))
+        return self._entry(alert)[2][:-1] + b',"duration":' + duration + b'}'
+
+    def invalidate(self, alert_id=None):
+        with self._lock:
+            if alert_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(alert_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def json_array_response(encoded, stream=False, chunk_items=256):
+    """Response for a list of already-encoded JSON values; streamed in chunks when ``stream``"""
+    if not stream:
+        return Response(b'[' + b','.join(encoded) + b']', mimetype='application/json')
+
+    def generate():
+        yield b'['
+        chunk = []
+        first = True
+        for item in encoded:
+            chunk.append(item)
+            if len(chunk) >= chunk_items:
+                yield (b'' if first else b',') + b','.join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield (b'' if first else b',') + b','.join(chunk)
+        yield b']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -1,41 +1,74 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from typing import List
-from datetime import datetime
-from ..schemas import Alert, AlertCreate, AckResponse, DetectRequest, DetectResponse, DetectAlertResponse
-from ..services.detection import run_detection
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Response
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from datetime import datetime, timezone
+from ..schemas import Alert, AlertCreate, AckResponse, DetectRequest, DetectResponse, DetectAlertResponse, DetectBatchRequest, DetectBatchResponse
+from ..services.detection import run_detection, run_detection_batch, run_detection_bytes
+from ..services.uploads import InvalidImage, UploadTooLarge, read_upload
+from ..services.executor import InferenceTimeout, QueueFull, get_executor
+from ..services.alerts import get_alert_store
+from ..services.process_pool import WorkerCrashed, get_process_pool, process_mode
+from ..services.yolo import InferenceError
+from ..services import startup
+from ..services.metrics import ALERTS_CREATED, CONTENT_TYPE, INFERENCE_REJECTED, REQUEST_SECONDS, STAGE_SECONDS, render
 from ..core.config import settings
 import os
-import tempfile
+import time
 
 router = APIRouter()
 
-STORE: list[Alert] = []
-COUNTER = 1
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
+
+def _persist_alert(payload: AlertCreate) -> Alert:
+    with STAGE_SECONDS.labels(stage="alert_persist").time():
+        alert = get_alert_store().add(payload)
+    ALERTS_CREATED.labels(severity=alert.severity).inc()
+    return alert
 
 @router.get("/alerts", response_model=List[Alert])
-def get_alerts():
-    return STORE
+def get_alerts(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    before_id: Optional[int] = Query(None, ge=1),
+    since: Optional[datetime] = None,
+    severity: Optional[str] = None,
+    type: Optional[str] = None,
+    acknowledged: Optional[bool] = None,
+    resolved: Optional[bool] = None,
+    location: Optional[str] = None,
+):
+    limit = min(limit or settings.ALERTS_DEFAULT_LIMIT, settings.ALERTS_MAX_LIMIT)
+    if resolved:
+        # Alerts in this service are never resolved, only acknowledged
+        return []
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    items = get_alert_store().list(
+        limit=limit,
+        before_id=before_id,
+        since=since,
+        severity=severity,
+        type=type,
+        acknowledged=acknowledged,
+        location=location,
+    )
+    if len(items) == limit:
+        response.headers["X-Next-Before-Id"] = str(items[-1].id)
+    return items
 
 @router.post("/alerts", response_model=Alert)
 def create_alert(payload: AlertCreate):
-    global COUNTER
-    alert = Alert(
-        id=COUNTER,
-        timestamp=datetime.utcnow(),
-        acknowledged=False,
-        **payload.dict(),
-    )
-    STORE.insert(0, alert)
-    COUNTER += 1
-    return alert
+    return _persist_alert(payload)
 
 @router.post("/alerts/{alert_id}/acknowledge", response_model=Alert)
 def acknowledge_alert(alert_id: int):
-    for a in STORE:
-        if a.id == alert_id:
-            a.acknowledged = True
-            return a
-    raise HTTPException(status_code=404, detail="Alert not found")
+    alert = get_alert_store().acknowledge(alert_id)
+    if alert is None:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return alert
 
 def _map_label_to_severity(label: str) -> str:
     if label == "fire":
@@ -44,83 +77,151 @@ def _map_label_to_severity(label: str) -> str:
         return "medium"
     return "low"
 
-@router.post("/detect", response_model=DetectResponse)
-def detect(payload: DetectRequest):
+def _resolve_candidate(payload: DetectRequest) -> str:
     candidate = payload.image_path or (os.path.join(settings.IMAGE_DIR, payload.filename) if payload.filename else None)
     if not candidate:
         raise HTTPException(status_code=400, detail="image_path or filename required")
     if not os.path.isfile(candidate):
         raise HTTPException(status_code=404, detail="image not found")
-    res = run_detection(candidate)
-    severity = _map_label_to_severity(res.get("label", ""))
-    return DetectResponse(confidence=float(res.get("confidence", 0.0)), severity=severity)
+    return candidate
 
-@router.get("/detect/status")
-def detect_status():
-    from ..services.yolo import has_model
-    ok = False
+def _detection_fields(res: dict) -> dict:
+    """Response fields shared by every detect endpoint."""
+    return {
+        "confidence": float(res.get("confidence", 0.0)),
+        "severity": _map_label_to_severity(res.get("label", "")),
+        "label": res.get("label"),
+        "detections": res.get("detections"),
+        "classes": res.get("classes"),
+    }
+
+async def _infer(route: str, fn, *args):
+    """Run blocking detection work on the inference executor."""
+    start = time.perf_counter()
+    status = "500"  # anything unmapped surfaces as a server error
+    try:
+        res = await get_executor().run(fn, *args)
+        status = "200"
+        return res
+    except QueueFull as e:
+        status = "429"
+        INFERENCE_REJECTED.labels(reason="queue_full").inc()
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceTimeout as e:
+        status = "504"
+        INFERENCE_REJECTED.labels(reason="timeout").inc()
+        raise HTTPException(status_code=504, detail=str(e))
+    except WorkerCrashed as e:
+        # The pool replaces the worker; the request can be retried shortly
+        status = "503"
+        INFERENCE_REJECTED.labels(reason="worker_crashed").inc()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except InvalidImage as e:
+        status = "400"
+        raise HTTPException(status_code=400, detail=str(e))
+    except InferenceError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Rejections and failures included, so the latency histogram is honest under overload
+        REQUEST_SECONDS.labels(route=route, status=status).observe(time.perf_counter() - start)
+
+@router.post("/detect", response_model=DetectResponse)
+async def detect(payload: DetectRequest):
+    candidate = _resolve_candidate(payload)
+    res = await _infer("detect", run_detection, candidate)
+    return DetectResponse(**_detection_fields(res))
+
+@router.post("/detect/batch", response_model=DetectBatchResponse)
+async def detect_batch(payload: DetectBatchRequest):
+    if not payload.items:
+        raise HTTPException(status_code=400, detail="items required")
+    if len(payload.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"at most {settings.BATCH_MAX_ITEMS} items per batch")
+    candidates = [_resolve_candidate(item) for item in payload.items]
+    results = await _infer("detect_batch", run_detection_batch, candidates)
+    return DetectBatchResponse(results=[DetectResponse(**_detection_fields(res)) for res in results])
+
+def _model_state() -> str:
+    """loading / ready / unavailable, without ever loading a model in this process"""
+    from ..services.yolo import model_state
     try:
-        ok = has_model()
+        return get_process_pool().state() if process_mode() else model_state()
     except Exception:
-        ok = False
+        return "unavailable"
+
+@router.get("/healthz")
+def healthz():
+    # Liveness: the process answers; says nothing about the model
+    return {"status": "alive"}
+
+@router.get("/readyz")
+def readyz(response: Response):
+    # Readiness: the model finished loading (or is known to be missing, so fallbacks serve)
+    state = _model_state()
+    if state in ("idle", "loading"):
+        response.status_code = 503
+    return {"status": state, "startup_seconds": startup.phases()}
+
+@router.get("/detect/status")
+def detect_status():
+    from ..services.yolo import get_backend, get_precision
+    state = _model_state()
+    executor = get_executor()
     return {
-        "model_loaded": ok,
+        "live": True,
+        "ready": state not in ("idle", "loading"),
+        "model_state": state,
+        "model_loaded": state == "ready",
+        "startup_seconds": startup.phases(),
         "model_path": settings.MODEL_PATH or "yolov8n.pt",
         "device": settings.DEVICE or "cpu",
+        "backend": get_backend(),
+        "precision": get_precision(),
         "conf_threshold": settings.CONF_THRESHOLD,
         "imgsz": settings.IMGSZ,
+        "tiling": settings.TILING,
+        "tile_size": settings.TILE_SIZE,
+        "tile_overlap": settings.TILE_OVERLAP,
+        "batching": settings.BATCHING,
+        "batch_max_size": settings.BATCH_MAX_SIZE,
+        "batch_max_wait_ms": settings.BATCH_MAX_WAIT_MS,
+        "inference_workers": executor.workers,
+        "inference_capacity": executor.capacity,
+        "inference_pending": executor.pending,
+        "serving_mode": "process" if process_mode() else "thread",
+        "process_workers": get_process_pool().alive if process_mode() else 0,
+        "result_cache": settings.RESULT_CACHE,
+        "result_cache_phash": settings.RESULT_CACHE and settings.RESULT_CACHE_PHASH,
     }
 
+async def _maybe_record_alert(res: dict, severity: str, confidence: float, source_name: str) -> Optional[Alert]:
+    if severity not in ("high", "medium") and confidence < settings.ALERT_CONF_THRESHOLD:
+        return None
+    label = res.get("label", "unknown")
+    payload = AlertCreate(
+        severity=severity,
+        message=f"Detection: {label} in {source_name}",
+        confidence=confidence,
+        type=label,
+        location="N/A",
+    )
+    return await run_in_threadpool(_persist_alert, payload)
+
 @router.post("/detect-and-alert", response_model=DetectAlertResponse)
-def detect_and_alert(payload: DetectRequest):
-    candidate = payload.image_path or (os.path.join(settings.IMAGE_DIR, payload.filename) if payload.filename else None)
-    if not candidate:
-        raise HTTPException(status_code=400, detail="image_path or filename required")
-    if not os.path.isfile(candidate):
-        raise HTTPException(status_code=404, detail="image not found")
-    res = run_detection(candidate)
-    severity = _map_label_to_severity(res.get("label", ""))
-    confidence = float(res.get("confidence", 0.0))
-    created = None
-    if severity in ("high", "medium") or confidence >= settings.ALERT_CONF_THRESHOLD:
-        global COUNTER
-        created = Alert(
-            id=COUNTER,
-            timestamp=datetime.utcnow(),
-            acknowledged=False,
-            severity=severity,
-            message=f"Detection: {res.get('label','unknown')} in {os.path.basename(candidate)}",
-            confidence=confidence,
-            type=res.get("label","unknown"),
-            location="N/A",
-        )
-        STORE.insert(0, created)
-        COUNTER += 1
-    return DetectAlertResponse(confidence=confidence, severity=severity, alert=created)
+async def detect_and_alert(payload: DetectRequest):
+    candidate = _resolve_candidate(payload)
+    res = await _infer("detect_and_alert", run_detection, candidate)
+    fields = _detection_fields(res)
+    created = await _maybe_record_alert(res, fields["severity"], fields["confidence"], os.path.basename(candidate))
+    return DetectAlertResponse(**fields, alert=created)
 
 @router.post("/detect/upload", response_model=DetectAlertResponse)
-def detect_upload(file: UploadFile = File(...)):
-    suffix = os.path.splitext(file.filename or "upload")[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        content = file.file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
-    res = run_detection(tmp_path)
-    severity = _map_label_to_severity(res.get("label", ""))
-    confidence = float(res.get("confidence", 0.0))
-    created = None
-    if severity in ("high", "medium") or confidence >= settings.ALERT_CONF_THRESHOLD:
-        global COUNTER
-        created = Alert(
-            id=COUNTER,
-            timestamp=datetime.utcnow(),
-            acknowledged=False,
-            severity=severity,
-            message=f"Detection: {res.get('label','unknown')} in {os.path.basename(file.filename or 'upload')}",
-            confidence=confidence,
-            type=res.get("label","unknown"),
-            location="N/A",
-        )
-        STORE.insert(0, created)
-        COUNTER += 1
-    return DetectAlertResponse(confidence=confidence, severity=severity, alert=created)
+async def detect_upload(file: UploadFile = File(...)):
+    try:
+        content = await read_upload(file, settings.MAX_UPLOAD_BYTES)
+        res = await _infer("detect_upload", run_detection_bytes, content, file.filename or "upload")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    fields = _detection_fields(res)
+    created = await _maybe_record_alert(res, fields["severity"], fields["confidence"], os.path.basename(file.filename or "upload"))
+    return DetectAlertResponse(**fields, alert=created)
@@ -0,0 +1,338 @@
+"""Reproducible inference benchmarks for the detection service.
+
+    cd platform
+    python -m fastapi_app.benchmark --out bench.json                       # all scenarios
+    python -m fastapi_app.benchmark --scenario batch --batch-sizes 1 4 16
+    python -m fastapi_app.benchmark --scenario http --clients 1 8 32 --requests 200
+
+Scenarios:
+  single  sequential ``run_yolo_detection`` calls
+  batch   ``run_yolo_detection_batch`` for each batch size
+  imgsz   single-image latency for each ``IMGSZ``
+  http    concurrent clients posting to ``/detect/upload`` on a local uvicorn
+          (result cache off unless ``--result-cache``; cache hits are reported per level)
+
+Without a loadable model the in-process scenarios are skipped (exit code 2
+if nothing else was requested). Every scenario reports p50/p95/p99 latency, throughput, peak RSS and CPU
+utilization; the JSON report also records the commit and runtime so results
+from different commits can be compared side by side.
+"""
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional
+import argparse
+import glob
+import http.client
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from .core.config import settings
+
+SCENARIOS = ("single", "batch", "imgsz", "http")
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+def latency_summary(samples_ms: List[float], wall_s: float, items: Optional[int] = None) -> Dict[str, float]:
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    n = items if items is not None else len(arr)
+    if not len(arr):
+        return {"count": 0}
+    return {
+        "count": int(len(arr)),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "mean_ms": float(arr.mean()),
+        "throughput_per_s": n / wall_s if wall_s > 0 else 0.0,
+    }
+
+class ResourceProbe:
+    """CPU utilization and peak RSS of this process (or of ``pid`` via /proc) over a block."""
+
+    def __init__(self, pid: Optional[int] = None):
+        self.pid = pid
+
+    def _cpu_seconds(self) -> float:
+        if self.pid is None:
+            t = os.times()
+            return t.user + t.system
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / _CLK_TCK
+
+    def _peak_rss_mb(self) -> float:
+        if self.pid is None:
+            kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return kb / 1024.0 if sys.platform != "darwin" else kb / (1024.0 * 1024.0)
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+        return 0.0
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = self._cpu_seconds()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._wall
+        self.result = {
+            "cpu_utilization": (self._cpu_seconds() - self._cpu) / wall if wall > 0 else 0.0,
+            "cpu_count": os.cpu_count(),
+            "peak_rss_mb": self._peak_rss_mb(),
+        }
+        return False
+
+def load_images(patterns: List[str], count: int, size: int, seed: int) -> List[np.ndarray]:
+    """Decode ``count`` images from ``patterns`` (or IMAGE_DIR); synthesize seeded noise if none exist."""
+    import cv2
+    paths: List[str] = []
+    for pat in patterns or [os.path.join(settings.IMAGE_DIR or ".", "*")]:
+        paths.extend(p for p in sorted(glob.glob(pat)) if p.lower().endswith((".jpg", ".jpeg", ".png", ".bmp")))
+    images = [img for img in (cv2.imread(p) for p in paths[:count]) if img is not None]
+    if images:
+        while len(images) < count:
+            images.extend(images[: count - len(images)])
+        return images
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (size, size * 16 // 9, 3), dtype=np.uint8) for _ in range(count)]
+
+def _timed(fn: Callable[[], object], repeats: int) -> tuple[List[float], float]:
+    samples = []
+    start = time.perf_counter()
+    for _ in range(repeats):
+        s = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - s) * 1000.0)
+    return samples, time.perf_counter() - start
+
+def scenario_single(images: List[np.ndarray], repeats: int) -> dict:
+    from .services.yolo import run_yolo_detection
+    run_yolo_detection(images[0])
+    idx = iter(range(10 ** 9))
+    with ResourceProbe() as probe:
+        samples, wall = _timed(lambda: run_yolo_detection(images[next(idx) % len(images)]), repeats)
+    return {**latency_summary(samples, wall), **probe.result}
+
+def scenario_batch(images: List[np.ndarray], batch_sizes: List[int], repeats: int) -> dict:
+    from .services.yolo import run_yolo_detection_batch
+    out = {}
+    for bs in batch_sizes:
+        batch = [images[i % len(images)] for i in range(bs)]
+        run_yolo_detection_batch(batch)
+        with ResourceProbe() as probe:
+            samples, wall = _timed(lambda: run_yolo_detection_batch(batch), repeats)
+        summary = latency_summary(samples, wall, items=bs * repeats)
+        summary["per_image_ms"] = summary.get("mean_ms", 0.0) / bs
+        out[str(bs)] = {**summary, **probe.result}
+    return out
+
+def scenario_imgsz(images: List[np.ndarray], sizes: List[int], repeats: int) -> dict:
+    original = settings.IMGSZ
+    out = {}
+    try:
+        for size in sizes:
+            settings.IMGSZ = size
+            out[str(size)] = scenario_single(images, repeats)
+    finally:
+        settings.IMGSZ = original
+    return out
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _multipart(payload: bytes, filename: str = "bench.jpg") -> tuple[bytes, str]:
+    boundary = "----FireBenchBoundary"
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: image/jpeg\r\n\r\n").encode()
+    return head + payload + f"\r\n--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+class LocalServer:
+    """uvicorn running ``fastapi_app.main:app`` in a subprocess for the duration of a block."""
+
+    def __init__(self, startup_timeout: float = 120.0, env: Optional[Dict[str, str]] = None):
+        self.port = _free_port()
+        self.startup_timeout = startup_timeout
+        self.env = env or {}
+        self.proc: Optional[subprocess.Popen] = None
+
+    def __enter__(self):
+        cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "fastapi_app.main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning"],
+            cwd=cwd,
+            env={**os.environ, **self.env},
+        )
+        deadline = time.time() + self.startup_timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError("benchmark server exited during startup")
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=2)
+                # /readyz stays 503 until the background model load and warmup are done
+                conn.request("GET", "/readyz")
+                resp = conn.getresponse()
+                resp.read()
+                conn.close()
+                if resp.status == 200:
+                    return self
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("benchmark server did not become ready")
+
+    def __exit__(self, *exc):
+        if self.proc is not None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        return False
+
+    def cache_hits(self) -> int:
+        """Result-cache hits (exact and perceptual) so far, read from ``/metrics``."""
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        try:
+            conn.request("GET", "/metrics")
+            text = conn.getresponse().read().decode()
+        finally:
+            conn.close()
+        return sum(int(float(line.rsplit(" ", 1)[1])) for line in text.splitlines()
+                   if line.startswith("fire_result_cache_total{") and 'result="hit_' in line)
+
+def scenario_http(images: List[np.ndarray], clients: List[int], requests_per_level: int,
+                  result_cache: bool = False) -> dict:
+    import cv2
+    bodies = [_multipart(cv2.imencode(".jpg", img)[1].tobytes()) for img in images]
+    out = {}
+    # The same few bodies are replayed, so with the cache on this would mostly time cache hits
+    with LocalServer(env={"RESULT_CACHE": "true" if result_cache else "false"}) as server:
+        for n_clients in clients:
+            hits_before = server.cache_hits()
+            samples: List[float] = []
+            statuses: Dict[str, int] = {}
+            lock = threading.Lock()
+            counter = iter(range(requests_per_level))
+
+            def client():
+                conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=120)
+                for i in counter:
+                    body, ctype = bodies[i % len(bodies)]
+                    s = time.perf_counter()
+                    try:
+                        conn.request("POST", "/detect/upload", body=body, headers={"Content-Type": ctype})
+                        resp = conn.getresponse()
+                        resp.read()
+                        status = str(resp.status)
+                    except (OSError, http.client.HTTPException):
+                        conn.close()
+                        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=120)
+                        status = "error"
+                    elapsed = (time.perf_counter() - s) * 1000.0
+                    with lock:
+                        statuses[status] = statuses.get(status, 0) + 1
+                        if status == "200":
+                            samples.append(elapsed)
+                conn.close()
+
+            threads = [threading.Thread(target=client) for _ in range(n_clients)]
+            with ResourceProbe(server.proc.pid) as probe:
+                start = time.perf_counter()
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                wall = time.perf_counter() - start
+            out[str(n_clients)] = {**latency_summary(samples, wall), "statuses": statuses,
+                                   "cache_hits": server.cache_hits() - hits_before, "server": probe.result}
+    return out
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return None
+
+def metadata() -> dict:
+    meta = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "imgsz": settings.IMGSZ,
+        "backend": settings.INFERENCE_BACKEND,
+        "precision": settings.MODEL_PRECISION,
+    }
+    try:
+        import torch
+        meta["torch"] = torch.__version__
+        meta["torch_threads"] = torch.get_num_threads()
+    except Exception:
+        pass
+    return meta
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the fire detection service")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append", help="repeatable; default: all")
+    parser.add_argument("--images", nargs="*", default=[], help="image globs (default: IMAGE_DIR, else synthetic)")
+    parser.add_argument("--num-images", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=20, help="timed iterations per in-process measurement")
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--imgsz", type=int, nargs="*", default=[320, 416, 512, 640])
+    parser.add_argument("--clients", type=int, nargs="*", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=100, help="HTTP requests per concurrency level")
+    parser.add_argument("--result-cache", action="store_true", help="keep the result cache on for the http scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenario or list(SCENARIOS)
+    images = load_images(args.images, args.num_images, settings.IMGSZ, args.seed)
+    skipped = []
+    if any(s != "http" for s in scenarios):
+        from .services.yolo import has_model
+        if not has_model():
+            # Without a model there is nothing to time in-process; the http scenario still measures the stack
+            skipped = [s for s in scenarios if s != "http"]
+            scenarios = [s for s in scenarios if s == "http"]
+            print(f"error: no YOLO model could be loaded (MODEL_PATH={settings.MODEL_PATH!r}); "
+                  f"skipping {', '.join(skipped)}", file=sys.stderr)
+            if not scenarios:
+                return 2
+
+    report = {"meta": metadata(), "scenarios": {}}
+    if skipped:
+        report["skipped"] = {name: "no model" for name in skipped}
+    for name in scenarios:
+        print(f"running {name} ...", file=sys.stderr)
+        if name == "single":
+            report["scenarios"][name] = scenario_single(images, args.repeats)
+        elif name == "batch":
+            report["scenarios"][name] = scenario_batch(images, args.batch_sizes, max(1, args.repeats // 4))
+        elif name == "imgsz":
+            report["scenarios"][name] = scenario_imgsz(images, args.imgsz, args.repeats)
+        elif name == "http":
+            report["scenarios"][name] = scenario_http(images, args.clients, args.requests, args.result_cache)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
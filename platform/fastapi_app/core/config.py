@@ -1,16 +1,54 @@
+from pydantic import PrivateAttr
 from pydantic_settings import BaseSettings
-from typing import Optional, Union
+from typing import Dict, Optional, Tuple, Union
 import os
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_WEIGHTS = os.path.join(PROJECT_ROOT, 'weights', 'best_swapped.pt')
+
 class Settings(BaseSettings):
     ALLOW_ORIGINS: Union[str, list[str]] = "*"
     MODEL_PATH: Optional[str] = None
+    INFERENCE_BACKEND: str = "torch"  # "torch", "torchscript", "onnx" or "openvino"
+    MODEL_PRECISION: str = "fp32"  # "fp32" or "int8" (onnx/openvino only)
     DEVICE: Optional[str] = None
     CONF_THRESHOLD: float = 0.10
     IMAGE_DIR: Optional[str] = "data/images"
     ALERT_CONF_THRESHOLD: float = 0.50
     IMGSZ: int = 512
     WARMUP: bool = True
+    BACKGROUND_LOAD: bool = True  # load/warm the model after startup; /readyz reports when it is done
+    BATCHING: bool = True
+    BATCH_MAX_SIZE: int = 8
+    BATCH_MAX_WAIT_MS: float = 5.0
+    BATCH_MAX_ITEMS: int = 64
+    TILING: bool = False  # slice large frames into overlapping tiles (small, distant fires)
+    TILE_SIZE: int = 640
+    TILE_OVERLAP: float = 0.2
+    TILE_MIN_SIDE: int = 1280  # frames whose long side is at most this are not tiled
+    TILE_GATE: bool = False  # only tile around boxes from a low-confidence full-frame pass
+    TILE_GATE_CONF: float = 0.03
+    TILE_MERGE_THRESHOLD: float = 0.6  # intersection-over-smaller for cross-tile NMS
+    MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    INFERENCE_WORKERS: Optional[int] = None  # defaults to the model-side concurrency, see executor.default_workers
+    INFERENCE_QUEUE_SIZE: Optional[int] = None  # defaults to 2 * INFERENCE_WORKERS
+    INFERENCE_TIMEOUT_S: float = 30.0
+    ALERT_STORE: str = "sqlite"  # "sqlite" or "memory"
+    ALERT_DB_PATH: str = "/tmp/fastapi_alerts.db"
+    ALERT_MEMORY_MAX: int = 10000
+    ALERTS_DEFAULT_LIMIT: int = 100
+    ALERTS_MAX_LIMIT: int = 1000
+    SERVING_MODE: str = "thread"  # "thread" (in-process model) or "process" (worker pool)
+    PROCESS_WORKERS: Optional[int] = None  # defaults to cpu_count // WORKER_TORCH_THREADS
+    WORKER_TORCH_THREADS: int = 4
+    PROCESS_PIN_CPUS: bool = True
+    SHM_SLOTS: Optional[int] = None  # defaults to 2 per worker
+    SHM_SLOT_BYTES: int = 1920 * 1080 * 3  # larger frames fall back to the task queue
+    RESULT_CACHE: bool = False  # opt-in: a hit can return a result up to RESULT_CACHE_TTL_S old
+    RESULT_CACHE_MAX_ENTRIES: int = 1024
+    RESULT_CACHE_TTL_S: float = 30.0
+    RESULT_CACHE_PHASH: bool = False  # also reuse results of near-identical frames
+    RESULT_CACHE_PHASH_DISTANCE: int = 4  # max differing bits of the 64-bit dHash
     
     def get_allow_origins(self) -> list[str]:
         """Convert ALLOW_ORIGINS to list format"""
@@ -21,32 +59,62 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in self.ALLOW_ORIGINS.split(",")]
         return self.ALLOW_ORIGINS
     
+    # Resolved artifact paths, keyed by the settings they depend on
+    _paths: Dict[Tuple, Optional[str]] = PrivateAttr(default_factory=dict)
+
+    def clear_path_cache(self):
+        """Forget resolved paths (e.g. after exporting a new artifact in-process)"""
+        self._paths.clear()
+
     def get_model_path(self) -> Optional[str]:
         """Resolve model path, handling relative paths and defaults"""
+        key = ("pt", self.MODEL_PATH)
+        if key not in self._paths:
+            self._paths[key] = self._resolve_model_path()
+        return self._paths[key]
+
+    def _resolve_model_path(self) -> Optional[str]:
+        default_path = DEFAULT_WEIGHTS if os.path.exists(DEFAULT_WEIGHTS) else None
         if not self.MODEL_PATH:
-            # Try default location
-            project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
-            default_path = os.path.join(project_root, 'weights', 'best_swapped.pt')
-            if os.path.exists(default_path):
-                return default_path
             # Fallback to yolov8n.pt (will be downloaded by ultralytics)
-            return None
-        
+            return default_path
+
         # If absolute path, use as is
         if os.path.isabs(self.MODEL_PATH):
             return self.MODEL_PATH if os.path.exists(self.MODEL_PATH) else None
-        
-        # Relative path - resolve from project root
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
-        resolved_path = os.path.join(project_root, self.MODEL_PATH)
+
+        # Relative path - resolve from project root, else the default location
+        resolved_path = os.path.join(PROJECT_ROOT, self.MODEL_PATH)
         if os.path.exists(resolved_path):
             return resolved_path
-        
-        # Try default location as fallback
-        default_path = os.path.join(project_root, 'weights', 'best_swapped.pt')
-        if os.path.exists(default_path):
-            return default_path
-        
-        return None
+        return default_path
+
+    def get_backend_model_path(self) -> Optional[str]:
+        """Path of the exported artifact for INFERENCE_BACKEND, next to the .pt weights"""
+        backend = (self.INFERENCE_BACKEND or "torch").lower()
+        int8 = (self.MODEL_PRECISION or "fp32").lower() == "int8"
+        key = (backend, int8, self.MODEL_PATH)
+        if key not in self._paths:
+            self._paths[key] = self._resolve_backend_path(backend, int8)
+        return self._paths[key]
+
+    def _resolve_backend_path(self, backend: str, int8: bool) -> Optional[str]:
+        pt_path = self.get_model_path()
+        if backend == "torch" or not pt_path:
+            return pt_path
+        stem = os.path.splitext(pt_path)[0]
+        if backend == "torchscript":
+            # Traced snapshot: skips rebuilding the module graph from the pickled weights
+            candidate = stem + ".torchscript"
+        else:
+            if int8:
+                stem += "_int8"
+            if backend == "onnx":
+                candidate = stem + ".onnx"
+            elif backend == "openvino":
+                candidate = stem + "_openvino_model"
+            else:
+                return None
+        return candidate if os.path.exists(candidate) else None
 
 settings = Settings()
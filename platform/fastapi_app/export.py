@@ -0,0 +1,146 @@
+"""Export the detector for CPU inference backends and check output parity.
+
+    cd platform
+    python -m fastapi_app.export --format onnx
+    python -m fastapi_app.export --format torchscript   # faster cold start, no extra runtime
+    python -m fastapi_app.export --format openvino --check-parity data/images/*.jpg
+    python -m fastapi_app.export --format onnx --int8 static --data ../data.yaml --check-parity
+
+With ``--check-parity`` the FP32 export must match PyTorch within
+``--conf-tol``; an ``--int8`` artifact is checked too, against the looser
+``--int8-conf-tol``. Artifacts are written next to the .pt weights, where ``INFERENCE_BACKEND``
+picks them up (``best_swapped.onnx`` / ``best_swapped_openvino_model/`` /
+``best_swapped.torchscript``).
+"""
+from __future__ import annotations
+from typing import Dict, List, Tuple
+import argparse
+import glob
+import os
+import sys
+import numpy as np
+from .core.config import settings
+
+FORMATS = ("onnx", "openvino", "torchscript")
+
+def export(weights: str, fmt: str, imgsz: int) -> str:
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    kwargs = {"format": fmt, "imgsz": imgsz}
+    if fmt == "onnx":
+        # Dynamic axes so the micro-batcher can send variable batch sizes
+        kwargs.update(dynamic=True, simplify=True)
+    return str(model.export(**kwargs))
+
+def _boxes(result) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=int)
+    return boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy().astype(int)
+
+def _iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(br - tl, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+def compare(ref, other, iou_thr: float) -> Dict[str, float]:
+    """Greedy same-class IoU matching of two results."""
+    return compare_boxes(_boxes(ref), _boxes(other), iou_thr)
+
+def compare_boxes(ref: Tuple[np.ndarray, np.ndarray, np.ndarray], other: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                  iou_thr: float) -> Dict[str, float]:
+    """``compare`` on ``(xyxy, conf, cls)`` arrays; each box matches at most one box of the other side."""
+    rb, rc, rk = ref
+    ob, oc, ok = other
+    matched, conf_diffs = 0, []
+    if len(rb) and len(ob):
+        ious = _iou(rb, ob)
+        ious[rk[:, None] != ok[None, :]] = 0.0
+        for i in np.argsort(-rc):
+            j = int(np.argmax(ious[i]))
+            if ious[i, j] >= iou_thr:
+                matched += 1
+                conf_diffs.append(abs(float(rc[i]) - float(oc[j])))
+                ious[:, j] = 0.0
+    return {
+        "ref_boxes": len(rb),
+        "other_boxes": len(ob),
+        "matched": matched,
+        "max_conf_diff": max(conf_diffs) if conf_diffs else 0.0,
+    }
+
+def check_parity(weights: str, exported: str, images: List[str], imgsz: int, conf: float,
+                 iou_thr: float = 0.9, conf_tol: float = 0.05) -> bool:
+    from ultralytics import YOLO
+    ref_model = YOLO(weights)
+    other_model = YOLO(exported, task="detect")
+    ok = True
+    for path in images:
+        kw = dict(conf=conf, imgsz=imgsz, device="cpu", verbose=False)
+        ref = ref_model.predict(path, **kw)[0]
+        other = other_model.predict(path, **kw)[0]
+        r = compare(ref, other, iou_thr)
+        unmatched = max(r["ref_boxes"], r["other_boxes"]) - r["matched"]
+        good = unmatched == 0 and r["max_conf_diff"] <= conf_tol
+        ok &= good
+        print(f"{'OK ' if good else 'BAD'} {os.path.basename(path)}: "
+              f"boxes {r['ref_boxes']}/{r['other_boxes']} matched {r['matched']} "
+              f"max |dconf| {r['max_conf_diff']:.4f}")
+    return ok
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export YOLO weights for ONNX Runtime / OpenVINO / TorchScript")
+    parser.add_argument("--format", choices=FORMATS, required=True)
+    parser.add_argument("--weights", default=None, help="source .pt (default: resolved MODEL_PATH)")
+    parser.add_argument("--imgsz", type=int, default=settings.IMGSZ)
+    parser.add_argument("--int8", choices=("static", "dynamic"), default=None,
+                        help="also build an INT8 variant (static calibrates on the --data val split)")
+    parser.add_argument("--data", default=None, help="dataset yaml used for INT8 calibration")
+    parser.add_argument("--data-root", default=None, help="override the 'path' entry of the dataset yaml")
+    parser.add_argument("--calib-size", type=int, default=200, help="val images used for calibration")
+    parser.add_argument("--check-parity", nargs="*", metavar="IMAGE", default=None,
+                        help="compare boxes against PyTorch on these images (default: IMAGE_DIR)")
+    parser.add_argument("--iou", type=float, default=0.9, help="IoU needed to match a box in the parity check")
+    parser.add_argument("--conf-tol", type=float, default=0.05, help="allowed confidence difference")
+    parser.add_argument("--int8-conf-tol", type=float, default=0.15,
+                        help="allowed confidence difference for the INT8 artifact (quantization shifts scores)")
+    args = parser.parse_args(argv)
+    if args.int8 and args.format == "torchscript":
+        parser.error("--int8 is only supported for onnx and openvino")
+
+    weights = args.weights or settings.get_model_path()
+    if not weights:
+        print("No weights found; pass --weights or set MODEL_PATH", file=sys.stderr)
+        return 2
+    out = export(weights, args.format, args.imgsz)
+    print(f"Exported {weights} -> {out}")
+    int8 = None
+    if args.int8:
+        from .quantize import export_int8
+        if args.int8 == "static" and not args.data:
+            print("--int8 static needs --data for calibration", file=sys.stderr)
+            return 2
+        int8 = export_int8(weights, args.format, args.imgsz, args.int8, args.data, args.data_root, args.calib_size)
+        print(f"INT8 ({args.int8}) -> {int8}")
+
+    if args.check_parity is not None:
+        images = args.check_parity or sorted(
+            p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(settings.IMAGE_DIR or ".", f"*.{ext}"))
+        )[:20]
+        if not images:
+            print("No images for the parity check", file=sys.stderr)
+            return 2
+        print(f"Parity fp32 {out}:")
+        ok = check_parity(weights, out, images, args.imgsz, settings.CONF_THRESHOLD, args.iou, args.conf_tol)
+        if int8:
+            print(f"Parity int8 {int8}:")
+            ok &= check_parity(weights, int8, images, args.imgsz, settings.CONF_THRESHOLD, args.iou, args.int8_conf_tol)
+        if not ok:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
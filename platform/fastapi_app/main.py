@@ -1,8 +1,16 @@
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
 from .api.routes import router as api_router
-from .services.yolo import warmup
+from .services import startup
+from .services.yolo import load_model, start_background_load
+from .services.executor import shutdown_executor
+from .services.alerts import close_alert_store
+from .services.process_pool import get_process_pool, process_mode, shutdown_process_pool
+from .services.uploads import CHUNK_SIZE, BodyLimitMiddleware
 
 app = FastAPI(title="AI Fire Alert API")
 app.add_middleware(
@@ -12,9 +20,28 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Room for the multipart envelope; read_upload enforces the exact file limit
+app.add_middleware(BodyLimitMiddleware, max_bytes=settings.MAX_UPLOAD_BYTES + CHUNK_SIZE)
 app.include_router(api_router)
+startup.record("app_import", time.perf_counter() - _import_started)
 
 @app.on_event("startup")
 def _startup():
-    if settings.WARMUP:
-        warmup()
+    with startup.phase("resolve_paths"):
+        settings.get_backend_model_path()
+    if process_mode():
+        # Workers load and warm up their own model copies; /readyz flips once one reports
+        with startup.phase("process_pool_spawn"):
+            get_process_pool()
+    elif settings.BACKGROUND_LOAD:
+        # Answer liveness/status right away; requests that need the model wait for the loader
+        start_background_load(warm=settings.WARMUP)
+    else:
+        load_model(warm=settings.WARMUP)
+    startup.log("serving")
+
+@app.on_event("shutdown")
+def _shutdown():
+    shutdown_executor()
+    shutdown_process_pool()
+    close_alert_store()
@@ -0,0 +1,206 @@
+"""INT8 model variants and an FP32-vs-INT8 accuracy/speed report.
+
+    cd platform
+    # build <weights>_int8.onnx (static, calibrated on the data.yaml val split)
+    python -m fastapi_app.export --format onnx --int8 static --data ../data.yaml --data-root /datasets/dfire
+    # compare latency, throughput and mAP of FP32 vs INT8 on the val split
+    python -m fastapi_app.quantize --format onnx --data ../data.yaml --data-root /datasets/dfire --out int8_report.json
+
+Set ``MODEL_PRECISION=int8`` (with ``INFERENCE_BACKEND=onnx|openvino``) to serve the INT8 artifact.
+"""
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from .core.config import settings
+
+INT8_MODES = ("static", "dynamic")
+_IMAGE_EXTS = ("jpg", "jpeg", "png", "bmp")
+
+def load_data_config(data_yaml: str, data_root: Optional[str] = None) -> dict:
+    import yaml
+    with open(data_yaml) as f:
+        cfg = yaml.safe_load(f)
+    if data_root:
+        cfg["path"] = data_root
+    return cfg
+
+def split_images(cfg: dict, split: str = "val") -> List[str]:
+    root = cfg.get("path") or "."
+    rel = cfg.get(split)
+    if not rel:
+        return []
+    folder = rel if os.path.isabs(rel) else os.path.join(root, rel)
+    return sorted(p for ext in _IMAGE_EXTS for p in glob.glob(os.path.join(folder, f"*.{ext}")))
+
+def calibration_subset(images: List[str], size: int, seed: int = 0) -> List[str]:
+    if len(images) <= size:
+        return images
+    rng = np.random.default_rng(seed)
+    return [images[i] for i in sorted(rng.choice(len(images), size=size, replace=False))]
+
+def letterbox_tensor(path: str, imgsz: int) -> np.ndarray:
+    """Same preprocessing as ultralytics: letterbox to imgsz, RGB, [0,1], NCHW float32."""
+    import cv2
+    img = cv2.imread(path)
+    h, w = img.shape[:2]
+    r = min(imgsz / h, imgsz / w)
+    nh, nw = int(round(h * r)), int(round(w * r))
+    resized = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - nh) // 2, (imgsz - nw) // 2
+    canvas[top:top + nh, left:left + nw] = resized
+    return np.ascontiguousarray(canvas[:, :, ::-1].transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+def _calibration_reader(input_name: str, images: List[str], imgsz: int):
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self._it: Iterator[str] = iter(images)
+
+        def get_next(self):
+            path = next(self._it, None)
+            return None if path is None else {input_name: letterbox_tensor(path, imgsz)}
+
+    return _Reader()
+
+def quantize_onnx(fp32_path: str, out_path: str, mode: str, calib_images: List[str], imgsz: int) -> str:
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+    if mode == "dynamic":
+        quantize_dynamic(fp32_path, out_path, weight_type=QuantType.QUInt8)
+        return out_path
+    if not calib_images:
+        raise ValueError("static INT8 needs calibration images (check --data / --data-root)")
+    import onnxruntime as ort
+    input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    quantize_static(
+        fp32_path,
+        out_path,
+        _calibration_reader(input_name, calib_images, imgsz),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+    return out_path
+
+def export_int8(weights: str, fmt: str, imgsz: int, mode: str = "static", data_yaml: Optional[str] = None,
+                data_root: Optional[str] = None, calib_size: int = 200) -> str:
+    """Build the INT8 artifact next to ``weights`` and return its path."""
+    stem = os.path.splitext(weights)[0]
+    cfg = load_data_config(data_yaml, data_root) if data_yaml else {}
+    if fmt == "onnx":
+        from .export import export
+        fp32 = stem + ".onnx"
+        if not os.path.exists(fp32):
+            fp32 = export(weights, "onnx", imgsz)
+        calib = calibration_subset(split_images(cfg, "val"), calib_size) if mode == "static" else []
+        return quantize_onnx(fp32, stem + "_int8.onnx", mode, calib, imgsz)
+    if fmt == "openvino":
+        # ultralytics runs NNCF post-training quantization on the val split of ``data``
+        from ultralytics import YOLO
+        data = _materialize_data_yaml(cfg) if cfg else data_yaml
+        return str(YOLO(weights).export(format="openvino", int8=True, data=data, imgsz=imgsz))
+    raise ValueError(f"unsupported format {fmt!r}")
+
+def _materialize_data_yaml(cfg: dict) -> str:
+    """Write ``cfg`` (e.g. with an overridden dataset root) to a temp yaml ultralytics can read."""
+    import yaml
+    fd, path = tempfile.mkstemp(suffix=".yaml")
+    with os.fdopen(fd, "w") as f:
+        yaml.safe_dump(cfg, f)
+    return path
+
+def _percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+def benchmark_latency(model_path: str, images: List[str], imgsz: int, conf: float, warmup: int = 3) -> Dict[str, float]:
+    from ultralytics import YOLO
+    model = YOLO(model_path, task="detect")
+    for path in images[:warmup]:
+        model.predict(path, imgsz=imgsz, conf=conf, device="cpu", verbose=False)
+    lat = []
+    t0 = time.perf_counter()
+    for path in images:
+        s = time.perf_counter()
+        model.predict(path, imgsz=imgsz, conf=conf, device="cpu", verbose=False)
+        lat.append((time.perf_counter() - s) * 1000.0)
+    total = time.perf_counter() - t0
+    return {
+        "images": len(images),
+        "latency_ms_mean": float(np.mean(lat)) if lat else 0.0,
+        "latency_ms_p50": _percentile(lat, 50),
+        "latency_ms_p95": _percentile(lat, 95),
+        "throughput_ips": len(images) / total if total > 0 else 0.0,
+    }
+
+def evaluate_map(model_path: str, data: str, imgsz: int) -> Dict[str, float]:
+    from ultralytics import YOLO
+    metrics = YOLO(model_path, task="detect").val(data=data, split="val", imgsz=imgsz, batch=1, device="cpu",
+                                                  plots=False, verbose=False)
+    return {"map50": float(metrics.box.map50), "map50_95": float(metrics.box.map)}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare FP32 and INT8 detector variants on the val split")
+    parser.add_argument("--format", choices=("onnx", "openvino"), default="onnx")
+    parser.add_argument("--mode", choices=INT8_MODES, default="static", help="ONNX quantization mode")
+    parser.add_argument("--weights", default=None, help="source .pt (default: resolved MODEL_PATH)")
+    parser.add_argument("--data", required=True, help="dataset yaml (val split used for calibration and mAP)")
+    parser.add_argument("--data-root", default=None, help="override the 'path' entry of the dataset yaml")
+    parser.add_argument("--imgsz", type=int, default=settings.IMGSZ)
+    parser.add_argument("--calib-size", type=int, default=200)
+    parser.add_argument("--latency-images", type=int, default=100, help="val images timed per variant")
+    parser.add_argument("--skip-map", action="store_true", help="only measure speed")
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    weights = args.weights or settings.get_model_path()
+    if not weights:
+        print("No weights found; pass --weights or set MODEL_PATH", file=sys.stderr)
+        return 2
+    cfg = load_data_config(args.data, args.data_root)
+    val = split_images(cfg, "val")
+    if not val:
+        print("No val images found; check --data / --data-root", file=sys.stderr)
+        return 2
+    data = _materialize_data_yaml(cfg)
+
+    from .export import export
+    stem = os.path.splitext(weights)[0]
+    fp32 = stem + (".onnx" if args.format == "onnx" else "_openvino_model")
+    if not os.path.exists(fp32):
+        fp32 = export(weights, args.format, args.imgsz)
+    int8 = export_int8(weights, args.format, args.imgsz, args.mode, args.data, args.data_root, args.calib_size)
+
+    timed = calibration_subset(val, args.latency_images, seed=1)
+    report = {"format": args.format, "mode": args.mode, "imgsz": args.imgsz, "variants": {}}
+    for name, path in (("fp32", fp32), ("int8", int8)):
+        entry = {"path": path, **benchmark_latency(path, timed, args.imgsz, settings.CONF_THRESHOLD)}
+        if not args.skip_map:
+            entry.update(evaluate_map(path, data, args.imgsz))
+        report["variants"][name] = entry
+    v32, v8 = report["variants"]["fp32"], report["variants"]["int8"]
+    report["speedup"] = v32["latency_ms_mean"] / v8["latency_ms_mean"] if v8["latency_ms_mean"] else 0.0
+    if not args.skip_map:
+        report["map50_95_delta"] = v8["map50_95"] - v32["map50_95"]
+
+    for name, v in report["variants"].items():
+        line = f"{name:>5}: {v['latency_ms_mean']:.1f} ms mean, p95 {v['latency_ms_p95']:.1f} ms, {v['throughput_ips']:.1f} img/s"
+        if "map50_95" in v:
+            line += f", mAP50 {v['map50']:.4f}, mAP50-95 {v['map50_95']:.4f}"
+        print(line)
+    print(f"speedup x{report['speedup']:.2f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class AlertBase(BaseModel):
@@ -36,11 +36,28 @@ class DetectRequest(BaseModel):
     image_path: Optional[str] = None
     filename: Optional[str] = None
 
-class DetectResponse(BaseModel):
+class Detection(BaseModel):
+    label: str
     confidence: float
-    severity: str
+    box: List[float]  # x1, y1, x2, y2 in source image pixels
 
-class DetectAlertResponse(BaseModel):
+class ClassSummary(BaseModel):
+    count: int
+    max_confidence: float
+    area_fraction: float
+
+class DetectResponse(BaseModel):
     confidence: float
     severity: str
+    label: Optional[str] = None
+    detections: Optional[List[Detection]] = None
+    classes: Optional[Dict[str, ClassSummary]] = None
+
+class DetectAlertResponse(DetectResponse):
     alert: Optional[Alert] = None
+
+class DetectBatchRequest(BaseModel):
+    items: List[DetectRequest]
+
+class DetectBatchResponse(BaseModel):
+    results: List[DetectResponse]
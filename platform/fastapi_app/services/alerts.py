@@ -0,0 +1,216 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+import itertools
+import os
+import sqlite3
+import threading
+from ..core.config import settings
+from ..schemas import Alert, AlertBase
+
+class AlertStore(ABC):
+    """Repository interface for alerts; newest-first listing."""
+
+    @abstractmethod
+    def add(self, payload: AlertBase) -> Alert:
+        ...
+
+    @abstractmethod
+    def get(self, alert_id: int) -> Optional[Alert]:
+        ...
+
+    @abstractmethod
+    def acknowledge(self, alert_id: int) -> Optional[Alert]:
+        ...
+
+    @abstractmethod
+    def list(
+        self,
+        limit: int = 100,
+        before_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        severity: Optional[str] = None,
+        type: Optional[str] = None,
+        acknowledged: Optional[bool] = None,
+        location: Optional[str] = None,
+    ) -> List[Alert]:
+        """Newest-first page of at most ``limit`` alerts with ``id < before_id``."""
+
+    def close(self):
+        pass
+
+class MemoryAlertStore(AlertStore):
+    """Ring buffer of the most recent ``max_items`` alerts plus an id index."""
+
+    def __init__(self, max_items: int = 10000):
+        self._order: Deque[int] = deque()
+        self._by_id: Dict[int, Alert] = {}
+        self._max_items = max(1, int(max_items))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, payload: AlertBase) -> Alert:
+        with self._lock:
+            alert = Alert(
+                id=next(self._ids),
+                timestamp=datetime.utcnow(),
+                acknowledged=False,
+                **payload.dict(),
+            )
+            self._order.append(alert.id)
+            self._by_id[alert.id] = alert
+            while len(self._order) > self._max_items:
+                self._by_id.pop(self._order.popleft(), None)
+            return alert
+
+    def get(self, alert_id: int) -> Optional[Alert]:
+        return self._by_id.get(alert_id)
+
+    def acknowledge(self, alert_id: int) -> Optional[Alert]:
+        with self._lock:
+            alert = self._by_id.get(alert_id)
+            if alert is not None:
+                alert.acknowledged = True
+            return alert
+
+    def list(self, limit=100, before_id=None, since=None, severity=None, type=None, acknowledged=None, location=None):
+        out: List[Alert] = []
+        with self._lock:
+            # Ids are monotonic with insertion time, so walking newest-first
+            # lets the cursor and ``since`` bound the scan.
+            for alert_id in reversed(self._order):
+                if len(out) >= limit:
+                    break
+                if before_id is not None and alert_id >= before_id:
+                    continue
+                a = self._by_id[alert_id]
+                if since is not None and a.timestamp < since:
+                    break
+                if severity is not None and a.severity != severity:
+                    continue
+                if type is not None and a.type != type:
+                    continue
+                if acknowledged is not None and a.acknowledged != acknowledged:
+                    continue
+                if location is not None and a.location != location:
+                    continue
+                out.append(a)
+        return out
+
+_COLUMNS = "id, timestamp, severity, message, confidence, type, location, acknowledged"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    message TEXT NOT NULL,
+    confidence REAL NOT NULL DEFAULT 0.0,
+    type TEXT NOT NULL,
+    location TEXT NOT NULL,
+    acknowledged INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_alerts_timestamp ON alerts (timestamp);
+CREATE INDEX IF NOT EXISTS ix_alerts_severity ON alerts (severity, id);
+CREATE INDEX IF NOT EXISTS ix_alerts_acknowledged ON alerts (acknowledged, id);
+CREATE INDEX IF NOT EXISTS ix_alerts_type ON alerts (type, id);
+CREATE INDEX IF NOT EXISTS ix_alerts_location ON alerts (location, id);
+"""
+
+class SQLiteAlertStore(AlertStore):
+    """SQLite-backed store in WAL mode; ids come from AUTOINCREMENT so they
+    stay unique and monotonic across restarts."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _row_to_alert(row) -> Alert:
+        return Alert(
+            id=row[0],
+            timestamp=datetime.fromisoformat(row[1]),
+            severity=row[2],
+            message=row[3],
+            confidence=row[4],
+            type=row[5],
+            location=row[6],
+            acknowledged=bool(row[7]),
+        )
+
+    def add(self, payload: AlertBase) -> Alert:
+        data = payload.dict()
+        ts = datetime.utcnow()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO alerts (timestamp, severity, message, confidence, type, location, acknowledged) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (ts.isoformat(), data["severity"], data["message"], float(data["confidence"]), data["type"], data["location"]),
+            )
+            alert_id = cur.lastrowid
+        return Alert(id=alert_id, timestamp=ts, acknowledged=False, **data)
+
+    def get(self, alert_id: int) -> Optional[Alert]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM alerts WHERE id = ?", (alert_id,)).fetchone()
+        return self._row_to_alert(row) if row else None
+
+    def acknowledge(self, alert_id: int) -> Optional[Alert]:
+        with self._lock:
+            self._conn.execute("UPDATE alerts SET acknowledged = 1 WHERE id = ?", (alert_id,))
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM alerts WHERE id = ?", (alert_id,)).fetchone()
+        return self._row_to_alert(row) if row else None
+
+    def list(self, limit=100, before_id=None, since=None, severity=None, type=None, acknowledged=None, location=None):
+        clauses = []
+        params: list = []
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since.isoformat())
+        for column, value in (("severity", severity), ("type", type), ("location", location)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if acknowledged is not None:
+            clauses.append("acknowledged = ?")
+            params.append(int(acknowledged))
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {_COLUMNS} FROM alerts {where}ORDER BY id DESC LIMIT ?", params).fetchall()
+        return [self._row_to_alert(r) for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_store: Optional[AlertStore] = None
+_store_lock = threading.Lock()
+
+def get_alert_store() -> AlertStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if (settings.ALERT_STORE or "").lower() == "sqlite":
+                    _store = SQLiteAlertStore(settings.ALERT_DB_PATH)
+                else:
+                    _store = MemoryAlertStore(settings.ALERT_MEMORY_MAX)
+    return _store
+
+def close_alert_store():
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
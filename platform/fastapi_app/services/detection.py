@@ -1,11 +1,74 @@
-from .yolo import has_model, run_yolo_detection
+from typing import List
+from .yolo import has_model, run_yolo_detection_batch, run_yolo_detection_batched
+from .uploads import decode_image
+from .metrics import STAGE_SECONDS
+from .result_cache import CACHE_LOOKUPS, content_key, get_result_cache, path_key
+from .process_pool import get_process_pool, process_mode
 
-def run_detection(image_path: str) -> dict:
-    if has_model():
-        return run_yolo_detection(image_path)
+def _fallback_detection(image_path: str) -> dict:
     s = (image_path or "").lower()
     if "fire" in s:
         return {"label": "fire", "confidence": 0.82}
     if "smoke" in s:
         return {"label": "smoke", "confidence": 0.72}
     return {"label": "none", "confidence": 0.30}
+
+def _model_available() -> bool:
+    if process_mode():
+        return get_process_pool().has_model()
+    return has_model()
+
+def _infer_one(source) -> dict:
+    if process_mode():
+        return get_process_pool().run(source)
+    return run_yolo_detection_batched(source)
+
+def _infer_many(sources: List) -> List[dict]:
+    if process_mode():
+        return get_process_pool().run_batch(sources)
+    return run_yolo_detection_batch(sources)
+
+def run_detection(image_path: str) -> dict:
+    if not _model_available():
+        return _fallback_detection(image_path)
+    cache = get_result_cache()
+    if cache is None:
+        return _infer_one(image_path)
+    return cache.lookup_or_run(path_key(image_path), lambda: _infer_one(image_path))
+
+def run_detection_batch(image_paths: List[str]) -> List[dict]:
+    if not _model_available():
+        return [_fallback_detection(p) for p in image_paths]
+    cache = get_result_cache()
+    if cache is None:
+        return _infer_many(image_paths)
+    keys = [path_key(p) for p in image_paths]
+    results = [cache.get(k) if k is not None else None for k in keys]
+    misses = [i for i, r in enumerate(results) if r is None]
+    CACHE_LOOKUPS.labels(result="hit_exact").inc(len(image_paths) - len(misses))
+    CACHE_LOOKUPS.labels(result="miss").inc(len(misses))
+    if misses:
+        # Only the uncached images go to the model, still as one batch
+        for i, res in zip(misses, _infer_many([image_paths[i] for i in misses])):
+            results[i] = res
+            if keys[i] is not None:
+                cache.put(keys[i], res)
+    return results
+
+def run_detection_bytes(data: bytes, name: str) -> dict:
+    """Detect on encoded image bytes; ``name`` feeds the model-less fallback."""
+    if not _model_available():
+        return _fallback_detection(name)
+    cache = get_result_cache()
+    key = content_key(data) if cache is not None else None
+    if cache is not None:
+        # Exact repeats skip decoding as well as inference
+        hit = cache.get(key)
+        if hit is not None:
+            CACHE_LOOKUPS.labels(result="hit_exact").inc()
+            return hit
+    with STAGE_SECONDS.labels(stage="decode").time():
+        image = decode_image(data)
+    if cache is None:
+        return _infer_one(image)
+    return cache.lookup_image_or_run(key, image, _infer_one)
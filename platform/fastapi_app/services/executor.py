@@ -0,0 +1,104 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import asyncio
+import functools
+import threading
+from ..core.config import settings
+from .metrics import register_gauge
+
+class QueueFull(RuntimeError):
+    pass
+
+class InferenceTimeout(TimeoutError):
+    pass
+
+class InferenceExecutor:
+    """Bounded thread pool that keeps model work off the event loop.
+
+    At most ``workers`` jobs run at once and ``queue_size`` more may wait;
+    anything beyond that is rejected immediately with ``QueueFull`` so the
+    caller can shed load instead of piling up requests.
+
+    A worker thread only submits work and waits: every in-process ``predict``
+    is serialized on the one loaded model, so parallelism comes from the
+    micro-batcher (up to ``BATCH_MAX_SIZE`` images per predict) or from the
+    worker processes in process mode. ``default_workers`` sizes the pool to
+    that real concurrency, so overload turns into 429s rather than requests
+    timing out behind the model lock.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout_s: Optional[float]):
+        self.workers = max(1, int(workers))
+        self.capacity = self.workers + max(0, int(queue_size))
+        self.timeout_s = timeout_s if timeout_s and timeout_s > 0 else None
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _fut):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise QueueFull("inference queue is full")
+            self._pending += 1
+        try:
+            cf = self._pool.submit(functools.partial(fn, *args))
+        except BaseException:
+            self._release(None)
+            raise
+        # The slot is freed when the job really finishes (or is cancelled
+        # while still queued), not when the awaiting request gives up.
+        cf.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(cf), self.timeout_s)
+        except asyncio.TimeoutError:
+            raise InferenceTimeout(f"inference exceeded {self.timeout_s}s")
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+def default_workers() -> int:
+    """Jobs the model side can actually work on at once."""
+    from .process_pool import process_mode, process_worker_count
+    batch = settings.BATCH_MAX_SIZE if settings.BATCHING else 1
+    if process_mode():
+        # Each worker process drains up to ``batch`` queued frames into one predict
+        return process_worker_count() * batch
+    # One model, one predict at a time; batching lets that predict take ``batch`` requests
+    return batch
+
+_executor: Optional[InferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> InferenceExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = settings.INFERENCE_WORKERS or default_workers()
+                queue_size = settings.INFERENCE_QUEUE_SIZE
+                if queue_size is None:
+                    # Up to two more rounds of work may wait; anything later would mostly time out
+                    queue_size = 2 * workers
+                _executor = InferenceExecutor(workers, queue_size, settings.INFERENCE_TIMEOUT_S)
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+register_gauge("fire_inference_pending", "Inference jobs running or queued on the executor",
+               lambda: _executor.pending if _executor is not None else 0)
+register_gauge("fire_inference_capacity", "Executor slots (workers + queue) before requests get 429",
+               lambda: _executor.capacity if _executor is not None else 0)
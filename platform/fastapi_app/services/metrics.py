@@ -0,0 +1,54 @@
+"""Prometheus metrics for the detection service, built on ``prometheus_client``."""
+from __future__ import annotations
+from typing import Callable
+import math
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+
+try:
+    from prometheus_client import disable_created_metrics
+    # Only the counters themselves; no *_created series next to every one
+    disable_created_metrics()
+except ImportError:
+    pass
+
+# Seconds; covers sub-millisecond decode up to multi-second CPU forwards
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+STAGE_SECONDS = Histogram(
+    "fire_stage_seconds", "Time spent per pipeline stage (decode, preprocess, forward, postprocess, alert_persist)",
+    ("stage",), buckets=LATENCY_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "fire_inference_request_seconds", "End-to-end inference time as seen by the route, queueing included",
+    ("route", "status"), buckets=LATENCY_BUCKETS,
+)
+INFERENCE_REJECTED = Counter(
+    "fire_inference_rejected_total", "Inference requests rejected by the executor", ("reason",),
+)
+BATCH_SIZE = Histogram(
+    "fire_batch_size", "Images per predict call", buckets=BATCH_BUCKETS,
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "fire_model_load_seconds", "Wall time of the last model load", ("backend",),
+)
+ALERTS_CREATED = Counter(
+    "fire_alerts_created_total", "Alerts created since process start", ("severity",),
+)
+
+def register_gauge(name: str, help: str, fn: Callable[[], float]) -> Gauge:
+    """Gauge whose value is read from ``fn`` at scrape time (queue depths etc.)."""
+    def read() -> float:
+        # A failing probe must not fail the whole scrape
+        try:
+            return float(fn())
+        except Exception:
+            return math.nan
+    gauge = Gauge(name, help)
+    gauge.set_function(read)
+    return gauge
+
+def render() -> bytes:
+    return generate_latest(REGISTRY)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -0,0 +1,398 @@
+from __future__ import annotations
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+import atexit
+import itertools
+import logging
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import queue
+import threading
+import time
+import numpy as np
+from ..core.config import settings
+from .executor import InferenceTimeout, QueueFull
+from .metrics import register_gauge
+
+logger = logging.getLogger(__name__)
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+# A worker that dies this many times without ever loading is not restarted again
+MAX_STARTUP_FAILURES = 3
+
+# Messages on a worker's task pipe:
+#   (job_id, slot, shape)  frame pixels live in shared-memory slot ``slot``
+#   (job_id, None, source) small payload (a path, or a frame too large for a slot)
+# and on its result pipe:
+#   ("ready", index, loaded) / ("result", job_id, dict) / ("error", job_id, exc)
+#   ("metrics", index, observations) stage and batch-size timings of the batch just run
+_STOP = None
+
+def _worker_main(index: int, shm_name: str, slot_bytes: int, task_conn, result_conn,
+                 threads: int, cpus: Optional[List[int]], max_batch: int):
+    """Inference worker: owns one model, pinned thread count, batches whatever is queued."""
+    # Must happen before torch spins up its pools
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass
+    from . import yolo
+    yolo.capture_observations()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        loaded = yolo.has_model()
+        if loaded and settings.WARMUP:
+            yolo.warmup()
+        result_conn.send(("ready", index, loaded))
+        while True:
+            tasks = [task_conn.recv()]
+            while len(tasks) < max_batch and tasks[-1] is not _STOP and task_conn.poll():
+                tasks.append(task_conn.recv())
+            stop = tasks[-1] is _STOP
+            tasks = [t for t in tasks if t is not _STOP]
+            if tasks:
+                sources = []
+                for job_id, slot, payload in tasks:
+                    if slot is None:
+                        sources.append(payload)
+                    else:
+                        # Zero-copy view; the front keeps the slot reserved until our result arrives
+                        sources.append(np.ndarray(payload, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes))
+                try:
+                    # Per-item failures come back as InvalidImage / InferenceError and go to that job only
+                    results = yolo.run_yolo_detection_batch(sources, return_exceptions=True)
+                    for (job_id, _, _), res in zip(tasks, results):
+                        result_conn.send(("error" if isinstance(res, Exception) else "result", job_id, res))
+                except Exception as e:
+                    for job_id, _, _ in tasks:
+                        result_conn.send(("error", job_id, repr(e)))
+                del sources
+                observations = yolo.take_observations()
+                if observations:
+                    result_conn.send(("metrics", index, observations))
+            if stop:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        shm.close()
+
+class _Worker:
+    __slots__ = ("process", "task_conn", "result_conn", "send_lock", "jobs")
+
+    def __init__(self, process, task_conn, result_conn):
+        self.process = process
+        self.task_conn = task_conn
+        self.result_conn = result_conn
+        self.send_lock = threading.Lock()
+        self.jobs: set = set()
+
+class ProcessInferencePool:
+    """N single-model inference processes fed through a shared-memory ring of frame slots.
+
+    Decoded frames are copied once into a free slot and only ``(job, slot,
+    shape)`` crosses the process boundary. Every worker has its own task and
+    result pipes, so a crashed worker cannot wedge the others; jobs go to the
+    worker with the fewest outstanding, and each worker drains up to
+    ``max_batch`` queued tasks into a single ``predict``. A collector thread
+    matches results to futures, records the workers' stage timings in this
+    process and fails the jobs of workers that die. A worker that holds a
+    job past ``timeout_s`` is killed and replaced, which frees its slots.
+    """
+
+    def __init__(self, workers: int, threads_per_worker: int, slots: int, slot_bytes: int,
+                 max_batch: int = 1, pin_cpus: bool = True, timeout_s: Optional[float] = None):
+        self.workers = max(1, int(workers))
+        self.threads_per_worker = max(1, int(threads_per_worker))
+        self.slot_bytes = int(slot_bytes)
+        self.max_batch = max(1, int(max_batch))
+        self.pin_cpus = pin_cpus
+        self.timeout_s = timeout_s if timeout_s and timeout_s > 0 else None
+        n_slots = max(self.workers, int(slots))
+        self._ctx = mp.get_context("spawn")
+        self._shm = shared_memory.SharedMemory(create=True, size=n_slots * self.slot_bytes)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for i in range(n_slots):
+            self._free.put(i)
+        self.slots = n_slots
+        self._jobs: Dict[int, Tuple[Future, Optional[int], int]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._workers: List[Optional[_Worker]] = [None] * self.workers
+        self._ready: Dict[int, bool] = {}
+        self._startup_failures = [0] * self.workers
+        self._ready_event = threading.Event()
+        self._closed = False
+        for i in range(self.workers):
+            self._spawn(i)
+        self._collector = threading.Thread(target=self._collect, name="process-pool-results", daemon=True)
+        self._collector.start()
+
+    def _cpus_for(self, index: int) -> Optional[List[int]]:
+        if not self.pin_cpus or not hasattr(os, "sched_getaffinity"):
+            return None
+        cpus = sorted(os.sched_getaffinity(0))
+        start = index * self.threads_per_worker
+        if start + self.threads_per_worker > len(cpus):
+            return None
+        return cpus[start:start + self.threads_per_worker]
+
+    def _spawn(self, index: int):
+        task_recv, task_send = self._ctx.Pipe(duplex=False)
+        result_recv, result_send = self._ctx.Pipe(duplex=False)
+        p = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self._shm.name, self.slot_bytes, task_recv, result_send,
+                  self.threads_per_worker, self._cpus_for(index), self.max_batch),
+            name=f"inference-worker-{index}",
+            daemon=True,
+        )
+        p.start()
+        # The child holds its own ends now
+        task_recv.close()
+        result_send.close()
+        self._ready.pop(index, None)
+        self._workers[index] = _Worker(p, task_send, result_recv)
+
+    @property
+    def alive(self) -> int:
+        return sum(1 for w in self._workers if w is not None and w.process.is_alive())
+
+    @property
+    def slots_in_use(self) -> int:
+        return self.slots - self._free.qsize()
+
+    def has_model(self, timeout: Optional[float] = None) -> bool:
+        """Whether workers could load a model; waits for the first one to report.
+
+        Waits at most ``timeout`` (default: the per-request ``timeout_s``) and
+        raises ``InferenceTimeout`` if no worker has reported by then, so a
+        request never holds an executor slot longer than its own budget.
+        """
+        if not self._ready_event.wait(timeout if timeout is not None else self.timeout_s):
+            raise InferenceTimeout(f"inference workers still loading after {timeout or self.timeout_s}s")
+        return any(self._ready.values())
+
+    def state(self) -> str:
+        """Non-blocking counterpart of ``has_model``: loading, ready or unavailable."""
+        if not self._ready_event.is_set():
+            return "loading"
+        return "ready" if any(self._ready.values()) else "unavailable"
+
+    def _finish(self, job_id: int, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            entry = self._jobs.pop(job_id, None)
+            if entry is not None:
+                worker = self._workers[entry[2]]
+                if worker is not None:
+                    worker.jobs.discard(job_id)
+        if entry is None:
+            return
+        fut, slot, _ = entry
+        if slot is not None:
+            self._free.put(slot)
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def _retire(self, index: int):
+        """Fail the jobs of a dead worker and start a replacement (unless it never came up)."""
+        worker = self._workers[index]
+        if worker is None:
+            return
+        with self._lock:
+            lost = list(worker.jobs)
+        logger.warning("inference worker %d exited with %s; failing %d job(s)", index, worker.process.exitcode, len(lost))
+        for job_id in lost:
+            self._finish(job_id, error=WorkerCrashed(f"inference worker {index} died"))
+        worker.task_conn.close()
+        worker.result_conn.close()
+        if index not in self._ready:
+            self._startup_failures[index] += 1
+            if self._startup_failures[index] >= MAX_STARTUP_FAILURES:
+                logger.error("inference worker %d failed to start %d times, giving up", index, MAX_STARTUP_FAILURES)
+                self._workers[index] = None
+                if not any(self._workers):
+                    # Nobody will ever report ready; let has_model() answer False
+                    self._ready_event.set()
+                return
+        if not self._closed:
+            self._spawn(index)
+
+    def _collect(self):
+        while not self._closed:
+            conns = {w.result_conn: i for i, w in enumerate(self._workers) if w is not None}
+            if not conns:
+                time.sleep(1.0)
+                continue
+            for conn in mp.connection.wait(list(conns), timeout=1.0):
+                index = conns[conn]
+                try:
+                    kind, key, payload = conn.recv()
+                except (EOFError, OSError):
+                    if self._closed:
+                        return
+                    self._workers[index].process.join(1.0)
+                    self._retire(index)
+                    continue
+                if kind == "ready":
+                    self._ready[key] = payload
+                    self._startup_failures[key] = 0
+                    self._ready_event.set()
+                elif kind == "result":
+                    self._finish(key, result=payload)
+                elif kind == "metrics":
+                    from . import yolo
+                    yolo.record_observations(payload)
+                else:
+                    self._finish(key, error=payload if isinstance(payload, Exception) else RuntimeError(payload))
+
+    def _pick_worker(self) -> int:
+        live = [i for i, w in enumerate(self._workers) if w is not None and w.process.is_alive()]
+        if not live:
+            raise WorkerCrashed("no inference worker is running")
+        return min(live, key=lambda i: len(self._workers[i].jobs))
+
+    def submit(self, source: Any) -> Future:
+        return self._submit(source)[1]
+
+    def _submit(self, source: Any) -> Tuple[int, Future]:
+        fut: Future = Future()
+        job_id = next(self._ids)
+        slot = None
+        if isinstance(source, np.ndarray) and source.dtype == np.uint8 and source.nbytes <= self.slot_bytes:
+            # Blocks while every slot is in flight (natural backpressure), but not forever
+            try:
+                slot = self._free.get(timeout=self.timeout_s)
+            except queue.Empty:
+                raise QueueFull("no free shared-memory frame slot")
+            view = np.ndarray(source.shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+            view[...] = source
+            task = (job_id, slot, source.shape)
+        else:
+            task = (job_id, None, source)
+        with self._lock:
+            try:
+                index = self._pick_worker()
+            except WorkerCrashed:
+                if slot is not None:
+                    self._free.put(slot)
+                raise
+            worker = self._workers[index]
+            self._jobs[job_id] = (fut, slot, index)
+            worker.jobs.add(job_id)
+        try:
+            with worker.send_lock:
+                worker.task_conn.send(task)
+        except (OSError, ValueError):
+            # Worker went away between picking and sending; the collector restarts it
+            self._finish(job_id, error=WorkerCrashed(f"inference worker {index} is gone"))
+        return job_id, fut
+
+    def _recycle(self, job_id: int):
+        """Kill the worker still holding ``job_id``; the collector fails its jobs and respawns it."""
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            worker = self._workers[entry[2]] if entry is not None else None
+        if worker is None or not worker.process.is_alive():
+            return
+        logger.warning("inference worker %d exceeded %ss on job %d; replacing it", entry[2], self.timeout_s, job_id)
+        worker.process.kill()
+
+    def _wait(self, jobs: List[Tuple[int, Future]]) -> List[dict]:
+        deadline = time.monotonic() + self.timeout_s if self.timeout_s else None
+        out = []
+        for job_id, fut in jobs:
+            try:
+                out.append(fut.result(None if deadline is None else max(0.0, deadline - time.monotonic())))
+            except FutureTimeout:
+                # A hung worker would keep its slots and keep getting work; replace it
+                for other, f in jobs:
+                    if not f.done():
+                        self._recycle(other)
+                raise InferenceTimeout(f"inference exceeded {self.timeout_s}s")
+        return out
+
+    def run(self, source: Any) -> dict:
+        return self._wait([self._submit(source)])[0]
+
+    def run_batch(self, sources: List[Any]) -> List[dict]:
+        return self._wait([self._submit(s) for s in sources])
+
+    def shutdown(self, timeout: float = 5.0):
+        self._closed = True
+        for w in self._workers:
+            if w is not None:
+                try:
+                    with w.send_lock:
+                        w.task_conn.send(_STOP)
+                except (OSError, ValueError):
+                    pass
+        for w in self._workers:
+            if w is not None:
+                w.process.join(timeout)
+                if w.process.is_alive():
+                    w.process.terminate()
+        with self._lock:
+            pending = list(self._jobs)
+        for job_id in pending:
+            self._finish(job_id, error=WorkerCrashed("process pool shut down"))
+        self._shm.close()
+        self._shm.unlink()
+
+_pool: Optional[ProcessInferencePool] = None
+_pool_lock = threading.Lock()
+
+def process_mode() -> bool:
+    return (settings.SERVING_MODE or "thread").lower() == "process"
+
+def process_worker_count() -> int:
+    """Worker processes ``get_process_pool`` starts, without starting them."""
+    threads = max(1, settings.WORKER_TORCH_THREADS)
+    return settings.PROCESS_WORKERS or max(1, (os.cpu_count() or 1) // threads)
+
+def get_process_pool() -> ProcessInferencePool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                threads = max(1, settings.WORKER_TORCH_THREADS)
+                workers = process_worker_count()
+                _pool = ProcessInferencePool(
+                    workers,
+                    threads,
+                    slots=settings.SHM_SLOTS or 2 * workers,
+                    slot_bytes=settings.SHM_SLOT_BYTES,
+                    max_batch=settings.BATCH_MAX_SIZE if settings.BATCHING else 1,
+                    pin_cpus=settings.PROCESS_PIN_CPUS,
+                    timeout_s=settings.INFERENCE_TIMEOUT_S,
+                )
+                # Stop workers cleanly even without the app shutdown hook
+                atexit.register(shutdown_process_pool)
+    return _pool
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+register_gauge("fire_process_workers_alive", "Inference worker processes currently alive",
+               lambda: _pool.alive if _pool is not None else 0)
+register_gauge("fire_shm_slots_in_use", "Shared-memory frame slots holding in-flight frames",
+               lambda: _pool.slots_in_use if _pool is not None else 0)
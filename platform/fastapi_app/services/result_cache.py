@@ -0,0 +1,197 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+import hashlib
+import os
+import threading
+import time
+import numpy as np
+from ..core.config import settings
+from .metrics import Counter, register_gauge
+
+CACHE_LOOKUPS = Counter("fire_result_cache_total", "Result cache lookups", ("result",))
+
+def content_key(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def path_key(path: str) -> Optional[Tuple[str, int, int]]:
+    """Key a file by path, size and mtime so edits invalidate it without reading the bytes."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+def dhash(image: np.ndarray, size: int = 8) -> int:
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 grayscale thumbnail."""
+    import cv2
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = np.packbits(small[:, 1:] > small[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def _bands(h: int, n: int, bits: int = 64) -> List[Tuple[int, int]]:
+    """Split a hash into ``n`` contiguous bit ranges, tagged with their position."""
+    out, shift = [], 0
+    for i in range(n):
+        width = bits // n + (1 if i < bits % n else 0)
+        out.append((i, (h >> shift) & ((1 << width) - 1)))
+        shift += width
+    return out
+
+class ResultCache:
+    """LRU + TTL cache of detection results.
+
+    Entries are keyed exactly (content hash or path/mtime); when
+    ``phash_distance`` is set, entries also carry a dHash and a lookup that
+    misses exactly may reuse the result of a frame within that Hamming
+    distance, which is what repeated snapshots of a static scene look like.
+
+    Only results of a run that completed are stored: inference failures
+    raise out of ``fn`` before ``put``, so a bad batch can never pin a
+    "no fire" answer for an input.
+
+    Near-duplicate lookups do not scan the cache: each dHash is split into
+    ``phash_distance + 1`` bands and indexed per band. Two hashes within that
+    distance must agree on at least one whole band, so only entries sharing
+    a band are compared. The cost is the number of such candidates, not the
+    cache size.
+    """
+
+    def __init__(self, max_entries: int, ttl_s: float, phash_distance: Optional[int] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = ttl_s if ttl_s and ttl_s > 0 else None
+        self.phash_distance = phash_distance
+        self._entries: "OrderedDict[Hashable, Tuple[dict, float, Optional[int]]]" = OrderedDict()
+        self._index: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_s is not None and now - stored_at > self.ttl_s
+
+    def _index_add(self, key: Hashable, h: Optional[int]):
+        if h is None or self.phash_distance is None:
+            return
+        for band in _bands(h, self.phash_distance + 1):
+            self._index.setdefault(band, set()).add(key)
+
+    def _drop(self, key: Hashable):
+        """Remove an entry and its band index entries; caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[2] is None or self.phash_distance is None:
+            return
+        for band in _bands(entry[2], self.phash_distance + 1):
+            keys = self._index.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[band]
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry[1], now):
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def get_similar(self, phash: int) -> Optional[dict]:
+        """Most recently stored live entry whose dHash is within ``phash_distance``."""
+        entry = self._similar_entry(phash)
+        return entry[0] if entry is not None else None
+
+    def _similar_entry(self, phash: int) -> Optional[Tuple[dict, float, Optional[int]]]:
+        if self.phash_distance is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            candidates: Set[Hashable] = set()
+            for band in _bands(phash, self.phash_distance + 1):
+                candidates.update(self._index.get(band, ()))
+            best, best_at = None, None
+            for key in candidates:
+                _, stored_at, h = self._entries[key]
+                if self._expired(stored_at, now) or _hamming(h, phash) > self.phash_distance:
+                    continue
+                if best_at is None or stored_at > best_at:
+                    best, best_at = key, stored_at
+            if best is None:
+                return None
+            self._entries.move_to_end(best)
+            return self._entries[best]
+
+    def put(self, key: Hashable, result: dict, phash: Optional[int] = None, stored_at: Optional[float] = None):
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (result, time.monotonic() if stored_at is None else stored_at, phash)
+            self._index_add(key, phash)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def lookup_or_run(self, key: Optional[Hashable], fn: Callable[[], dict]) -> dict:
+        """Exact-key lookup; on a miss run ``fn`` and store its result."""
+        if key is None:
+            return fn()
+        hit = self.get(key)
+        if hit is not None:
+            CACHE_LOOKUPS.labels(result="hit_exact").inc()
+            return hit
+        CACHE_LOOKUPS.labels(result="miss").inc()
+        result = fn()
+        self.put(key, result)
+        return result
+
+    def lookup_image_or_run(self, key: Hashable, image: np.ndarray, fn: Callable[[np.ndarray], dict]) -> dict:
+        """Like ``lookup_or_run`` for decoded images, with the perceptual fallback."""
+        hit = self.get(key)
+        if hit is not None:
+            CACHE_LOOKUPS.labels(result="hit_exact").inc()
+            return hit
+        phash = dhash(image) if self.phash_distance is not None else None
+        if phash is not None:
+            entry = self._similar_entry(phash)
+            if entry is not None:
+                CACHE_LOOKUPS.labels(result="hit_perceptual").inc()
+                # Keeps the original age: a drifting static scene must not keep one result alive past the TTL
+                self.put(key, entry[0], phash, stored_at=entry[1])
+                return entry[0]
+        CACHE_LOOKUPS.labels(result="miss").inc()
+        result = fn(image)
+        self.put(key, result, phash)
+        return result
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Shared cache, or None when ``RESULT_CACHE`` is off."""
+    global _cache
+    if not settings.RESULT_CACHE:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache(
+                    settings.RESULT_CACHE_MAX_ENTRIES,
+                    settings.RESULT_CACHE_TTL_S,
+                    settings.RESULT_CACHE_PHASH_DISTANCE if settings.RESULT_CACHE_PHASH else None,
+                )
+    return _cache
+
+register_gauge("fire_result_cache_entries", "Entries held by the result cache",
+               lambda: len(_cache) if _cache is not None else 0)
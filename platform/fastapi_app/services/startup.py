@@ -0,0 +1,36 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Dict
+import logging
+import threading
+import time
+from .metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+STARTUP_SECONDS = Gauge("fire_startup_phase_seconds", "Wall time of each startup phase", ("phase",))
+
+_phases: Dict[str, float] = {}
+_lock = threading.Lock()
+
+def record(phase: str, seconds: float):
+    with _lock:
+        _phases[phase] = round(seconds, 4)
+    STARTUP_SECONDS.labels(phase=phase).set(seconds)
+
+@contextmanager
+def phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def phases() -> Dict[str, float]:
+    with _lock:
+        return dict(_phases)
+
+def log(stage: str):
+    """One line with every phase recorded so far, e.g. ``startup (serving): app_import=0.41s ...``"""
+    timings = phases()
+    logger.info("startup (%s): %s", stage, " ".join(f"{k}={v:.3f}s" for k, v in timings.items()) or "no phases")
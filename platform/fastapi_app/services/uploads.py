@@ -0,0 +1,87 @@
+from __future__ import annotations
+from typing import Any, Optional
+import json
+import numpy as np
+
+CHUNK_SIZE = 64 * 1024
+
+class UploadTooLarge(ValueError):
+    pass
+
+class InvalidImage(ValueError):
+    pass
+
+async def read_upload(upload: Any, max_bytes: int) -> bytes:
+    """Read an ``UploadFile`` in chunks, refusing to buffer more than ``max_bytes``."""
+    buf = bytearray()
+    while True:
+        chunk = await upload.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        buf.extend(chunk)
+        if len(buf) > max_bytes:
+            raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+    return bytes(buf)
+
+class BodyLimitMiddleware:
+    """ASGI middleware that refuses request bodies over ``max_bytes`` before anything parses them.
+
+    ``read_upload`` only sees the file after Starlette has spooled the whole
+    multipart form, so an oversized upload is rejected here instead: up front
+    from ``Content-Length``, or as soon as a chunked body crosses the limit.
+    """
+
+    def __init__(self, app: Any, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def _reject(self, send: Any):
+        body = json.dumps({"detail": f"request body exceeds {self.max_bytes} bytes"}).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode()),
+                                (b"connection", b"close")]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope: Any, receive: Any, send: Any):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            return await self._reject(send)
+
+        received = 0
+        rejected = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes and not rejected:
+                    rejected = True
+                    if not started:
+                        await self._reject(send)
+                    # Looks like a client disconnect to the app, which stops reading
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if rejected:
+                return  # the 413 already went out; drop the app's own error response
+            started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Decode encoded image bytes straight into a BGR array, no temp file."""
+    import cv2
+    img: Optional[np.ndarray] = None
+    if data:
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise InvalidImage("could not decode image")
+    return img
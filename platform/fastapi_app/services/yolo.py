@@ -1,37 +1,127 @@
 from __future__ import annotations
-from typing import Optional, Dict
-import torch
+from typing import Any, Callable, Optional, Dict, List, Union
+from concurrent.futures import Future
+import functools
+import importlib.util
+import logging
+import os
+import queue
+import threading
+import time
+import numpy as np
 from ..core.config import settings
+from . import startup
+from .metrics import BATCH_SIZE, MODEL_LOAD_SECONDS, STAGE_SECONDS, register_gauge
+from .uploads import InvalidImage
+
+logger = logging.getLogger(__name__)
+
+class InferenceError(RuntimeError):
+    """The model could not produce a result for an image (as opposed to a bad input)."""
 
 _model = None
 _names: Optional[Dict[int, str]] = None
+_backend: str = "torch"
+_model_lock = threading.Lock()
+# Ultralytics predictors keep per-call state on the model and are not thread-safe, so every
+# predict (executor threads, the micro-batcher, /detect/batch, warmup) is serialized here
+_predict_lock = threading.Lock()
+# idle -> loading -> ready | unavailable; read by /detect/status without touching the model
+_state: str = "idle"
+_auto_device: Optional[str] = None
+
+# Runtime package each non-PyTorch backend needs at inference time
+_BACKEND_RUNTIMES = {"torchscript": "torch", "onnx": "onnxruntime", "openvino": "openvino"}
 
 def _try_import():
     try:
-        from ultralytics import YOLO  # type: ignore
+        # ultralytics pulls in torch; deferred to the first load so importing the app stays cheap
+        with startup.phase("import_ultralytics"):
+            from ultralytics import YOLO  # type: ignore
         return YOLO
     except Exception:
         return None
 
+def _int8_requested() -> bool:
+    return (settings.MODEL_PRECISION or "fp32").lower() == "int8"
+
+def _resolve_backend() -> tuple[str, Optional[str]]:
+    """Pick the configured backend, falling back to PyTorch when its artifact or runtime is missing."""
+    backend = (settings.INFERENCE_BACKEND or "torch").lower()
+    if backend != "torch":
+        runtime = _BACKEND_RUNTIMES.get(backend)
+        path = settings.get_backend_model_path()
+        if runtime is None:
+            logger.warning("Unknown INFERENCE_BACKEND %r, using torch", backend)
+        elif importlib.util.find_spec(runtime) is None:
+            logger.warning("%s backend needs the %s package, using torch", backend, runtime)
+        elif path is None:
+            int8 = " --int8 static" if _int8_requested() else ""
+            logger.warning("No exported %s model found (run `python -m fastapi_app.export --format %s%s`), using torch", backend, backend, int8)
+        else:
+            return backend, path
+    if _int8_requested():
+        logger.warning("MODEL_PRECISION=int8 needs INFERENCE_BACKEND=onnx or openvino, serving fp32")
+    return "torch", settings.get_model_path() or "yolov8n.pt"
+
 def get_model():
-    global _model, _names
+    global _model, _names, _backend
     if _model is not None:
         return _model
-    YOLO = _try_import()
-    if YOLO is None:
-        return None
-    # Use the resolved model path
-    path = settings.get_model_path() or "yolov8n.pt"
-    try:
-        _model = YOLO(path)
-        # names mapping available on model.model.names in ultralytics
+    # One load at a time: the background loader and early requests must not both build a model
+    with _model_lock:
+        if _model is not None:
+            return _model
+        YOLO = _try_import()
+        if YOLO is None:
+            return None
+        backend, path = _resolve_backend()
         try:
-            _names = getattr(getattr(_model, "model", None), "names", None)
+            start = time.perf_counter()
+            _model = YOLO(path, task="detect") if backend != "torch" else YOLO(path)
+            _backend = backend
+            elapsed = time.perf_counter() - start
+            MODEL_LOAD_SECONDS.labels(backend=backend).set(elapsed)
+            startup.record("model_load", elapsed)
+            # names mapping is exposed on the YOLO wrapper for every backend
+            try:
+                _names = getattr(_model, "names", None) or getattr(getattr(_model, "model", None), "names", None)
+            except Exception:
+                _names = None
+            return _model
         except Exception:
-            _names = None
-        return _model
-    except Exception:
-        return None
+            return None
+
+def load_model(warm: bool = True) -> bool:
+    """Load (and optionally warm up) the model, tracking the state reported by ``model_state``."""
+    global _state
+    _state = "loading"
+    ok = get_model() is not None
+    if ok and warm:
+        with startup.phase("warmup"):
+            warmup()
+    _state = "ready" if ok else "unavailable"
+    startup.log("model " + _state)
+    return ok
+
+def start_background_load(warm: bool = True) -> threading.Thread:
+    global _state
+    _state = "loading"
+    t = threading.Thread(target=load_model, args=(warm,), name="model-loader", daemon=True)
+    t.start()
+    return t
+
+def model_state() -> str:
+    """Non-blocking: never triggers a load."""
+    if _state == "idle" and _model is not None:
+        return "ready"
+    return _state
+
+def get_backend() -> str:
+    return _backend
+
+def get_precision() -> str:
+    return "int8" if _backend in ("onnx", "openvino") and _int8_requested() else "fp32"
 
 def has_model() -> bool:
     return get_model() is not None
@@ -40,75 +130,445 @@ def get_names() -> Dict[int, str]:
     get_model()
     return _names or {}
 
+def _device() -> str:
+    if settings.DEVICE:
+        return settings.DEVICE
+    if _backend != "torch":
+        return "cpu"
+    global _auto_device
+    if _auto_device is None:
+        import torch
+        _auto_device = "mps" if torch.backends.mps.is_available() else "cpu"
+    return _auto_device
+
+def _predict(m, source: Any, **kwargs):
+    """The only call site of ``m.predict``; one call at a time across all threads."""
+    with _predict_lock:
+        return m.predict(source=source, device=_device(), verbose=False, **kwargs)
+
 def warmup():
     m = get_model()
     if m is None:
         return False
     try:
-        import numpy as np
         img = np.zeros((settings.IMGSZ, settings.IMGSZ, 3), dtype=np.uint8)
-        _ = m.predict(img, conf=settings.CONF_THRESHOLD, device=(settings.DEVICE or ("mps" if torch.backends.mps.is_available() else "cpu")), imgsz=settings.IMGSZ, verbose=False)
+        _ = _predict(m, img, conf=settings.CONF_THRESHOLD, imgsz=settings.IMGSZ)
         return True
     except Exception:
         return False
 
-def run_yolo_detection(image_path: str) -> dict:
-    m = get_model()
-    if m is None:
-        return {"label": "none", "confidence": 0.0}
+def _empty_result() -> dict:
+    return {"label": "none", "confidence": 0.0}
+
+def _domain_label(name: str) -> str:
+    """Map a model class name onto the fire/smoke/none domain labels."""
+    l = (name or "").lower()
+    if "fire" in l:
+        return "fire"
+    if "smoke" in l:
+        return "smoke"
+    return "none"
+
+def _class_name(cls: int) -> str:
+    if _names and cls in _names:
+        return _names[cls]
+    return str(cls)
+
+def _summarize_probs(probs) -> dict:
+    try:
+        top_idx = int(probs.top1)
+        top_conf = float(probs.top1conf)
+    except Exception as e:
+        raise InferenceError("could not read class probabilities from the model output") from e
+    return {"label": _domain_label(_class_name(top_idx)), "confidence": top_conf}
+
+def _boxes_arrays(r) -> Optional[tuple]:
+    """``(xyxy, conf, cls)`` of one result as host arrays, or None if it has no boxes."""
+    boxes = getattr(r, "boxes", None)
+    if boxes is None:
+        return None
     try:
-        results = m.predict(
-            source=image_path,
-            conf=settings.CONF_THRESHOLD,
-            device=(settings.DEVICE or ("mps" if torch.backends.mps.is_available() else "cpu")),
-            imgsz=settings.IMGSZ,
-            verbose=False,
+        return (
+            boxes.xyxy.cpu().numpy().astype(np.float32, copy=False),
+            boxes.conf.cpu().numpy().astype(np.float32, copy=False),
+            boxes.cls.cpu().numpy().astype(np.int64),
         )
-        best_label = "none"
-        best_conf = 0.0
-        # Iterate predictions; choose highest confidence
-        for r in results:
-            boxes = getattr(r, "boxes", None)
-            if boxes is None:
-                # try classification probabilities if present
-                probs = getattr(r, "probs", None)
-                if probs is not None:
-                    try:
-                        top_idx = int(probs.top1)
-                        top_conf = float(probs.top1conf)
-                        name = None
-                        if _names and top_idx in _names:
-                            name = _names[top_idx]
-                        if top_conf > best_conf:
-                            best_conf = top_conf
-                            best_label = name or str(top_idx)
-                    except Exception:
-                        pass
+    except Exception:
+        return None
+
+def _summarize_arrays(xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray, shape) -> dict:
+    """Top domain label plus structured detections, computed on whole arrays.
+
+    Per-class max, counts and the fraction of the image covered by boxes
+    (summed areas, so overlaps count twice; capped at 1) take a handful of
+    NumPy ops regardless of how many boxes there are.
+    """
+    if conf.size == 0:
+        return {**_empty_result(), "detections": [], "classes": {}}
+
+    top = int(conf.argmax())
+    best_conf = float(conf[top])
+    label = _domain_label(_class_name(int(cls[top])))
+
+    h, w = (shape or (0, 0))[:2]
+    areas = (xyxy[:, 2] - xyxy[:, 0]).clip(min=0) * (xyxy[:, 3] - xyxy[:, 1]).clip(min=0)
+    present, inverse = np.unique(cls, return_inverse=True)
+    counts = np.bincount(inverse)
+    max_conf = np.full(len(present), -np.inf, dtype=np.float32)
+    np.maximum.at(max_conf, inverse, conf)
+    area_sum = np.bincount(inverse, weights=areas)
+    coverage = np.minimum(area_sum / float(h * w), 1.0) if h and w else np.zeros(len(present))
+
+    classes = {
+        _class_name(c): {"count": n, "max_confidence": m, "area_fraction": a}
+        for c, n, m, a in zip(present.tolist(), counts.tolist(), max_conf.tolist(), coverage.tolist())
+    }
+    names = [_class_name(c) for c in cls.tolist()]
+    detections = [
+        {"label": n, "confidence": c, "box": b}
+        for n, c, b in zip(names, conf.tolist(), np.round(xyxy.astype(np.float64), 1).tolist())
+    ]
+    return {"label": label, "confidence": best_conf, "detections": detections, "classes": classes}
+
+def _summarize(r) -> dict:
+    """Reduce one ultralytics result to the top domain label plus structured detections."""
+    if getattr(r, "boxes", None) is None:
+        probs = getattr(r, "probs", None)
+        if probs is None:
+            raise InferenceError("model output has neither boxes nor class probabilities")
+        return _summarize_probs(probs)
+    arrays = _boxes_arrays(r)
+    if arrays is None:
+        raise InferenceError("could not read boxes from the model output")
+    return _summarize_arrays(*arrays, getattr(r, "orig_shape", None))
+
+# ultralytics reports per-image milliseconds under these keys
+_SPEED_STAGES = (("preprocess", "preprocess"), ("inference", "forward"), ("postprocess", "postprocess"))
+
+# Process-mode workers buffer stage/batch observations here and ship them to the parent with
+# their results; a worker's own registry is never scraped
+_captured: Optional[List[tuple]] = None
+
+def capture_observations():
+    """Buffer observations from now on instead of recording them (called once in each worker)."""
+    global _captured
+    _captured = []
+
+def take_observations() -> List[tuple]:
+    """Observations buffered since the last call, as ``(kind, label, value)``."""
+    global _captured
+    taken, _captured = _captured or [], []
+    return taken
+
+def record_observations(observations: List[tuple]):
+    """Record observations shipped back by a worker in this process's metrics."""
+    for kind, label, value in observations:
+        if kind == "stage":
+            STAGE_SECONDS.labels(stage=label).observe(value)
+        else:
+            BATCH_SIZE.observe(value)
+
+def _observe_stage(stage: str, seconds: float):
+    if _captured is not None:
+        _captured.append(("stage", stage, seconds))
+    else:
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+def _observe_batch(size: int):
+    if _captured is not None:
+        _captured.append(("batch", "", size))
+    else:
+        BATCH_SIZE.observe(size)
+
+def _stage_seconds(r) -> Dict[str, float]:
+    speed = getattr(r, "speed", None) or {}
+    return {stage: speed[key] / 1000.0 for key, stage in _SPEED_STAGES if speed.get(key) is not None}
+
+def _record_stages(r, summarize_s: float, extra: Optional[Dict[str, float]] = None):
+    """Observe one image's stage timings; ``extra`` adds further seconds per stage (e.g. its tiles)."""
+    stages = _stage_seconds(r)
+    for stage, seconds in (extra or {}).items():
+        stages[stage] = stages.get(stage, 0.0) + seconds
+    for stage, seconds in stages.items():
+        if stage == "postprocess":
+            # NMS inside ultralytics plus our own reduction to a label
+            seconds += summarize_s
+        _observe_stage(stage, seconds)
+
+def tile_windows(h: int, w: int, tile: int, overlap: float) -> np.ndarray:
+    """``(N, 4)`` x0, y0, x1, y1 windows of side ``tile`` covering the frame with ``overlap``.
+
+    The last row/column is aligned to the frame edge instead of padding.
+    """
+    stride = max(1, int(tile * (1.0 - overlap)))
+
+    def starts(size: int) -> List[int]:
+        if size <= tile:
+            return [0]
+        out = list(range(0, size - tile, stride))
+        return out + [size - tile]
+
+    ys, xs = starts(h), starts(w)
+    grid = np.array([(x, y) for y in ys for x in xs], dtype=np.int64)
+    return np.column_stack([grid, np.minimum(grid[:, 0] + tile, w), np.minimum(grid[:, 1] + tile, h)])
+
+def merge_nms(xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray, threshold: float) -> np.ndarray:
+    """Class-aware greedy NMS on intersection-over-smaller; returns kept indices.
+
+    IoS rather than IoU so a box clipped at a tile border is merged into the
+    full box of the same object from a neighbouring tile or the full frame.
+    """
+    if conf.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Shift each class into its own coordinate range so classes never suppress each other
+    offset = cls.astype(np.float32)[:, None] * (float(xyxy.max()) + 1.0)
+    b = xyxy + offset
+    areas = (b[:, 2] - b[:, 0]).clip(min=0) * (b[:, 3] - b[:, 1]).clip(min=0)
+    order = np.argsort(-conf, kind="stable")
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = (np.minimum(b[i, 2], b[rest, 2]) - np.maximum(b[i, 0], b[rest, 0])).clip(min=0)
+        ih = (np.minimum(b[i, 3], b[rest, 3]) - np.maximum(b[i, 1], b[rest, 1])).clip(min=0)
+        ios = iw * ih / np.maximum(np.minimum(areas[i], areas[rest]), 1e-9)
+        order = rest[ios < threshold]
+    return np.array(keep, dtype=np.int64)
+
+def _gate_windows(windows: np.ndarray, coarse: np.ndarray, margin: float) -> np.ndarray:
+    """Windows that overlap any coarse-pass box grown by ``margin`` pixels."""
+    if coarse.size == 0:
+        return windows[:0]
+    grown = coarse + np.array([-margin, -margin, margin, margin], dtype=np.float32)
+    hit = (
+        (windows[:, None, 0] < grown[None, :, 2]) & (windows[:, None, 2] > grown[None, :, 0])
+        & (windows[:, None, 1] < grown[None, :, 3]) & (windows[:, None, 3] > grown[None, :, 1])
+    )
+    return windows[hit.any(axis=1)]
+
+def _load_image(source: Any) -> np.ndarray:
+    """BGR frame for a path or array; raises ``InvalidImage`` for anything the model cannot take."""
+    if isinstance(source, np.ndarray):
+        if source.dtype != np.uint8 or source.ndim != 3 or source.shape[2] != 3 or not source.size:
+            raise InvalidImage(f"expected an HxWx3 uint8 frame, got {source.dtype} {source.shape}")
+        return source
+    import cv2
+    img = cv2.imread(str(source))
+    if img is None:
+        raise InvalidImage(f"could not decode image {os.path.basename(str(source))}")
+    return img
+
+def _run_tiled(m, images: List[np.ndarray]) -> List[dict]:
+    """SAHI-style inference: full-frame pass, then every tile of every large frame in one ``predict``."""
+    gate = settings.TILE_GATE
+    full_conf = min(settings.CONF_THRESHOLD, settings.TILE_GATE_CONF) if gate else settings.CONF_THRESHOLD
+    full = _predict(m, images, conf=full_conf, imgsz=settings.IMGSZ, batch=len(images))
+    _observe_batch(len(images))
+
+    tile, overlap = settings.TILE_SIZE, settings.TILE_OVERLAP
+    crops, owners, offsets = [], [], []
+    per_image = []
+    # Stage time of each frame's tiles, summed, on top of its full-frame pass
+    tile_stages: List[Dict[str, float]] = [{} for _ in images]
+    for idx, (img, r) in enumerate(zip(images, full)):
+        arrays = _boxes_arrays(r)
+        xyxy, conf, cls = arrays if arrays is not None else (np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64))
+        keep = conf >= settings.CONF_THRESHOLD
+        per_image.append([[xyxy[keep]], [conf[keep]], [cls[keep]]])
+        h, w = img.shape[:2]
+        if max(h, w) <= settings.TILE_MIN_SIDE:
+            continue
+        windows = tile_windows(h, w, tile, overlap)
+        if gate:
+            windows = _gate_windows(windows, xyxy, tile * overlap)
+        for x0, y0, x1, y1 in windows.tolist():
+            crops.append(img[y0:y1, x0:x1])
+            owners.append(idx)
+            offsets.append((x0, y0, x0, y0))
+
+    if crops:
+        # All tiles of all frames go through the model together
+        tiled = _predict(m, crops, conf=settings.CONF_THRESHOLD, imgsz=tile, batch=len(crops))
+        _observe_batch(len(crops))
+        for r, idx, off in zip(tiled, owners, offsets):
+            for stage, seconds in _stage_seconds(r).items():
+                tile_stages[idx][stage] = tile_stages[idx].get(stage, 0.0) + seconds
+            arrays = _boxes_arrays(r)
+            if arrays is None or arrays[1].size == 0:
                 continue
+            xyxy, conf, cls = arrays
+            per_image[idx][0].append(xyxy + np.asarray(off, dtype=np.float32))
+            per_image[idx][1].append(conf)
+            per_image[idx][2].append(cls)
+
+    out = []
+    for img, r, extra, (boxes, confs, classes) in zip(images, full, tile_stages, per_image):
+        start = time.perf_counter()
+        xyxy, conf, cls = np.concatenate(boxes), np.concatenate(confs), np.concatenate(classes)
+        keep = merge_nms(xyxy, conf, cls, settings.TILE_MERGE_THRESHOLD)
+        out.append(_summarize_arrays(xyxy[keep], conf[keep], cls[keep], img.shape))
+        _record_stages(r, time.perf_counter() - start, extra)
+    return out
+
+def _infer_images(m, images: List[np.ndarray]) -> List[dict]:
+    """One ``predict`` over already decoded frames; raises if the model fails."""
+    if settings.TILING:
+        return _run_tiled(m, images)
+    results = _predict(m, images, conf=settings.CONF_THRESHOLD, imgsz=settings.IMGSZ, batch=len(images))
+    _observe_batch(len(images))
+    out = []
+    for r in results:
+        start = time.perf_counter()
+        out.append(_summarize(r))
+        _record_stages(r, time.perf_counter() - start)
+    if len(out) != len(images):
+        raise InferenceError(f"model returned {len(out)} results for {len(images)} images")
+    return out
+
+def _failure(exc: Exception) -> InferenceError:
+    err = InferenceError(f"inference failed: {exc!r}")
+    err.__cause__ = exc
+    return err
+
+def run_yolo_detection_batch(sources: List[Any], return_exceptions: bool = False) -> List[Union[dict, Exception]]:
+    """Run a single ``predict`` over several images (paths or arrays).
+
+    Every source is decoded and validated first, so an unreadable file only
+    fails its own slot. If the batched ``predict`` raises, the images are run
+    one at a time so each gets its own result or its own error. Errors are
+    raised (the first one) unless ``return_exceptions`` is set, in which case
+    the failed slots hold ``InvalidImage`` / ``InferenceError`` instances.
+    Without a loaded model every slot is ``{"label": "none", "confidence": 0.0}``,
+    as it always was; the routes check ``has_model`` and fall back before this.
+    """
+    if not sources:
+        return []
+    out: List[Union[dict, Exception, None]] = [None] * len(sources)
+    m = get_model()
+    if m is None:
+        out = [_empty_result() for _ in sources]
+    else:
+        images, index = [], []
+        for i, source in enumerate(sources):
             try:
-                n = len(boxes)
-            except Exception:
-                n = 0
-            if n > 0:
-                try:
-                    for i in range(n):
-                        conf = float(boxes.conf[i].item())
-                        cls = int(boxes.cls[i].item())
-                        name = None
-                        if _names and cls in _names:
-                            name = _names[cls]
-                        if conf > best_conf:
-                            best_conf = conf
-                            best_label = name or str(cls)
-                except Exception:
-                    pass
-        # Map common labels to domain classes if available
-        label = "none"
-        l = (best_label or "").lower()
-        if "fire" in l:
-            label = "fire"
-        elif "smoke" in l:
-            label = "smoke"
-        return {"label": label, "confidence": best_conf}
-    except Exception:
-        return {"label": "none", "confidence": 0.0}
+                images.append(_load_image(source))
+                index.append(i)
+            except InvalidImage as e:
+                out[i] = e
+        if images:
+            try:
+                results = _infer_images(m, images)
+            except Exception as e:
+                if len(images) == 1:
+                    logger.exception("inference failed")
+                    results = [_failure(e)]
+                else:
+                    logger.warning("batched predict of %d images failed (%r); retrying one by one", len(images), e)
+                    results = []
+                    for img in images:
+                        try:
+                            results.extend(_infer_images(m, [img]))
+                        except Exception as e1:
+                            logger.exception("inference failed")
+                            results.append(_failure(e1))
+            for i, res in zip(index, results):
+                out[i] = res
+    if not return_exceptions:
+        for res in out:
+            if isinstance(res, Exception):
+                raise res
+    return out
+
+def run_yolo_detection(image_path: Any) -> dict:
+    return run_yolo_detection_batch([image_path])[0]
+
+class MicroBatcher:
+    """Coalesce concurrent single-image requests into one batched call.
+
+    Callers block in ``submit`` while a background thread gathers up to
+    ``max_batch_size`` pending items, waiting at most ``max_wait_ms`` after
+    the first one arrives, then runs ``fn`` once and fans results back out.
+    ``fn`` returns one entry per item; an exception instance in a slot is
+    raised to that caller only.
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], List[dict]], max_batch_size: int, max_wait_ms: float):
+        self._fn = fn
+        self._max_batch_size = max(1, int(max_batch_size))
+        self._max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: "queue.Queue[tuple[Any, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="yolo-microbatcher", daemon=True)
+                self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, source: Any) -> dict:
+        fut: Future = Future()
+        self._ensure_started()
+        self._queue.put((source, fut))
+        return fut.result()
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._max_wait
+        while len(batch) < self._max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    # Take whatever is already queued, but do not wait for more
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self._fn([src for src, _ in batch])
+            except Exception as exc:
+                for _, fut in batch:
+                    fut.set_exception(exc)
+                continue
+            # ``fn`` reports per-item failures as exception instances
+            for (_, fut), res in zip(batch, results):
+                if isinstance(res, Exception):
+                    fut.set_exception(res)
+                else:
+                    fut.set_result(res)
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+def get_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(functools.partial(run_yolo_detection_batch, return_exceptions=True),
+                                       settings.BATCH_MAX_SIZE, settings.BATCH_MAX_WAIT_MS)
+    return _batcher
+
+register_gauge("fire_batcher_queue_depth", "Images waiting for the micro-batcher",
+               lambda: _batcher.queue_depth if _batcher is not None else 0)
+
+def run_yolo_detection_batched(image_path: Any) -> dict:
+    """Single-image detection routed through the shared micro-batcher."""
+    # Decoded on the caller's thread: a bad file fails this request, never the batch it would join
+    image = _load_image(image_path)
+    if not settings.BATCHING or settings.BATCH_MAX_SIZE <= 1:
+        return run_yolo_detection(image)
+    return get_batcher().submit(image)
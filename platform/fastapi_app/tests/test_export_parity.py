@@ -0,0 +1,87 @@
+import glob
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from fastapi_app.core.config import settings
+from fastapi_app.export import _iou, check_parity, compare_boxes, export
+
+def _arrays(boxes, confs, classes):
+    return (
+        np.asarray(boxes, dtype=np.float32).reshape(-1, 4),
+        np.asarray(confs, dtype=np.float32),
+        np.asarray(classes, dtype=int),
+    )
+
+REF = _arrays([[10, 10, 50, 50], [100, 100, 200, 180]], [0.9, 0.6], [0, 1])
+
+def test_iou_identical_disjoint_and_partial():
+    a = np.array([[0, 0, 10, 10]], dtype=np.float32)
+    b = np.array([[0, 0, 10, 10], [20, 20, 30, 30], [5, 0, 15, 10]], dtype=np.float32)
+    ious = _iou(a, b)
+    assert ious.shape == (1, 3)
+    assert ious[0, 0] == pytest.approx(1.0)
+    assert ious[0, 1] == 0.0
+    assert ious[0, 2] == pytest.approx(50 / 150)
+
+def test_all_boxes_matched():
+    other = _arrays([[11, 10, 50, 51], [100, 101, 200, 180]], [0.88, 0.63], [0, 1])
+    r = compare_boxes(REF, other, iou_thr=0.9)
+    assert r == {"ref_boxes": 2, "other_boxes": 2, "matched": 2, "max_conf_diff": pytest.approx(0.03, abs=1e-6)}
+
+def test_missing_box():
+    other = _arrays([[10, 10, 50, 50]], [0.9], [0])
+    r = compare_boxes(REF, other, iou_thr=0.9)
+    assert (r["ref_boxes"], r["other_boxes"], r["matched"]) == (2, 1, 1)
+
+def test_extra_box():
+    other = _arrays([[10, 10, 50, 50], [100, 100, 200, 180], [300, 300, 320, 320]], [0.9, 0.6, 0.4], [0, 1, 0])
+    r = compare_boxes(REF, other, iou_thr=0.9)
+    assert (r["ref_boxes"], r["other_boxes"], r["matched"]) == (2, 3, 2)
+    assert r["max_conf_diff"] == pytest.approx(0.0)
+
+def test_class_mismatch_is_not_matched():
+    other = _arrays([[10, 10, 50, 50], [100, 100, 200, 180]], [0.9, 0.6], [1, 0])
+    r = compare_boxes(REF, other, iou_thr=0.5)
+    assert r["matched"] == 0
+    assert r["max_conf_diff"] == 0.0
+
+def test_low_iou_is_not_matched():
+    other = _arrays([[30, 30, 70, 70], [100, 100, 200, 180]], [0.9, 0.6], [0, 1])
+    r = compare_boxes(REF, other, iou_thr=0.9)
+    assert r["matched"] == 1
+
+def test_each_box_matches_once():
+    # Two reference boxes on top of one exported box: only the more confident one matches
+    ref = _arrays([[10, 10, 50, 50], [10, 10, 50, 50]], [0.5, 0.9], [0, 0])
+    other = _arrays([[10, 10, 50, 50]], [0.85], [0])
+    r = compare_boxes(ref, other, iou_thr=0.9)
+    assert r["matched"] == 1
+    assert r["max_conf_diff"] == pytest.approx(0.05, abs=1e-6)
+
+def test_empty_sides():
+    empty = _arrays([], [], [])
+    assert compare_boxes(empty, empty, 0.9)["matched"] == 0
+    r = compare_boxes(REF, empty, 0.9)
+    assert (r["ref_boxes"], r["other_boxes"], r["matched"]) == (2, 0, 0)
+
+
+def _sample_images(limit=8):
+    folder = settings.IMAGE_DIR or ""
+    return sorted(p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(folder, f"*.{ext}")))[:limit]
+
+def test_onnx_export_matches_pytorch_on_sample_images(tmp_path):
+    pytest.importorskip("ultralytics")
+    pytest.importorskip("onnxruntime")
+    weights = settings.get_model_path()
+    if not weights:
+        pytest.skip("no model weights (MODEL_PATH)")
+    images = _sample_images()
+    if not images:
+        pytest.skip(f"no sample images in IMAGE_DIR={settings.IMAGE_DIR!r}")
+    # Export a copy so the artifact next to the real weights is left alone
+    local = shutil.copy(weights, tmp_path / os.path.basename(weights))
+    exported = export(str(local), "onnx", settings.IMGSZ)
+    assert check_parity(str(local), exported, images, settings.IMGSZ, settings.CONF_THRESHOLD)
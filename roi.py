@@ -0,0 +1,124 @@
+"""Per-camera regions of interest and exclusion zones.
+
+Each source can declare ROI polygons (where fire may appear) and exclusion
+polygons (known heat sources, sky, reflective ceilings). Frames are cropped to
+the bounding box of the allowed area before inference, which shrinks the
+model input, and detections whose centre lies outside the ROI or inside an
+exclusion zone are dropped afterwards. The masks are rasterized once per
+source and frame size, not per frame.
+
+Config (JSON, or YAML when PyYAML is installed), keyed by source name; ``*``
+applies to sources without their own entry::
+
+    {
+      "dock": {
+        "roi": [[[0, 300], [1920, 300], [1920, 1080], [0, 1080]]],
+        "exclude": [[[1500, 700], [1700, 700], [1700, 900], [1500, 900]]]
+      },
+      "*": {"normalized": true, "exclude": [[[0, 0], [1, 0], [1, 0.2], [0, 0.2]]]}
+    }
+
+Coordinates are pixels, or fractions of the frame size with ``"normalized": true``.
+"""
+import json
+import os
+
+import cv2
+import numpy as np
+
+
+class RegionMask:
+    def __init__(self, roi=None, exclude=None, normalized=False):
+        """
+        roi: list of polygons ([[x, y], ...]) inference is limited to (None/empty = whole frame)
+        exclude: list of polygons whose detections are discarded
+        normalized: polygon coordinates are fractions of width/height instead of pixels
+        """
+        self.roi = [np.asarray(p, dtype=np.float64) for p in (roi or [])]
+        self.exclude = [np.asarray(p, dtype=np.float64) for p in (exclude or [])]
+        self.normalized = normalized
+        self._cache = {}
+        self.detections_dropped = 0
+
+    def _polygons(self, polygons, w, h):
+        scale = np.array([w, h], dtype=np.float64) if self.normalized else 1.0
+        return [np.round(p * scale).astype(np.int32) for p in polygons]
+
+    def prepare(self, shape):
+        """``(allowed_mask, (x0, y0, x1, y1))`` for a frame shape, rasterized on first use."""
+        key = tuple(shape[:2])
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        h, w = key
+        if self.roi:
+            allowed = np.zeros((h, w), dtype=np.uint8)
+            cv2.fillPoly(allowed, self._polygons(self.roi, w, h), 1)
+        else:
+            allowed = np.ones((h, w), dtype=np.uint8)
+        if self.exclude:
+            cv2.fillPoly(allowed, self._polygons(self.exclude, w, h), 0)
+        x, y, bw, bh = cv2.boundingRect(allowed)
+        box = (x, y, x + bw, y + bh) if bw and bh else (0, 0, 0, 0)
+        self._cache[key] = (allowed.astype(bool), box)
+        return self._cache[key]
+
+    def crop(self, frame):
+        """Return ``(view, (x0, y0))``; the view is a slice of ``frame``, not a copy."""
+        _, (x0, y0, x1, y1) = self.prepare(frame.shape)
+        return frame[y0:y1, x0:x1], (x0, y0)
+
+    def is_empty(self, shape):
+        _, (x0, y0, x1, y1) = self.prepare(shape)
+        return x1 <= x0 or y1 <= y0
+
+    def keep(self, xyxy, shape, offset=(0, 0)):
+        """Boolean mask of boxes (crop coordinates) whose centre falls in the allowed area."""
+        allowed, _ = self.prepare(shape)
+        xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+        if not len(xyxy):
+            return np.zeros(0, dtype=bool)
+        h, w = allowed.shape
+        cx = ((xyxy[:, 0] + xyxy[:, 2]) * 0.5 + offset[0]).astype(np.int64).clip(0, w - 1)
+        cy = ((xyxy[:, 1] + xyxy[:, 3]) * 0.5 + offset[1]).astype(np.int64).clip(0, h - 1)
+        return allowed[cy, cx]
+
+    def restore(self, result, frame, offset):
+        """Map an ultralytics result on the crop back onto ``frame``, dropping masked detections."""
+        import torch
+
+        result.orig_img = frame
+        result.orig_shape = frame.shape[:2]
+        boxes = getattr(result, "boxes", None)
+        if boxes is None:
+            return result
+        data = boxes.data.clone()
+        keep = self.keep(data[:, :4].cpu().numpy(), frame.shape, offset)
+        self.detections_dropped += int((~keep).sum())
+        data = data[torch.from_numpy(keep).to(data.device)]
+        data[:, [0, 2]] += offset[0]
+        data[:, [1, 3]] += offset[1]
+        result.update(boxes=data)
+        return result
+
+
+def _read_config(path):
+    with open(path) as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            import yaml
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+def load_regions(path):
+    """Parse a region config into ``{source_name: RegionMask}`` (``"*"`` is the default)."""
+    if not path or not os.path.exists(path):
+        return {}
+    regions = {}
+    for name, spec in (_read_config(path) or {}).items():
+        regions[str(name)] = RegionMask(spec.get("roi"), spec.get("exclude"), bool(spec.get("normalized", False)))
+    return regions
+
+
+def region_for(regions, name):
+    return regions.get(str(name)) or regions.get("*")
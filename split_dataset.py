@@ -1,38 +1,199 @@
-import os, random, shutil
-
-# Paths
-images_path = "data/images"
-labels_path = "data/labels"
-
-# Create train and val folders
-os.makedirs("data/images/train", exist_ok=True)
-os.makedirs("data/images/val", exist_ok=True)
-os.makedirs("data/labels/train", exist_ok=True)
-os.makedirs("data/labels/val", exist_ok=True)
-
-# Get all image files
-images = [f for f in os.listdir(images_path) if f.endswith(".jpg") or f.endswith(".png")]
-random.shuffle(images)
-
-# Split (80% train, 20% val)
-split_index = int(0.8 * len(images))
-train_images = images[:split_index]
-val_images = images[split_index:]
-
-def copy_files(image_list, subset):
-    for img in image_list:
-        img_src = os.path.join(images_path, img)
-        lbl_src = os.path.join(labels_path, os.path.splitext(img)[0] + ".txt")
-        
-        img_dst = f"data/images/{subset}/{img}"
-        lbl_dst = f"data/labels/{subset}/{os.path.splitext(img)[0]}.txt"
-        
-        if os.path.exists(img_src):
-            shutil.copy(img_src, img_dst)
-        if os.path.exists(lbl_src):
-            shutil.copy(lbl_src, lbl_dst)
-
-copy_files(train_images, "train")
-copy_files(val_images, "val")
-
-print(f"✅ Dataset split completed! Train: {len(train_images)} | Val: {len(val_images)}")
+"""Split images and YOLO labels into train/val/test sets.
+
+    python split_dataset.py                                   # 80/20 train/val, hardlinks, seed 0
+    python split_dataset.py --ratios 0.7 0.2 0.1 --seed 42    # train/val/test
+    python split_dataset.py --mode manifest                   # write data/{train,val,test}.txt only
+    python split_dataset.py --data data.yaml                  # also refresh the counts in data.yaml
+
+The split is reproducible (fixed seed, sorted input) and stratified by the
+classes present in each label file, so fire-only, smoke-only, fire+smoke and
+empty images keep the same proportions in every subset.
+
+Modes:
+    hardlink  link files into <out>/images/<split> (no extra disk; falls back to copy across devices)
+    symlink   relative symlinks instead of hardlinks
+    copy      real copies, done in a thread pool
+    manifest  no files at all: one image list per split, which YOLO accepts in place of a folder
+"""
+import argparse
+import os
+import random
+import re
+import shutil
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+SPLITS = ("train", "val", "test")
+
+
+def scan_images(images_path):
+    """Image file names directly under ``images_path`` (split sub-folders are skipped)."""
+    with os.scandir(images_path) as it:
+        return sorted(e.name for e in it if e.is_file() and e.name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def label_classes(label_file):
+    """Sorted tuple of class ids in a YOLO label file; empty for a missing/empty file."""
+    try:
+        with open(label_file) as f:
+            return tuple(sorted({int(line.split(None, 1)[0]) for line in f if line.strip()}))
+    except (OSError, ValueError):
+        return ()
+
+
+def stratum_name(classes, names):
+    if not classes:
+        return "empty"
+    return "+".join(names[c] if 0 <= c < len(names) else str(c) for c in classes)
+
+
+def stratified_split(images, strata, ratios, seed):
+    """``{split: [image, ...]}`` with every stratum divided by ``ratios`` independently."""
+    total = sum(ratios)
+    ratios = [r / total for r in ratios]
+    rng = random.Random(seed)
+    groups = defaultdict(list)
+    for img in images:
+        groups[strata[img]].append(img)
+    result = {split: [] for split in SPLITS}
+    for key in sorted(groups, key=str):
+        members = groups[key]
+        rng.shuffle(members)
+        n_train = int(len(members) * ratios[0] + 0.5)
+        n_val = int(len(members) * ratios[1] + 0.5) if ratios[2] else len(members) - n_train
+        result["train"] += members[:n_train]
+        result["val"] += members[n_train:n_train + n_val]
+        result["test"] += members[n_train + n_val:]
+    return result
+
+
+def _place(src, dst, mode):
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if mode == "symlink":
+        os.symlink(os.path.relpath(src, os.path.dirname(dst)), dst)
+        return
+    if mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass  # cross-device or unsupported filesystem: copy instead
+    shutil.copyfile(src, dst)
+
+
+def _clear_dir(path):
+    """Remove files left by a previous split so a re-run doesn't mix seeds."""
+    os.makedirs(path, exist_ok=True)
+    with os.scandir(path) as it:
+        for e in it:
+            if e.is_file(follow_symlinks=False) or e.is_symlink():
+                os.remove(e.path)
+
+
+def materialize(split, args):
+    """Link/copy every image and label into ``<out>/{images,labels}/<split>``."""
+    jobs = []
+    for subset, images in split.items():
+        img_dir = os.path.join(args.out, "images", subset)
+        lbl_dir = os.path.join(args.out, "labels", subset)
+        _clear_dir(img_dir)
+        _clear_dir(lbl_dir)
+        for img in images:
+            stem = os.path.splitext(img)[0]
+            jobs.append((os.path.join(args.images, img), os.path.join(img_dir, img)))
+            lbl_src = os.path.join(args.labels, stem + ".txt")
+            if os.path.exists(lbl_src):
+                jobs.append((lbl_src, os.path.join(lbl_dir, stem + ".txt")))
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        # list() so the first failure is raised here rather than swallowed
+        list(pool.map(lambda job: _place(job[0], job[1], args.mode), jobs))
+
+
+def write_manifests(split, args):
+    paths = {}
+    for subset, images in split.items():
+        path = os.path.join(args.out, f"{subset}.txt")
+        with open(path, "w") as f:
+            f.writelines(os.path.abspath(os.path.join(args.images, img)) + "\n" for img in sorted(images))
+        paths[subset] = path
+    return paths
+
+
+def update_data_yaml(path, counts, split_paths=None):
+    """Rewrite the split counts (and optionally split paths) in place, keeping comments."""
+    with open(path) as f:
+        lines = f.read().splitlines()
+    values = {f"{s}_count": str(n) for s, n in counts.items()}
+    if split_paths:
+        values.update(split_paths)
+    seen = set()
+    for i, line in enumerate(lines):
+        m = re.match(r"^(\w+):\s*([^#]*?)(\s*#.*)?$", line)
+        if m and m.group(1) in values:
+            lines[i] = f"{m.group(1)}: {values[m.group(1)]}{m.group(3) or ''}"
+            seen.add(m.group(1))
+    lines += [f"{k}: {v}" for k, v in values.items() if k not in seen]
+    with open(path + ".tmp", "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def class_names(data_yaml):
+    if data_yaml and os.path.exists(data_yaml):
+        import yaml
+        with open(data_yaml) as f:
+            names = (yaml.safe_load(f) or {}).get("names") or []
+        if isinstance(names, dict):
+            return [names[k] for k in sorted(names)]
+        return list(names)
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproducible, stratified train/val/test split")
+    parser.add_argument("--images", default="data/images", help="folder with all images")
+    parser.add_argument("--labels", default="data/labels", help="folder with the matching YOLO labels")
+    parser.add_argument("--out", default="data", help="root for images/<split>, labels/<split> or <split>.txt")
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.8, 0.2], metavar="R",
+                        help="train val [test] fractions (default: 0.8 0.2)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=("hardlink", "symlink", "copy", "manifest"), default="hardlink")
+    parser.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 1) * 4),
+                        help="I/O threads for linking/copying")
+    parser.add_argument("--data", default=None, help="dataset yaml whose *_count fields are refreshed")
+    parser.add_argument("--write-paths", action="store_true", help="also point train/val/test in --data at this split")
+    args = parser.parse_args(argv)
+
+    if len(args.ratios) not in (2, 3) or any(r < 0 for r in args.ratios) or not sum(args.ratios):
+        parser.error("--ratios takes two or three non-negative fractions")
+    ratios = list(args.ratios) + [0.0] * (3 - len(args.ratios))
+
+    images = scan_images(args.images)
+    strata = {img: label_classes(os.path.join(args.labels, os.path.splitext(img)[0] + ".txt")) for img in images}
+    split = stratified_split(images, strata, ratios, args.seed)
+
+    if args.mode == "manifest":
+        split_paths = write_manifests(split, args)
+    else:
+        materialize(split, args)
+        split_paths = {s: os.path.join(args.out, "images", s) for s in SPLITS}
+
+    counts = {s: len(split[s]) for s in SPLITS}
+    if args.data:
+        update_data_yaml(args.data, counts, split_paths if args.write_paths else None)
+
+    names = class_names(args.data)
+    print(f"✅ Dataset split completed ({args.mode}, seed {args.seed})! "
+          f"Train: {counts['train']} | Val: {counts['val']} | Test: {counts['test']}")
+    for subset in SPLITS:
+        if split[subset]:
+            per_stratum = Counter(stratum_name(strata[img], names) for img in split[subset])
+            print(f"   {subset}: " + ", ".join(f"{k} {v}" for k, v in sorted(per_stratum.items())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""Multi-stream YOLO inference engine.
+
+One capture thread per source keeps only the newest frame, so slow inference
+drops stale frames instead of letting RTSP buffers build up latency. The
+engine collects the latest unseen frame of every stream and runs them through
+the model in a single batched ``predict`` call.
+
+    from ultralytics import YOLO
+    from stream_engine import StreamEngine
+
+    engine = StreamEngine(YOLO("weights/best_swapped.pt"), {"dock": "rtsp://...", "hall": 0})
+    engine.start()
+    for name, frame, result, latency in engine.step():
+        ...
+"""
+import argparse
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from motion_gate import MotionGate
+from roi import load_regions, region_for
+
+
+class LatestFrameCapture(threading.Thread):
+    """Background reader for one source that only keeps the most recent frame."""
+
+    def __init__(self, name, source, reconnect=True, reconnect_delay=2.0, on_frame=None):
+        super().__init__(name=f"capture-{name}", daemon=True)
+        self.stream_name = name
+        self.source = source
+        self.on_frame = on_frame
+        self.reconnect = reconnect
+        self.reconnect_delay = reconnect_delay
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.ended = False
+        self._lock = threading.Lock()
+        self._frame = None
+        self._frame_id = 0
+        self._captured_at = 0.0
+        self._consumed_id = 0
+        self._stop_event = threading.Event()
+        self._cap = None
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        # Ask the backend not to queue frames on our behalf (honoured by some backends)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if self._cap is None or not self._cap.isOpened():
+                self._cap = self._open()
+                if not self._cap.isOpened():
+                    if not self.reconnect:
+                        break
+                    self._stop_event.wait(self.reconnect_delay)
+                    continue
+            ok, frame = self._cap.read()
+            if not ok:
+                self._cap.release()
+                self._cap = None
+                if not self.reconnect:
+                    break
+                self._stop_event.wait(self.reconnect_delay)
+                continue
+            now = time.time()
+            with self._lock:
+                if self._frame_id > self._consumed_id:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._frame_id += 1
+                self._captured_at = now
+                self.frames_read += 1
+            if self.on_frame is not None:
+                self.on_frame()
+        if self._cap is not None:
+            self._cap.release()
+        self.ended = True
+        if self.on_frame is not None:
+            self.on_frame()
+
+    def latest(self):
+        """Return ``(frame, captured_at)`` if a frame arrived since the last call, else None."""
+        with self._lock:
+            if self._frame_id == self._consumed_id:
+                return None
+            self._consumed_id = self._frame_id
+            return self._frame, self._captured_at
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class StreamStats:
+    """Rolling FPS and end-to-end latency (capture -> result) for one stream."""
+
+    def __init__(self, window=60):
+        self._done_at = deque(maxlen=window)
+        self._latency = deque(maxlen=window)
+        self.frames_inferred = 0
+
+    def record(self, captured_at, done_at):
+        self._done_at.append(done_at)
+        self._latency.append(done_at - captured_at)
+        self.frames_inferred += 1
+
+    @property
+    def fps(self):
+        if len(self._done_at) < 2:
+            return 0.0
+        span = self._done_at[-1] - self._done_at[0]
+        return (len(self._done_at) - 1) / span if span > 0 else 0.0
+
+    @property
+    def latency_ms(self):
+        if not self._latency:
+            return 0.0
+        return 1000.0 * sum(self._latency) / len(self._latency)
+
+
+class StreamEngine:
+    """Batches the newest frame of N sources into one ``predict`` per step."""
+
+    def __init__(self, model, sources, imgsz=640, conf=0.35, device="cpu", max_batch=None, reconnect=True,
+                 gate_factory=None, regions=None):
+        """``gate_factory(name)`` may return a MotionGate (or None) to skip unchanged frames per stream.
+
+        ``regions`` maps source names (or ``"*"``) to ``roi.RegionMask``: frames are
+        cropped to the region before gating and inference, and results are mapped
+        back to full-frame coordinates with excluded detections removed.
+        """
+        self.model = model
+        self.imgsz = imgsz
+        self.conf = conf
+        self.device = device
+        self.max_batch = max_batch
+        self._frame_ready = threading.Event()
+        self.captures = {
+            name: LatestFrameCapture(name, src, reconnect=reconnect, on_frame=self._frame_ready.set)
+            for name, src in sources.items()
+        }
+        self.stats = {name: StreamStats() for name in sources}
+        self.gates = {name: gate_factory(name) for name in sources} if gate_factory else {}
+        self.regions = {name: region_for(regions, name) for name in sources} if regions else {}
+        self._next = 0
+
+    def start(self):
+        for cap in self.captures.values():
+            cap.start()
+        return self
+
+    def stop(self):
+        for cap in self.captures.values():
+            cap.stop()
+        for cap in self.captures.values():
+            cap.join(timeout=2.0)
+
+    @property
+    def running(self):
+        return any(not cap.ended for cap in self.captures.values())
+
+    def _gather(self):
+        names = list(self.captures)
+        # Rotate the starting stream so a max_batch cap does not starve the tail
+        names = names[self._next:] + names[:self._next]
+        batch = []
+        for name in names:
+            item = self.captures[name].latest()
+            if item is None:
+                continue
+            frame, captured_at = item
+            region = self.regions.get(name)
+            if region is not None:
+                if region.is_empty(frame.shape):
+                    continue
+                crop, offset = region.crop(frame)
+            else:
+                crop, offset = frame, None
+            gate = self.gates.get(name)
+            if gate is not None and not gate.should_infer(crop):
+                continue
+            batch.append((name, frame, crop, offset, captured_at))
+            if self.max_batch and len(batch) >= self.max_batch:
+                break
+        if names:
+            self._next = (self._next + 1) % len(names)
+        return batch
+
+    def step(self, timeout=0.1):
+        """Run one batched inference over every stream with a fresh frame.
+
+        Returns a list of ``(name, frame, result, latency_s)``; empty when no
+        stream produced a new frame within ``timeout`` seconds.
+        """
+        batch = self._gather()
+        if not batch:
+            self._frame_ready.clear()
+            # Re-check after clearing so a frame landing in between is not missed
+            batch = self._gather()
+            if not batch:
+                self._frame_ready.wait(timeout)
+                batch = self._gather()
+            if not batch:
+                return []
+        results = self.model.predict(
+            source=[crop for _, _, crop, _, _ in batch],
+            imgsz=self.imgsz,
+            conf=self.conf,
+            device=self.device,
+            verbose=False,
+        )
+        done = time.time()
+        out = []
+        for (name, frame, _, offset, captured_at), res in zip(batch, results):
+            if offset is not None:
+                res = self.regions[name].restore(res, frame, offset)
+            self.stats[name].record(captured_at, done)
+            out.append((name, frame, res, done - captured_at))
+        return out
+
+    def run(self, on_result=None):
+        """Process until every source has ended (or forever for live streams)."""
+        while True:
+            items = self.step()
+            if not items and not self.running:
+                break
+            for item in items:
+                if on_result is not None:
+                    on_result(*item)
+
+    def report(self):
+        out = {}
+        for name, st in self.stats.items():
+            gate = self.gates.get(name)
+            out[name] = {
+                "fps": round(st.fps, 2),
+                "latency_ms": round(st.latency_ms, 1),
+                "frames_inferred": st.frames_inferred,
+                "frames_read": self.captures[name].frames_read,
+                "frames_dropped": self.captures[name].frames_dropped,
+                "frames_skipped": gate.frames_skipped if gate is not None else 0,
+                "detections_masked": self.regions[name].detections_dropped if self.regions.get(name) else 0,
+            }
+        return out
+
+
+def parse_sources(values):
+    """Turn ``["0", "dock=rtsp://..."]`` into ``{"0": 0, "dock": "rtsp://..."}``."""
+    sources = {}
+    for v in values:
+        name, sep, src = v.partition("=")
+        if not sep or "://" in name:
+            name, src = v, v
+        sources[name] = int(src) if src.isdigit() else src
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless multi-camera fire/smoke monitoring")
+    parser.add_argument("--weights", type=str, default="weights/best_swapped.pt")
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--conf", type=float, default=0.35)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--source", action="append", required=True,
+                        help="camera index, file or URL; repeat for more streams (optionally name=url)")
+    parser.add_argument("--max-batch", type=int, default=None, help="cap frames per predict call")
+    parser.add_argument("--motion-threshold", type=float, default=0.0,
+                        help="fraction of changed pixels needed to run the detector (0 = infer every frame)")
+    parser.add_argument("--keyframe-interval", type=float, default=5.0,
+                        help="seconds between forced inferences when the scene is static")
+    parser.add_argument("--roi", type=str, default=None, help="per-source ROI / exclusion polygon config (JSON or YAML)")
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between stats lines")
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    model = YOLO(args.weights)
+    gate_factory = None
+    if args.motion_threshold > 0:
+        gate_factory = lambda _name: MotionGate(threshold=args.motion_threshold,
+                                                keyframe_interval=args.keyframe_interval)
+    engine = StreamEngine(model, parse_sources(args.source), imgsz=args.imgsz, conf=args.conf,
+                          device=args.device, max_batch=args.max_batch, gate_factory=gate_factory,
+                          regions=load_regions(args.roi)).start()
+    last = time.time()
+    try:
+        while True:
+            if not engine.step() and not engine.running:
+                break
+            if time.time() - last >= args.report_every:
+                last = time.time()
+                for name, st in engine.report().items():
+                    print(f"[{name}] fps={st['fps']} latency={st['latency_ms']}ms "
+                          f"inferred={st['frames_inferred']} skipped={st['frames_skipped']} dropped={st['frames_dropped']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+
+
+if __name__ == "__main__":
+    main()
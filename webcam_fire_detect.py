@@ -1,11 +1,14 @@
 import argparse
-import time
 from pathlib import Path
 
 import cv2
 import torch
 from ultralytics import YOLO
 
+from motion_gate import MotionGate
+from roi import load_regions
+from stream_engine import StreamEngine, parse_sources
+
 
 def draw_fps(img, fps):
     txt = f"FPS: {fps:.1f}"
@@ -19,7 +22,14 @@ def main():
     parser.add_argument("--device", type=str, default="0", help="cuda device id like '0' or 'cpu'")
     parser.add_argument("--conf", type=float, default=0.35, help="confidence threshold")
     parser.add_argument("--imgsz", type=int, default=640, help="inference image size")
-    parser.add_argument("--source", type=str, default="0", help="camera index or RTSP/URL (e.g. '0' or 'rtsp://...')")
+    parser.add_argument("--source", action="append", default=None,
+                        help="camera index or RTSP/URL (e.g. '0' or 'rtsp://...'); repeat to monitor several streams")
+    parser.add_argument("--motion-threshold", type=float, default=0.0,
+                        help="fraction of changed pixels needed to run the detector (0 = infer every frame)")
+    parser.add_argument("--keyframe-interval", type=float, default=5.0,
+                        help="seconds between forced inferences when the scene is static")
+    parser.add_argument("--roi", type=str, default=None,
+                        help="JSON/YAML file with per-source ROI and exclusion polygons (see roi.py)")
     parser.add_argument("--save", action="store_true", help="save annotated video to file")
     parser.add_argument("--out", type=str, default="runs/webcam_fire.mp4", help="output video file")
     args = parser.parse_args()
@@ -34,61 +44,55 @@ def main():
     model = YOLO(args.weights)
     model.to(device)
 
-    # Open capture (webcam index or URL)
-    src = int(args.source) if args.source.isdigit() else args.source
-    cap = cv2.VideoCapture(src)
-    if not cap.isOpened():
-        raise RuntimeError(f"Could not open source: {args.source}")
-
-    # Prepare writer (optional)
+    # Threaded capture per source; stale frames are dropped while the model is busy
+    sources = parse_sources(args.source or ["0"])
+    gate_factory = None
+    if args.motion_threshold > 0:
+        gate_factory = lambda _name: MotionGate(threshold=args.motion_threshold,
+                                                keyframe_interval=args.keyframe_interval)
+    engine = StreamEngine(model, sources, imgsz=args.imgsz, conf=args.conf, device=device,
+                          gate_factory=gate_factory, regions=load_regions(args.roi))
+    for name, cap in engine.captures.items():
+        probe = cv2.VideoCapture(cap.source)
+        if not probe.isOpened():
+            raise RuntimeError(f"Could not open source: {name}")
+        probe.release()
+
+    # Prepare writer (optional, first stream only)
     writer = None
-    if args.save:
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        w  = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 1280)
-        h  = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 720)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        if not fps or fps <= 0:  # some webcams don’t report FPS
-            fps = 30
-        Path(Path(args.out).parent).mkdir(parents=True, exist_ok=True)
-        writer = cv2.VideoWriter(args.out, fourcc, fps, (w, h))
-
-    prev_t = time.time()
+    first = next(iter(sources))
+    engine.start()
+
     try:
         while True:
-            ok, frame = cap.read()
-            if not ok:
+            items = engine.step()
+            if not items and not engine.running:
                 print("Stream ended or failed to read frame.")
                 break
 
-            # Inference (stream=True gives generator of Results)
-            results = model.predict(
-                source=frame,
-                imgsz=args.imgsz,
-                conf=args.conf,
-                verbose=False,
-                device=device
-            )
-
-            # Annotate first (and only) result
-            res = results[0]
-            annotated = res.plot()  # draws boxes/labels
-
-            # Draw FPS
-            now = time.time()
-            fps = 1.0 / max(1e-6, (now - prev_t))
-            prev_t = now
-            draw_fps(annotated, fps)
-
-            # Show
-            cv2.imshow("YOLOv8 Fire/Smoke - Webcam", annotated)
-            if writer is not None:
-                writer.write(annotated)
+            for name, frame, res, latency in items:
+                annotated = res.plot()  # draws boxes/labels
+
+                # Draw per-stream inference FPS
+                draw_fps(annotated, engine.stats[name].fps)
+
+                # Show
+                cv2.imshow(f"YOLOv8 Fire/Smoke - {name}", annotated)
+                if args.save and name == first:
+                    if writer is None:
+                        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+                        h, w = annotated.shape[:2]
+                        Path(Path(args.out).parent).mkdir(parents=True, exist_ok=True)
+                        writer = cv2.VideoWriter(args.out, fourcc, 30, (w, h))
+                    writer.write(annotated)
 
             # Quit with 'q'
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
     finally:
-        cap.release()
+        engine.stop()
+        for name, gate in engine.gates.items():
+            print(f"[{name}] motion gate: {gate.summary()}")
         if writer is not None:
             writer.release()
         cv2.destroyAllWindows()
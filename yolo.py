@@ -1,102 +1,132 @@
-import cv2
-import time
-import datetime
-import supervision as sv
-from ultralytics import YOLO
-
-# -------------------- FIREBASE SETUP --------------------
-import firebase_admin
-from firebase_admin import credentials, db
-
-# Load your service account key (replace with your JSON file)
-cred = credentials.Certificate("serviceAccountKey.json")
-
-firebase_admin.initialize_app(cred, {
-    "databaseURL": "https://fire-detection-alert-system-default-rtdb.firebaseio.com/"
-})
-
-# Firebase reference
-alert_ref = db.reference('/alerts')
-
-# -------------------- ALERT FUNCTION --------------------
-last_alert_time = 0
-ALERT_COOLDOWN = 10  # seconds
-
-def send_alert(message):
-    global last_alert_time
-    current_time = time.time()
-
-    if current_time - last_alert_time >= ALERT_COOLDOWN:
-        alert_ref.push({
-            "message": message,
-            "time": str(datetime.datetime.now())
-        })
-        print("🔥 Alert sent to Firebase:", message)
-        last_alert_time = current_time
-
-# -------------------- YOLO SETUP --------------------
-model = YOLO("best.pt")  # Replace with your trained model
-
-bounding_box_annotator = sv.BoundingBoxAnnotator()
-label_annotator = sv.LabelAnnotator()
-
-# -------------------- CAMERA SETUP --------------------
-cap = cv2.VideoCapture(0)
-if not cap.isOpened():
-    print("❌ Cannot open camera")
-    exit()
-
-# Fix Windows display issue
-cv2.namedWindow("Webcam Fire Detection", cv2.WINDOW_NORMAL)
-print("📸 Webcam started... Press ESC to exit.")
-
-# -------------------- MAIN LOOP --------------------
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("⚠️ Can't receive frame. Exiting...")
-        break
-
-    results = model(frame)[0]
-    detections = sv.Detections.from_ultralytics(results)
-
-    # -------------------- FIRE DETECTION --------------------
-    fire_detected = False
-    if detections.class_id is not None and len(detections.class_id) > 0:
-        for i in range(len(detections.class_id)):
-            class_id = int(detections.class_id[i])
-            label = model.names[class_id].lower()
-            if "fire" in label:
-                fire_detected = True
-                break
-
-    # -------------------- SEND FIRE ALERT --------------------
-    if fire_detected:
-        send_alert("🔥 Fire detected by webcam!")
-
-    # -------------------- ANNOTATION --------------------
-    annotated_image = bounding_box_annotator.annotate(
-        scene=frame, detections=detections)
-
-    custom_labels = []
-    for i in range(len(detections.xyxy)):
-        class_id = int(detections.class_id[i])
-        confidence = detections.confidence[i]
-        name = model.names[class_id] if class_id < len(model.names) else "Unknown"
-        custom_labels.append(f"{name} {confidence:.2f}")
-
-    annotated_image = label_annotator.annotate(
-        scene=annotated_image, detections=detections, labels=custom_labels)
-
-    # -------------------- DISPLAY --------------------
-    cv2.imshow("Webcam Fire Detection", annotated_image)
-
-    # -------------------- EXIT ON ESC --------------------
-    if cv2.waitKey(1) & 0xFF == 27:  # ESC key
-        print("👋 ESC pressed, exiting...")
-        break
-
-# -------------------- CLEANUP --------------------
-cap.release()
-cv2.destroyAllWindows()
-print("🛑 Webcam closed.")
+import cv2
+import datetime
+import numpy as np
+import supervision as sv
+from ultralytics import YOLO
+from motion_gate import MotionGate
+from roi import load_regions, region_for
+from incident_tracker import IncidentTracker, OPENED, CLOSED
+from notifier import NotificationDispatcher
+
+# -------------------- FIREBASE SETUP --------------------
+import firebase_admin
+from firebase_admin import credentials, db
+
+# Load your service account key (replace with your JSON file)
+cred = credentials.Certificate("serviceAccountKey.json")
+
+firebase_admin.initialize_app(cred, {
+    "databaseURL": "https://fire-detection-alert-system-default-rtdb.firebaseio.com/"
+})
+
+# Firebase reference
+alert_ref = db.reference('/alerts')
+
+# -------------------- ALERT FUNCTION --------------------
+# Frames are aggregated into incidents (3 of 5 frames to open, 15 quiet frames
+# to close) so a persistent fire produces one alert and a single noisy frame none
+tracker = IncidentTracker(open_threshold=0.5, close_threshold=0.3, k=3, n=5, close_after=15)
+
+def push_alert(payload):
+    # Runs on the dispatcher's worker, never in the video loop
+    alert_ref.push(payload)
+    print("🔥 Alert sent to Firebase:", payload["message"])
+
+# Pushes are queued and retried with backoff in the background
+notifications = NotificationDispatcher({"firebase": (push_alert, 1)}, queue_size=100, retries=3)
+
+def send_alert(message, incident_id=None):
+    notifications.notify("firebase", {
+        "message": message,
+        "time": str(datetime.datetime.now()),
+        "incident_id": incident_id
+    }, incident_id=incident_id, kind=OPENED)
+
+# -------------------- YOLO SETUP --------------------
+model = YOLO("best.pt")  # Replace with your trained model
+FIRE_CLASS_IDS = np.array([i for i, name in model.names.items() if "fire" in name.lower()])
+
+bounding_box_annotator = sv.BoundingBoxAnnotator()
+label_annotator = sv.LabelAnnotator()
+
+# Optional ROI / exclusion polygons for this camera (entry "webcam" or "*" in roi.json)
+region = region_for(load_regions("roi.json"), "webcam")
+
+# Skip the detector on frames where (almost) nothing changed
+motion_gate = MotionGate(threshold=0.01, keyframe_interval=5.0)
+detections = sv.Detections.empty()
+
+# -------------------- CAMERA SETUP --------------------
+cap = cv2.VideoCapture(0)
+if not cap.isOpened():
+    print("❌ Cannot open camera")
+    exit()
+
+# Fix Windows display issue
+cv2.namedWindow("Webcam Fire Detection", cv2.WINDOW_NORMAL)
+print("📸 Webcam started... Press ESC to exit.")
+
+# -------------------- MAIN LOOP --------------------
+while True:
+    ret, frame = cap.read()
+    if not ret:
+        print("⚠️ Can't receive frame. Exiting...")
+        break
+
+    # Only the allowed region is sent to the model; results come back in frame coordinates
+    view, offset = region.crop(frame) if region is not None else (frame, None)
+
+    # Static frames reuse the previous detections for annotation
+    if view.size and motion_gate.should_infer(view):
+        results = model(view)[0]
+        if offset is not None:
+            results = region.restore(results, frame, offset)
+        detections = sv.Detections.from_ultralytics(results)
+
+        # -------------------- FIRE DETECTION --------------------
+        fire_conf = 0.0
+        if detections.class_id is not None and len(detections.class_id) > 0:
+            fire_scores = detections.confidence[np.isin(detections.class_id, FIRE_CLASS_IDS)]
+            if fire_scores.size:
+                fire_conf = float(fire_scores.max())
+
+        event = tracker.update("webcam", fire_conf)
+    elif view.size:
+        # Unchanged scene, unchanged result: keeps the tracker's K-of-N counting in frames
+        event = tracker.hold("webcam")
+    else:
+        event = None
+
+    # -------------------- SEND FIRE ALERT --------------------
+    if event is not None and event.kind == OPENED:
+        send_alert("🔥 Fire detected by webcam!", event.incident_id)
+    elif event is not None and event.kind == CLOSED:
+        print(f"✅ Fire incident {event.incident_id} cleared (peak {event.peak_confidence:.2f})")
+
+    # -------------------- ANNOTATION --------------------
+    annotated_image = bounding_box_annotator.annotate(
+        scene=frame, detections=detections)
+
+    custom_labels = [
+        f"{model.names.get(class_id, 'Unknown')} {confidence:.2f}"
+        for class_id, confidence in zip(detections.class_id.tolist(), detections.confidence.tolist())
+    ] if len(detections) else []
+
+    annotated_image = label_annotator.annotate(
+        scene=annotated_image, detections=detections, labels=custom_labels)
+
+    # -------------------- DISPLAY --------------------
+    cv2.imshow("Webcam Fire Detection", annotated_image)
+
+    # -------------------- EXIT ON ESC --------------------
+    if cv2.waitKey(1) & 0xFF == 27:  # ESC key
+        print("👋 ESC pressed, exiting...")
+        break
+
+# -------------------- CLEANUP --------------------
+cap.release()
+cv2.destroyAllWindows()
+notifications.close()
+print("🛑 Webcam closed.")
+print(f"Motion gate: {motion_gate.summary()}")
+print(f"Notifications: {notifications.summary()}")